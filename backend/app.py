@@ -12,6 +12,9 @@ from config import config
 from models import db
 from routes import register_blueprints
 from utils.migration_manager import init_migrations
+from utils.json_provider import init_json_provider
+from utils.compression import init_compression
+from utils.change_tracking import install_change_tracking
 
 # Initialize extensions
 mail = Mail()
@@ -35,12 +38,18 @@ def create_app(config_name=None):
     # Load backend URL from environment (for file uploads)
     app.config['BACKEND_BASE_URL'] = os.getenv('BACKEND_BASE_URL', 'http://localhost:5000')
 
+    # orjson-backed jsonify/get_json (falls back to Flask's provider without orjson)
+    init_json_provider(app)
+
     # Initialize core extensions
     db.init_app(app)
     mail.init_app(app)
     Session(app)
     jwt.init_app(app)
 
+    # Bump table_versions after each commit (conditional GETs on dashboards)
+    install_change_tracking()
+
     # Upload folder setup
     app.config["UPLOAD_FOLDER"] = os.path.join(os.getcwd(), "backend", "uploads")
     os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)  # Ensure folder exists
@@ -53,6 +62,9 @@ def create_app(config_name=None):
     # Register all API blueprints
     register_blueprints(app)
 
+    # gzip/Brotli for JSON and other text responses (see COMPRESS_* settings)
+    init_compression(app)
+
     # ---------- CORS Setup ----------
     CORS(
         app,
@@ -83,35 +95,14 @@ def initialize_database(app):
     """Run migrations, create tables, and seed defaults"""
     with app.app_context():
         try:
-            print("\n🔧 Running custom migrations...")
-            init_migrations(app, db)
-
-            # Create all tables
-            db.create_all()
-            print("✅ Database tables created successfully!")
-
-            # Ensure column exists in purchase_order table
-            from sqlalchemy import text
-            result = db.session.execute(
-                text(
-                    """
-                    SELECT COLUMN_NAME 
-                    FROM INFORMATION_SCHEMA.COLUMNS 
-                    WHERE TABLE_SCHEMA = DATABASE() 
-                    AND TABLE_NAME = 'purchase_order' 
-                    AND COLUMN_NAME = 'original_requirements'
-                    """
-                )
-            )
-            if not result.fetchone():
-                print("🔄 Adding missing 'original_requirements' column...")
-                db.session.execute(
-                    text("ALTER TABLE purchase_order ADD COLUMN original_requirements TEXT")
-                )
-                db.session.commit()
-                print("✅ Column added successfully!")
+            # Migrations and db.create_all() run only for steps missing from
+            # the schema_migrations ledger; SKIP_MIGRATIONS leaves them to
+            # scripts/migrate.py (e.g. a release step before workers boot)
+            if app.config.get("SKIP_MIGRATIONS"):
+                print("ℹ️ SKIP_MIGRATIONS is set, not running migrations")
             else:
-                print("ℹ️ 'original_requirements' column already exists")
+                print("\n🔧 Running custom migrations...")
+                init_migrations(app, db)
 
             # Ensure admin user exists
             from models import User
@@ -121,6 +112,18 @@ def initialize_database(app):
             else:
                 print("ℹ️ Admin user already exists")
 
+            # Pick up jobs left queued by a previous process
+            if app.config.get("JOB_QUEUE_MODE", "thread") == "thread":
+                from services.job_queue_service import JobQueueService
+                JobQueueService.start_embedded_worker(app)
+
+            # Warm the gate presence registry from today's sessions
+            try:
+                from services.gate_presence_service import gate_presence
+                gate_presence.rebuild()
+            except Exception as e:
+                print(f"⚠️ Gate presence registry not loaded (will load on first use): {e}")
+
         except Exception as e:
             print(f"❌ Error setting up database: {e}")
             raise
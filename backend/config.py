@@ -18,12 +18,36 @@ class Config:
     
     SQLALCHEMY_DATABASE_URI = f'mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}/{MYSQL_DATABASE}'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Connection pool, per worker process: at most DB_POOL_SIZE + DB_MAX_OVERFLOW connections
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '300'))  # Below MySQL's wait_timeout
+
     SQLALCHEMY_ENGINE_OPTIONS = {
         'pool_pre_ping': True,
-        'pool_recycle': 300,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
         'isolation_level': 'READ COMMITTED',  # Ensure we always read committed data
         'echo': False,  # Set to True for SQL debugging
     }
+
+    # Read replica for read_only routes (see utils/db_routing.py); unset = everything on the primary
+    MYSQL_REPLICA_HOST = os.getenv('MYSQL_REPLICA_HOST')
+    MYSQL_REPLICA_USER = os.getenv('MYSQL_REPLICA_USER', MYSQL_USER)
+    MYSQL_REPLICA_PASSWORD = os.getenv('MYSQL_REPLICA_PASSWORD', MYSQL_PASSWORD)
+    DB_REPLICA_POOL_SIZE = int(os.getenv('DB_REPLICA_POOL_SIZE', str(DB_POOL_SIZE)))
+    DATABASE_REPLICA_URI = os.getenv('DATABASE_REPLICA_URI') or (
+        f'mysql+pymysql://{MYSQL_REPLICA_USER}:{MYSQL_REPLICA_PASSWORD}@{MYSQL_REPLICA_HOST}/{MYSQL_DATABASE}'
+        if MYSQL_REPLICA_HOST else None
+    )
+    # Binds do not inherit SQLALCHEMY_ENGINE_OPTIONS, so the replica gets its own copy
+    SQLALCHEMY_BINDS = {
+        'replica': {**SQLALCHEMY_ENGINE_OPTIONS, 'url': DATABASE_REPLICA_URI, 'pool_size': DB_REPLICA_POOL_SIZE}
+    } if DATABASE_REPLICA_URI else {}
     
     # Flask Configuration
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
@@ -39,6 +63,18 @@ class Config:
 
     MAILERSEND_API_KEY = os.getenv('MAILERSEND_API_KEY')
     MAILERSEND_FROM_EMAIL = os.getenv('MAILERSEND_FROM_EMAIL')
+
+    # Outgoing mail transport (see utils/mail.py): mailersend, smtp or file
+    MAIL_TRANSPORT = os.getenv('MAIL_TRANSPORT', 'mailersend')
+    MAIL_FILE_DIR = os.getenv('MAIL_FILE_DIR')  # file transport; defaults to <tmp>/alankar_mail
+    MAIL_SMTP_HOST = os.getenv('MAIL_SMTP_HOST', 'localhost')
+    MAIL_SMTP_PORT = int(os.getenv('MAIL_SMTP_PORT', '1025'))
+    MAIL_SMTP_USERNAME = os.getenv('MAIL_SMTP_USERNAME')
+    MAIL_SMTP_PASSWORD = os.getenv('MAIL_SMTP_PASSWORD')
+    MAIL_SMTP_USE_TLS = os.getenv('MAIL_SMTP_USE_TLS', 'False').lower() == 'true'
+    MAIL_HTTP_POOL_SIZE = int(os.getenv('MAIL_HTTP_POOL_SIZE', '4'))  # Keep-alive connections to MailerSend
+    MAIL_MAX_RETRIES = int(os.getenv('MAIL_MAX_RETRIES', '3'))  # On 429 / 5xx / connection errors
+    MAIL_RETRY_MAX_SECONDS = int(os.getenv('MAIL_RETRY_MAX_SECONDS', '30'))  # Longer waits are left to the job queue
     
     # Google OAuth Configuration
     GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID')
@@ -51,6 +87,67 @@ class Config:
     # Backend URL for file uploads
     BACKEND_BASE_URL = os.getenv('BACKEND_BASE_URL', 'http://localhost:5000')
 
+    # PDF rendering (invoices, payslips)
+    PDF_RENDER_WORKERS = int(os.getenv('PDF_RENDER_WORKERS', '2'))
+    PDF_RENDER_TIMEOUT = int(os.getenv('PDF_RENDER_TIMEOUT', '60'))
+    PDF_CACHE_DIR = os.getenv('PDF_CACHE_DIR')  # Defaults to <tmp>/alankar_pdf_cache
+    PDF_CACHE_MAX_FILES = int(os.getenv('PDF_CACHE_MAX_FILES', '2000'))
+
+    # List endpoint paging (see utils/pagination.py)
+    PAGINATION_DEFAULT_LIMIT = int(os.getenv('PAGINATION_DEFAULT_LIMIT', '50'))
+    PAGINATION_MAX_LIMIT = int(os.getenv('PAGINATION_MAX_LIMIT', '500'))
+    PAGINATION_LEGACY_LIMIT = int(os.getenv('PAGINATION_LEGACY_LIMIT', '0'))  # Cap for requests without limit/cursor (0 = none; the UI loads those lists in full)
+
+    # Gate presence registry (see services/gate_presence_service.py)
+    GATE_PRESENCE_RESYNC_SECONDS = int(os.getenv('GATE_PRESENCE_RESYNC_SECONDS', '300'))
+    GATE_PRESENCE_REDIS_URL = os.getenv('GATE_PRESENCE_REDIS_URL')  # Set to sync presence across worker processes
+
+    # Schema migrations (see utils/migration_manager.py and scripts/migrate.py)
+    SKIP_MIGRATIONS = os.getenv('SKIP_MIGRATIONS', 'False').lower() == 'true'  # Set on workers when migrations run out-of-band
+    MIGRATION_LOCK_TIMEOUT = int(os.getenv('MIGRATION_LOCK_TIMEOUT', '300'))  # Seconds a worker waits for another to finish migrating
+
+    # Content-addressed upload store (photos served from /api/files/<sha256>.<ext>)
+    UPLOAD_STORE_DIR = os.getenv('UPLOAD_STORE_DIR')  # Defaults to <UPLOAD_FOLDER>/store
+    UPLOAD_MAX_BYTES = int(os.getenv('UPLOAD_MAX_BYTES', str(15 * 1024 * 1024)))
+    UPLOAD_THUMBNAIL_WORKERS = int(os.getenv('UPLOAD_THUMBNAIL_WORKERS', '1'))
+
+    # Background jobs (see services/job_queue_service.py and scripts/job_worker.py)
+    JOB_QUEUE_MODE = os.getenv('JOB_QUEUE_MODE', 'thread')  # thread, worker (separate process only) or inline
+    JOB_QUEUE_CONCURRENCY = int(os.getenv('JOB_QUEUE_CONCURRENCY', '2'))  # Jobs run at once per worker
+    JOB_POLL_SECONDS = float(os.getenv('JOB_POLL_SECONDS', '2'))
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '5'))
+    JOB_RETRY_BASE_SECONDS = int(os.getenv('JOB_RETRY_BASE_SECONDS', '30'))  # Doubles on each retry
+    JOB_RETRY_MAX_SECONDS = int(os.getenv('JOB_RETRY_MAX_SECONDS', '3600'))
+    JOB_LOCK_TIMEOUT_SECONDS = int(os.getenv('JOB_LOCK_TIMEOUT_SECONDS', '900'))  # Running jobs older than this are requeued
+
+    # Response compression (see utils/compression.py)
+    COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', 'True').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))  # Smaller bodies are sent as they are
+    COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', '6'))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', '4'))  # 0-11; higher is smaller but slower
+    COMPRESS_BLUEPRINTS = os.getenv('COMPRESS_BLUEPRINTS', '')  # Per-blueprint overrides, e.g. "audit:256,files:off"
+
+    # Per-table change versions: conditional GETs and @cached_by_tables (see utils/change_tracking.py)
+    CONDITIONAL_GET_MAX_AGE = int(os.getenv('CONDITIONAL_GET_MAX_AGE', '300'))  # Recompute at least this often (catches raw-SQL writes)
+    CHANGE_CACHE_TTL = int(os.getenv('CHANGE_CACHE_TTL', '300'))  # Same bound for cached service results
+    CHANGE_TRACKING_POLL_SECONDS = float(os.getenv('CHANGE_TRACKING_POLL_SECONDS', '1'))  # How stale other workers' versions may be
+    CHANGE_TRACKING_REDIS_URL = os.getenv('CHANGE_TRACKING_REDIS_URL')  # Mirror versions in Redis so reads skip the database
+
+    # Rate limiting on expensive endpoints (see utils/rate_limit.py); limits are "<requests>/<seconds>" or "off"
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+    RATE_LIMIT_STORE = os.getenv('RATE_LIMIT_STORE', 'memory')  # memory (per worker) or redis (shared)
+    RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL')
+    RATE_LIMIT_PROXY_HOPS = int(os.getenv('RATE_LIMIT_PROXY_HOPS', '0'))  # Trusted proxies setting X-Forwarded-For
+    RATE_LIMIT_LOGIN_IP = os.getenv('RATE_LIMIT_LOGIN_IP', '30/60')
+    RATE_LIMIT_LOGIN_ACCOUNT = os.getenv('RATE_LIMIT_LOGIN_ACCOUNT', '5/60')  # Failed logins per account and IP; a success resets it
+    RATE_LIMIT_RECOGNIZE_FACE = os.getenv('RATE_LIMIT_RECOGNIZE_FACE', '20/15')  # Per gate device (X-Device-ID) or IP
+
+    # GST verification (see services/gst_verification_service.py)
+    GST_PROVIDER = os.getenv('GST_PROVIDER', 'format')  # format, portal or stub
+    GST_CACHE_TTL_HOURS = int(os.getenv('GST_CACHE_TTL_HOURS', str(24 * 30)))  # Verified GSTINs
+    GST_CACHE_NEGATIVE_TTL_HOURS = int(os.getenv('GST_CACHE_NEGATIVE_TTL_HOURS', '24'))  # GSTINs the provider rejected
+    GST_CACHE_SIZE = int(os.getenv('GST_CACHE_SIZE', '2048'))  # In-process LRU entries
+
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
@@ -63,6 +160,11 @@ class TestConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}  # SQLite's StaticPool takes no pool sizing or MySQL isolation level
+    SQLALCHEMY_BINDS = {}
+    JOB_QUEUE_MODE = 'inline'
+    MAIL_TRANSPORT = 'file'
+    GST_PROVIDER = 'stub'
 
 # Configuration dictionary
 config = {
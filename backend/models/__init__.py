@@ -2,25 +2,29 @@
 Database models package initialization
 """
 from flask_sqlalchemy import SQLAlchemy
+from utils.db_routing import RoutingSession
 
-# Initialize SQLAlchemy instance
-db = SQLAlchemy()
+# Initialize SQLAlchemy instance (read_only routes query the replica bind, see utils/db_routing.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # Import all models to ensure they're registered with SQLAlchemy
 from .user import User, UserStatus
 from .production import ProductionOrder, AssemblyOrder, AssemblyTestResult, MachineTestResult, ReworkOrder
 from .purchase import PurchaseOrder
-from .inventory import StoreInventory
+from .inventory import StoreInventory, StockMovement, StockCheckpoint
 from .showroom import ShowroomProduct, DispatchRequest, TransportJob, GatePass, Vehicle
 from .finance import FinanceTransaction
 from .sales import SalesOrder, Customer, SalesTransaction, SalesTarget
 from .transport import PartLoadDetail
 from .approval import ApprovalRequest
 from .password_reset_token import PasswordResetToken
-from .hr import Employee, Attendance, Leave, Payroll, JobPosting, LeaveType, LeaveStatus, AttendanceStatus, JobStatus, SalaryType, JobApplication, Interview, Candidate, ApplicationStatus, InterviewStatus
+from .hr import Employee, Attendance, AttendanceMonthlyRollup, AttendanceRollupPeriod, Leave, Payroll, JobPosting, LeaveType, LeaveStatus, AttendanceStatus, JobStatus, SalaryType, JobApplication, Interview, Candidate, ApplicationStatus, InterviewStatus
 from .gate_entry import GateUser, GateEntryLog, GoingOutLog, GateEntrySession
 from .guest_list import GuestList, GuestStatus
 from .audit_trail import AuditTrail, AuditAction, AuditModule
+from .background_job import BackgroundJob
+from .gst_verification import GstVerification
+from .table_version import TableVersion
 
 # Export commonly used models
 __all__ = [
@@ -34,6 +38,8 @@ __all__ = [
     'ReworkOrder',
     'PurchaseOrder',
     'StoreInventory',
+    'StockMovement',
+    'StockCheckpoint',
     'ShowroomProduct',
     'DispatchRequest',
     'TransportJob',
@@ -49,6 +55,8 @@ __all__ = [
     'PasswordResetToken',
     'Employee',
     'Attendance',
+    'AttendanceMonthlyRollup',
+    'AttendanceRollupPeriod',
     'Leave',
     'Payroll',
     'JobPosting',
@@ -70,5 +78,8 @@ __all__ = [
     'GuestStatus',
     'AuditTrail',
     'AuditAction',
-    'AuditModule'
+    'AuditModule',
+    'BackgroundJob',
+    'GstVerification',
+    'TableVersion'
 ]
@@ -0,0 +1,50 @@
+"""
+Background Job Model
+Durable queue of work that runs outside the request (see services/job_queue_service.py)
+"""
+import json
+from utils.timezone_helpers import get_ist_now
+from models import db
+
+
+class BackgroundJob(db.Model):
+    """Model for a queued, running or finished background job"""
+    __tablename__ = 'background_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON arguments for the handler
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    idempotency_key = db.Column(db.String(200), unique=True, nullable=True)  # Same key -> same job, never enqueued twice
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_after = db.Column(db.DateTime, nullable=False, default=get_ist_now)  # Not picked up before this (retry backoff)
+    locked_by = db.Column(db.String(100), nullable=True)  # Worker that claimed the job
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    result = db.Column(db.Text, nullable=True)  # JSON value returned by the handler
+    created_at = db.Column(db.DateTime, default=get_ist_now)
+    updated_at = db.Column(db.DateTime, default=get_ist_now, onupdate=get_ist_now)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        # Workers poll for due jobs: WHERE status = 'queued' AND run_after <= now
+        db.Index('idx_background_jobs_status_run_after', 'status', 'run_after'),
+    )
+
+    def to_dict(self):
+        """Convert model instance to dictionary"""
+        return {
+            'id': self.id,
+            'jobType': self.job_type,
+            'status': self.status,
+            'idempotencyKey': self.idempotency_key,
+            'attempts': self.attempts,
+            'maxAttempts': self.max_attempts,
+            'runAfter': self.run_after.isoformat() if self.run_after else None,
+            'lastError': self.last_error,
+            'result': json.loads(self.result) if self.result else None,
+            'createdAt': self.created_at.isoformat() if self.created_at else None,
+            'updatedAt': self.updated_at.isoformat() if self.updated_at else None,
+            'finishedAt': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -1,7 +1,9 @@
 """
 Gate Entry System Models
 """
+import json
 from datetime import datetime
+from sqlalchemy import event
 from utils.timezone_helpers import get_ist_now
 from models import db
 
@@ -13,7 +15,9 @@ class GateUser(db.Model):
     name = db.Column(db.String(200), nullable=False)
     phone = db.Column(db.String(20), unique=True, nullable=False, index=True)
     photo = db.Column(db.Text, nullable=True)  # Base64 encoded photo
+    photo_key = db.Column(db.String(80), nullable=True)  # Content-addressed copy of photo in the upload store (see UploadService)
     face_encoding = db.Column(db.Text, nullable=True)  # Serialized face encodings (JSON array) - LONGTEXT in DB for 7 encodings (~292KB)
+    has_face_encoding = db.Column(db.Boolean, default=False, nullable=False)  # Kept in sync with face_encoding so listings need not load it
     status = db.Column(db.String(50), default='active')  # active, inactive, blocked
     registered_at = db.Column(db.DateTime, default=get_ist_now)
     last_entry = db.Column(db.DateTime, nullable=True)
@@ -26,24 +30,32 @@ class GateUser(db.Model):
     going_out_logs = db.relationship('GoingOutLog', backref='user', lazy='dynamic')
     sessions = db.relationship('GateEntrySession', backref='user', lazy='dynamic')
     
-    def to_dict(self):
-        """Convert model instance to dictionary"""
-        has_face_encoding = self.face_encoding is not None and self.face_encoding.strip() != '' and self.face_encoding != '[]'
+    @staticmethod
+    def encoding_present(face_encoding):
+        """True if a stored face_encoding value holds at least one encoding"""
+        if face_encoding is None or face_encoding.strip() == '' or face_encoding == '[]':
+            return False
         try:
-            if has_face_encoding:
-                import json
-                encoding_data = json.loads(self.face_encoding)
-                has_face_encoding = isinstance(encoding_data, list) and len(encoding_data) > 0
-        except:
-            has_face_encoding = False
-            
+            encoding_data = json.loads(face_encoding)
+            return isinstance(encoding_data, list) and len(encoding_data) > 0
+        except (ValueError, TypeError):
+            return False
+    
+    @staticmethod
+    def photo_url(user_id, updated_at, size='thumb'):
+        """Versioned URL of a user's photo; changes whenever the user row is updated"""
+        version = int(updated_at.timestamp()) if updated_at else 0
+        return f"/api/gate-entry/users/{user_id}/photo?size={size}&v={version}"
+    
+    def to_dict(self):
+        """Convert model instance to dictionary (full detail, including photo)"""
         return {
             'id': self.id,
             'name': self.name,
             'phone': self.phone,
             'photo': self.photo,
             'status': self.status,
-            'hasFaceEncoding': has_face_encoding,
+            'hasFaceEncoding': bool(self.has_face_encoding),
             'registeredAt': self.registered_at.isoformat() if self.registered_at else None,
             'lastEntry': self.last_entry.isoformat() if self.last_entry else None,
             'lastExit': self.last_exit.isoformat() if self.last_exit else None,
@@ -52,6 +64,11 @@ class GateUser(db.Model):
         }
 
 
+@event.listens_for(GateUser.face_encoding, 'set')
+def _sync_has_face_encoding(target, value, oldvalue, initiator):
+    target.has_face_encoding = GateUser.encoding_present(value)
+
+
 class GateEntryLog(db.Model):
     """Model for gate entry/exit logs"""
     __tablename__ = 'gate_entry_logs'
@@ -69,6 +86,11 @@ class GateEntryLog(db.Model):
     override_cooling = db.Column(db.Boolean, default=False)
     timestamp = db.Column(db.DateTime, default=get_ist_now, index=True)
     created_at = db.Column(db.DateTime, default=get_ist_now)
+
+    # Per-user history lookups filter on a timestamp range
+    __table_args__ = (
+        db.Index('idx_gate_log_user_timestamp', 'user_id', 'timestamp'),
+    )
     
     def to_dict(self):
         """Convert model instance to dictionary"""
@@ -106,6 +128,11 @@ class GoingOutLog(db.Model):
     timestamp = db.Column(db.DateTime, default=get_ist_now)
     created_at = db.Column(db.DateTime, default=get_ist_now)
     updated_at = db.Column(db.DateTime, default=get_ist_now, onupdate=get_ist_now)
+
+    # Open going-out lookup: user_id = ? AND status = 'out' AND going_out_time in [day_start, day_end)
+    __table_args__ = (
+        db.Index('idx_going_out_user_status_time', 'user_id', 'status', 'going_out_time'),
+    )
     
     def to_dict(self):
         """Convert model instance to dictionary"""
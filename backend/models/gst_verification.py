@@ -0,0 +1,32 @@
+"""
+GST Verification Model
+Cached provider answers for GST number lookups (see services/gst_verification_service.py)
+"""
+import json
+from utils.timezone_helpers import get_ist_now
+from models import db
+
+
+class GstVerification(db.Model):
+    """Model for the last provider answer for a GSTIN"""
+    __tablename__ = 'gst_verifications'
+
+    id = db.Column(db.Integer, primary_key=True)
+    gstin = db.Column(db.String(15), unique=True, nullable=False)  # Normalized: no spaces, upper case
+    verified = db.Column(db.Boolean, nullable=False, default=False)
+    source = db.Column(db.String(100), nullable=False)  # Provider that answered
+    result = db.Column(db.Text, nullable=False)  # JSON response returned to the client
+    verified_at = db.Column(db.DateTime, nullable=False, default=get_ist_now)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def to_dict(self):
+        """Convert model instance to dictionary"""
+        return {
+            'id': self.id,
+            'gstin': self.gstin,
+            'verified': self.verified,
+            'source': self.source,
+            'result': json.loads(self.result) if self.result else None,
+            'verifiedAt': self.verified_at.isoformat() if self.verified_at else None,
+            'expiresAt': self.expires_at.isoformat() if self.expires_at else None
+        }
@@ -61,6 +61,8 @@ class GuestList(db.Model):
             'idProofType': self.id_proof_type,
             'idProofNumber': self.id_proof_number,
             'visitorPhotoPath': self.visitor_photo_path,
+            # Content-addressed uploads (/api/files/...) have server-side thumbnails
+            'visitorPhotoThumbnailUrl': f"{self.visitor_photo_path}?size=sm" if self.visitor_photo_path and '/api/files/' in self.visitor_photo_path else self.visitor_photo_path,
             'status': self.status if isinstance(self.status, str) else (self.status.value if isinstance(self.status, GuestStatus) else str(self.status)),
             'notes': self.notes,
             'createdBy': self.created_by,
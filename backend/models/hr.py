@@ -161,6 +161,11 @@ class Attendance(db.Model):
     created_at = db.Column(db.DateTime, default=get_ist_now)
     updated_at = db.Column(db.DateTime, default=get_ist_now, onupdate=get_ist_now)
 
+    # Composite index for date-window summaries grouped by employee
+    __table_args__ = (
+        db.Index('idx_attendance_date_employee', 'date', 'employee_id'),
+    )
+
     def to_dict(self):
         """Convert attendance to dictionary"""
         # Handle status - could be enum or string
@@ -185,6 +190,31 @@ class Attendance(db.Model):
         }
 
 
+class AttendanceMonthlyRollup(db.Model):
+    """Per-employee, per-status attendance day counts for one closed calendar month"""
+
+    __tablename__ = 'attendance_monthly_rollup'
+
+    id = db.Column(db.Integer, primary_key=True)
+    period_start = db.Column(db.Date, nullable=False)  # First day of the month
+    employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
+    status = db.Column(db.Enum(AttendanceStatus), nullable=True)
+    day_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('period_start', 'employee_id', 'status', name='uq_attendance_rollup'),
+    )
+
+
+class AttendanceRollupPeriod(db.Model):
+    """Marks a month whose attendance_monthly_rollup rows are complete"""
+
+    __tablename__ = 'attendance_rollup_period'
+
+    period_start = db.Column(db.Date, primary_key=True)
+    refreshed_at = db.Column(db.DateTime, default=get_ist_now)
+
+
 class JobApplication(db.Model):
     """Job application model for recruitment"""
 
@@ -2,18 +2,43 @@
 Inventory-related database models
 """
 from datetime import datetime
+from sqlalchemy.orm import validates
 from utils.timezone_helpers import get_ist_now
 from . import db
 
+DEFAULT_CATEGORY = 'Raw Material'
+
 class StoreInventory(db.Model):
     """Model for store inventory items"""
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
     quantity = db.Column(db.Integer, nullable=False, default=0)
-    category = db.Column(db.String(50), nullable=False, default='Raw Material')
+    category = db.Column(db.String(50), nullable=False, default=DEFAULT_CATEGORY)
+    # Normalized lookup keys, maintained by the validators below
+    name_key = db.Column(db.String(200), nullable=True, index=True)
+    item_key = db.Column(db.String(255), nullable=True, unique=True)
     created_at = db.Column(db.DateTime, default=get_ist_now)
     updated_at = db.Column(db.DateTime, default=get_ist_now, onupdate=get_ist_now)
+
+    @staticmethod
+    def normalize_name(value):
+        """Normalize an item name or category for key comparison (trimmed, case-folded)"""
+        return (value or '').strip().casefold()
+
+    @classmethod
+    def make_item_key(cls, name, category=None):
+        """Build the unique item key from name and category"""
+        return f"{cls.normalize_name(name)}|{cls.normalize_name(category or DEFAULT_CATEGORY)}"
+
+    @validates('name', 'category')
+    def _refresh_keys(self, key, value):
+        """Keep name_key and item_key in sync with name and category"""
+        name = value if key == 'name' else self.name
+        category = value if key == 'category' else self.category
+        self.name_key = self.normalize_name(name)
+        self.item_key = self.make_item_key(name, category)
+        return value
     
     def to_dict(self):
         """Convert model instance to dictionary"""
@@ -43,4 +68,65 @@ class StoreInventory(db.Model):
         """Add stock to inventory"""
         self.quantity += quantity
         self.updated_at = get_ist_now()
-        return self.quantity
\ No newline at end of file
+        return self.quantity
+
+class StockMovement(db.Model):
+    """Append-only ledger of stock changes; StoreInventory.quantity is the running balance"""
+    __tablename__ = 'stock_movement'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    inventory_id = db.Column(db.Integer, db.ForeignKey('store_inventory.id', ondelete='SET NULL'), nullable=True)
+    item_name = db.Column(db.String(200), nullable=False)  # Snapshot so history survives item deletion
+    quantity_change = db.Column(db.Integer, nullable=False)  # Signed: positive in, negative out
+    movement_type = db.Column(db.String(50), nullable=False)  # allocation, purchase_receipt, bulk_add, manual_add, adjustment
+    reference_type = db.Column(db.String(50), nullable=True)  # e.g. purchase_order
+    reference_id = db.Column(db.Integer, nullable=True)
+    notes = db.Column(db.String(255), nullable=True)
+    created_by = db.Column(db.String(100), nullable=True)
+    created_at = db.Column(db.DateTime, default=get_ist_now, nullable=False)
+    
+    # Composite index for per-item history and as-of queries
+    __table_args__ = (
+        db.Index('idx_stock_movement_item_time', 'inventory_id', 'created_at'),
+        db.Index('idx_stock_movement_reference', 'reference_type', 'reference_id'),
+    )
+    
+    def to_dict(self):
+        """Convert model instance to dictionary"""
+        return {
+            'id': self.id,
+            'inventoryId': self.inventory_id,
+            'itemName': self.item_name,
+            'quantityChange': self.quantity_change,
+            'movementType': self.movement_type,
+            'referenceType': self.reference_type,
+            'referenceId': self.reference_id,
+            'notes': self.notes,
+            'createdBy': self.created_by,
+            'createdAt': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class StockCheckpoint(db.Model):
+    """Periodic snapshot of an item's balance used to answer as-of-date queries quickly"""
+    __tablename__ = 'stock_checkpoint'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    inventory_id = db.Column(db.Integer, db.ForeignKey('store_inventory.id', ondelete='CASCADE'), nullable=False)
+    balance = db.Column(db.Integer, nullable=False)
+    last_movement_id = db.Column(db.Integer, nullable=False, default=0)  # Movements up to this id are included
+    checkpoint_at = db.Column(db.DateTime, default=get_ist_now, nullable=False)
+    
+    __table_args__ = (
+        db.Index('idx_stock_checkpoint_item_time', 'inventory_id', 'checkpoint_at'),
+    )
+    
+    def to_dict(self):
+        """Convert model instance to dictionary"""
+        return {
+            'id': self.id,
+            'inventoryId': self.inventory_id,
+            'balance': self.balance,
+            'lastMovementId': self.last_movement_id,
+            'checkpointAt': self.checkpoint_at.isoformat() if self.checkpoint_at else None
+        }
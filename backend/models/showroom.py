@@ -112,6 +112,12 @@ class GatePass(db.Model):
     send_in_photo = db.Column(db.String(500), nullable=True)
     after_loading_photo = db.Column(db.String(500), nullable=True)
 
+    # Watchman daily summary counts by status within a day's issued/verified range
+    __table_args__ = (
+        db.Index('idx_gate_pass_status_issued', 'status', 'issued_at'),
+        db.Index('idx_gate_pass_status_verified', 'status', 'verified_at'),
+    )
+
     def to_dict(self):
         """Convert model instance to dictionary"""
         return {
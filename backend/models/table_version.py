@@ -0,0 +1,23 @@
+"""
+Table Version Model
+Change counter per table, bumped after each commit that wrote to it (see utils/change_tracking.py)
+"""
+from utils.timezone_helpers import get_ist_now
+from models import db
+
+
+class TableVersion(db.Model):
+    """Model for the change counter of one table"""
+    __tablename__ = 'table_versions'
+
+    table_name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=get_ist_now, onupdate=get_ist_now)
+
+    def to_dict(self):
+        """Convert model instance to dictionary"""
+        return {
+            'tableName': self.table_name,
+            'version': self.version,
+            'updatedAt': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -22,6 +22,8 @@ from .approval import approval_bp
 from .hr import hr_bp
 from .audit import audit_bp
 from .reception import reception_bp
+from .files import files_bp
+from .jobs import jobs_bp
 
 # List of all blueprints
 blueprints = [
@@ -43,6 +45,8 @@ blueprints = [
     hr_bp,
     audit_bp,
     reception_bp,
+    files_bp,
+    jobs_bp,
 ]
 
 def register_blueprints(app):
@@ -78,5 +82,7 @@ __all__ = [
     'approval_bp',
     'audit_bp',
     'reception_bp',
+    'files_bp',
+    'jobs_bp',
     'unified_tracking_bp'
 ]
@@ -4,6 +4,7 @@ API endpoints for approval management
 """
 from flask import Blueprint, request, jsonify
 from services.approval_service import ApprovalService
+from utils.pagination import parse_page_request, page_response
 from models import AuditAction, AuditModule
 from services.audit_service import AuditService
 
@@ -22,8 +23,11 @@ def get_pending_approvals():
 def get_all_approvals():
     """Get all approval requests"""
     try:
-        approvals = ApprovalService.get_all_approvals()
-        return jsonify(approvals), 200
+        page_request = parse_page_request(request.args, ApprovalService.APPROVAL_SORT_FIELDS, 'createdAt')
+        approvals = ApprovalService.get_all_approvals(page=page_request)
+        return page_response(approvals, page_request)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
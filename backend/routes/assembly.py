@@ -5,6 +5,7 @@ from flask import Blueprint, request, jsonify
 from services import AssemblyService
 from services.audit_service import AuditService
 from models import AuditAction, AuditModule
+from utils.pagination import parse_page_request, page_response
 
 assembly_bp = Blueprint('assembly', __name__)
 
@@ -21,8 +22,11 @@ def get_assembly_orders():
 def get_all_assembly_orders():
     """Get all assembly orders"""
     try:
-        orders = AssemblyService.get_all_assembly_orders()
-        return jsonify(orders), 200
+        page_request = parse_page_request(request.args, AssemblyService.ASSEMBLY_ORDER_SORT_FIELDS, 'createdAt')
+        orders = AssemblyService.get_all_assembly_orders(page=page_request)
+        return page_response(orders, page_request)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -110,8 +114,11 @@ def get_completed_assembly_products():
 def get_rework_orders():
     """Get rework orders for failed machines"""
     try:
-        rework_orders = AssemblyService.get_rework_orders()
-        return jsonify(rework_orders), 200
+        page_request = parse_page_request(request.args, AssemblyService.REWORK_ORDER_SORT_FIELDS, 'createdAt')
+        rework_orders = AssemblyService.get_rework_orders(page=page_request)
+        return page_response(rework_orders, page_request)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
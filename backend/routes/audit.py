@@ -2,10 +2,11 @@
 Audit Trail Routes
 """
 from flask import Blueprint, request, jsonify, make_response
-from models import AuditTrail, AuditAction, AuditModule, User, db
+from models import AuditTrail, AuditAction, AuditModule, db
 from services.audit_service import AuditService
 from datetime import datetime, timedelta
 from utils.timezone_helpers import get_ist_now
+from utils.db_routing import read_only
 from sqlalchemy import and_, or_, desc, func
 import csv
 import io
@@ -92,12 +93,7 @@ def get_audit_logs():
         logs = [log.to_dict() for log in pagination.items]
         
         # Add user information
-        for log in logs:
-            if log['user_id']:
-                user = User.query.get(log['user_id'])
-                if user:
-                    log['user_name'] = user.full_name
-                    log['user_department'] = user.department
+        AuditService.add_user_info(logs)
         
         # Don't log VIEW actions - they create too much noise
         
@@ -124,6 +120,7 @@ def get_audit_logs():
         return jsonify({'error': error_msg}), 500
 
 @audit_bp.route('/stats', methods=['GET'])
+@read_only
 def get_audit_stats():
     """Get audit trail statistics"""
     try:
@@ -251,6 +248,7 @@ def get_audit_stats():
         return jsonify({'error': error_msg}), 500
 
 @audit_bp.route('/export', methods=['GET'])
+@read_only
 def export_audit_logs():
     """Export audit logs to CSV"""
     try:
@@ -400,12 +398,7 @@ def get_resource_audit_logs(resource_type, resource_id):
         logs_data = [log.to_dict() for log in logs]
         
         # Add user information
-        for log in logs_data:
-            if log['user_id']:
-                user = User.query.get(log['user_id'])
-                if user:
-                    log['user_name'] = user.full_name
-                    log['user_department'] = user.department
+        AuditService.add_user_info(logs_data)
         
         return jsonify({
             'resource_type': resource_type,
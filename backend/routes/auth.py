@@ -11,12 +11,13 @@ from models.password_reset_token import PasswordResetToken
 from models import AuditAction, AuditModule
 from services.audit_service import AuditService
 from werkzeug.security import check_password_hash, generate_password_hash
+import hashlib
 import threading
 import mailersend
-from threading import Thread
 import os 
 from utils.mail import send_mailersend_email
-from utils.mail import send_email_async
+from utils.mail import queue_email
+from utils.rate_limit import rate_limit, failure_limit, client_ip
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -70,7 +71,15 @@ def register():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _login_account_key():
+    """Failed-login key: the account tried from this client, so others cannot lock the account out"""
+    data = request.get_json(silent=True) or {}
+    account = data.get('username') or data.get('email')
+    return f'account:{str(account).strip().lower()[:254]}|ip:{client_ip()}' if account else None
+
 @auth_bp.route('/auth/login', methods=['POST'])
+@rate_limit('login_ip', 'RATE_LIMIT_LOGIN_IP', '30/60')
+@failure_limit('login_account', 'RATE_LIMIT_LOGIN_ACCOUNT', '5/60', key=_login_account_key)
 def login():
     """Authenticate a user using either username or email and return user data"""
     try:
@@ -352,11 +361,12 @@ def forgot_password():
             <p>If this wasn't expected, please ignore this message.</p>
         """
 
-        # Send email asynchronously to admin
-        Thread(
-            target=send_email_async,
-            args=(current_app._get_current_object(), admin_email, subject, html_content, text_content)
-        ).start()
+        # Queue the email to admin; the job worker sends it and retries on failure
+        queue_email(
+            admin_email, subject, html_content, text_content,
+            # Hashed: job keys are listed by /api/jobs and the token must not leak there
+            idempotency_key=f"password-reset-email:{hashlib.sha256(reset_token_obj.token.encode('utf-8')).hexdigest()}"
+        )
 
         return jsonify({
             'message': 'A password reset link has been sent to the support email. The support team will assist you with your password reset.',
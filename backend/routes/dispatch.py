@@ -4,6 +4,9 @@ API endpoints for dispatch operations
 """
 from flask import Blueprint, request, jsonify
 from services.dispatch_service import DispatchService
+from utils.pagination import parse_page_request, page_response
+from utils.db_routing import read_only
+from utils.change_tracking import conditional_by_tables
 from services.audit_service import AuditService
 from models import AuditAction, AuditModule
 from models.showroom import DispatchRequest, GatePass, TransportJob
@@ -25,8 +28,11 @@ def get_pending_dispatch_orders():
 def get_all_dispatch_orders():
     """Get all dispatch orders"""
     try:
-        orders = DispatchService.get_all_dispatch_orders()
-        return jsonify(orders), 200
+        page_request = parse_page_request(request.args, DispatchService.DISPATCH_SORT_FIELDS, 'createdAt')
+        orders = DispatchService.get_all_dispatch_orders(page=page_request)
+        return page_response(orders, page_request)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -217,6 +223,8 @@ def update_transport_status(transport_job_id):
 
 
 @dispatch_bp.route('/dispatch/summary', methods=['GET'])
+@read_only
+@conditional_by_tables(DispatchRequest)
 def get_dispatch_summary():
     """Get dispatch department summary statistics"""
     try:
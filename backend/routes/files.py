@@ -0,0 +1,55 @@
+"""
+File Routes Module
+Serves content-addressed uploads and their thumbnails
+"""
+from flask import Blueprint, request, jsonify, send_file
+from services.upload_service import UploadService
+
+files_bp = Blueprint('files', __name__)
+
+ONE_YEAR_SECONDS = 365 * 24 * 60 * 60
+
+
+@files_bp.route('/files', methods=['POST'])
+def upload_file():
+    """Store an uploaded image (multipart field 'file') and return its URLs"""
+    f = request.files.get('file')
+    if not f or not f.filename:
+        return jsonify({'error': 'file is required'}), 400
+    try:
+        name = UploadService.store(f.stream)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    return jsonify({
+        'name': name,
+        'url': UploadService.url(name),
+        'thumbnailUrl': UploadService.url(name, 'sm')
+    }), 201
+
+
+def _accepts_webp():
+    """True only if Accept names image/webp itself; image/* and */* do not promise WebP support"""
+    return any(mimetype == 'image/webp' and quality > 0 for mimetype, quality in request.accept_mimetypes)
+
+
+@files_bp.route('/files/<name>', methods=['GET'])
+def get_file(name):
+    """Serve a stored file, or a thumbnail with ?size=sm|md (WebP when the client accepts it)"""
+    size = request.args.get('size')
+    fmt = 'webp' if size and _accepts_webp() else 'jpeg'
+    try:
+        path, mimetype, etag = UploadService.open(name, size=size, fmt=fmt)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
+    except FileNotFoundError:
+        return jsonify({'error': 'File not found'}), 404
+
+    # conditional=True answers If-None-Match with 304 and Range with 206
+    response = send_file(path, mimetype=mimetype, conditional=True, etag=etag, max_age=ONE_YEAR_SECONDS)
+    # The name is the content hash, so the bytes behind a URL never change
+    response.cache_control.immutable = True
+    if size:
+        response.vary.add('Accept')
+    return response
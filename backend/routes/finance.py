@@ -5,8 +5,12 @@ API endpoints for finance operations
 from flask import Blueprint, request, jsonify
 from services.finance_service import FinanceService
 from services.audit_service import AuditService
-from models import AuditAction, AuditModule, User, SalesOrder, PurchaseOrder
+from models import AuditAction, AuditModule, User, SalesOrder, PurchaseOrder, SalesTransaction, FinanceTransaction
 from utils.jwt_helpers import get_jwt_identity_safe
+from utils.db_routing import read_only
+from services.document_render_service import RenderBusyError
+from utils.change_tracking import conditional_by_tables
+from utils.pagination import parse_page_request, page_response
 from datetime import datetime
 
 finance_bp = Blueprint('finance', __name__)
@@ -80,6 +84,8 @@ def finance_approve_purchase_order(order_id):
 
 
 @finance_bp.route('/finance/dashboard', methods=['GET'])
+@read_only
+@conditional_by_tables(SalesTransaction, SalesOrder, FinanceTransaction, PurchaseOrder)
 def get_finance_dashboard():
     """Get financial summary for dashboard"""
     try:
@@ -101,10 +107,15 @@ def get_finance_transactions():
     """Get all financial transactions with filtering"""
     try:
         transaction_type = request.args.get('type')  # 'revenue' or 'expense'
-        limit = int(request.args.get('limit', 50))
-        
-        transactions = FinanceService.get_transactions(transaction_type, limit)
-        return jsonify(transactions), 200
+        page_request = parse_page_request(request.args, FinanceService.TRANSACTION_SORT_FIELDS, 'createdAt')
+        if not page_request.requested:
+            # Unpaged callers keep the original 50 most recent transactions
+            transactions = FinanceService.get_transactions(transaction_type)
+            return jsonify(transactions), 200
+        transactions = FinanceService.get_transactions(transaction_type, page=page_request)
+        return page_response(transactions, page_request)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -217,8 +228,11 @@ def create_revenue_transaction():
 def get_approved_purchase_bills():
     """Get all approved/processed purchase orders"""
     try:
-        orders = FinanceService.get_approved_purchase_orders()
-        return jsonify(orders), 200
+        page_request = parse_page_request(request.args, FinanceService.PURCHASE_BILL_SORT_FIELDS, 'createdAt')
+        orders = FinanceService.get_approved_purchase_orders(page=page_request)
+        return page_response(orders, page_request)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -237,8 +251,11 @@ def get_bypassed_sales_orders():
 def get_approved_sales_bills():
     """Get all completed sales orders"""
     try:
-        orders = FinanceService.get_approved_sales_orders()
-        return jsonify(orders), 200
+        page_request = parse_page_request(request.args, FinanceService.SALES_BILL_SORT_FIELDS, 'createdAt')
+        orders = FinanceService.get_approved_sales_orders(page=page_request)
+        return page_response(orders, page_request)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -292,12 +309,26 @@ def download_finance_invoice(order_id):
             
             print(f"After Override - unitPrice: {order_dict.get('unitPrice')}, finalAmount: {order_dict.get('finalAmount')}, transportCost: {order_dict.get('transportCost')}")
         
+        if request.args.get('format') == 'pdf':
+            from services.document_render_service import DocumentRenderService
+            pdf_data = DocumentRenderService.render_pdf(
+                'final_invoice',
+                order_dict,
+                lambda: generate_final_invoice(order_dict)
+            )
+            return pdf_data, 200, {
+                'Content-Type': 'application/pdf',
+                'Content-Disposition': f'inline; filename=invoice_{order_id}.pdf'
+            }
+        
         # Generate HTML
         html_content = generate_final_invoice(order_dict)
         
         # Return HTML directly - browser can print it
         return html_content, 200, {'Content-Type': 'text/html'}
         
+    except RenderBusyError as rb:
+        return jsonify({'error': str(rb)}), 503, {'Retry-After': str(rb.retry_after)}
     except Exception as e:
         print(f"Error generating invoice: {e}")
         import traceback
@@ -1,14 +1,16 @@
 """
 Gate Entry Routes - Updated to use database
 """
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, make_response
 from datetime import date, datetime
 from services.gate_entry_service_db import gate_entry_service_db
 from services.attendance_integration_service import AttendanceIntegrationService
 from utils.face_recognition_utils import recognize_face_from_database, is_face_recognition_available
 from models.gate_entry import GateUser
-import pandas as pd
-from io import BytesIO
+from utils.excel_export import StreamingWorkbook, XLSX_MIMETYPE
+from utils.db_routing import read_only
+from utils.rate_limit import rate_limit, device_key
+from utils.single_flight import single_flight
 
 gate_entry_bp = Blueprint('gate_entry', __name__)
 attendance_service = AttendanceIntegrationService()
@@ -18,12 +20,36 @@ attendance_service = AttendanceIntegrationService()
 
 @gate_entry_bp.route('/gate-entry/users', methods=['GET'])
 def get_users():
-    """Get all registered users"""
+    """Get all registered users (pass detail=full for photos)"""
     status = request.args.get('status')
-    users = gate_entry_service_db.get_users(status=status)
+    detail = request.args.get('detail') == 'full'
+    users = gate_entry_service_db.get_users(status=status, detail=detail)
     return jsonify(users)
 
 
+@gate_entry_bp.route('/gate-entry/users/<int:user_id>/photo', methods=['GET'])
+def get_user_photo(user_id):
+    """Serve a user's photo (size=thumb by default, size=full for the original)"""
+    thumbnail = request.args.get('size', 'thumb') != 'full'
+    try:
+        photo = gate_entry_service_db.get_user_photo(user_id, thumbnail=thumbnail)
+    except (ValueError, OSError) as e:
+        return jsonify({'success': False, 'message': f'Stored photo is not a valid image: {e}'}), 422
+    if not photo:
+        return jsonify({'success': False, 'message': 'Photo not found'}), 404
+    
+    data, mimetype, version = photo
+    response = make_response(data)
+    response.mimetype = mimetype
+    response.set_etag(f"{user_id}-{version}-{'thumb' if thumbnail else 'full'}")
+    if request.args.get('v') == str(version):
+        # Versioned URLs from the listing never change content
+        response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+
 @gate_entry_bp.route('/gate-entry/users/<phone>', methods=['GET'])
 def get_user(phone):
     """Get user by phone"""
@@ -175,12 +201,20 @@ def get_going_out_logs():
 
 @gate_entry_bp.route('/gate-entry/today-logs', methods=['GET'])
 def get_today_logs():
-    """Get today's summary"""
-    summary = gate_entry_service_db.get_today_logs()
+    """Get today's summary (pass summaryOnly=true to skip the session and going out lists)"""
+    summary_only = request.args.get('summaryOnly', 'false').lower() == 'true'
+    summary = gate_entry_service_db.get_today_logs(include_records=not summary_only)
     return jsonify(summary)
 
 
+@gate_entry_bp.route('/gate-entry/presence', methods=['GET'])
+def get_presence():
+    """Get who is currently inside / out and today's counters"""
+    return jsonify(gate_entry_service_db.get_presence())
+
+
 @gate_entry_bp.route('/gate-entry/export-logs', methods=['GET'])
+@read_only
 def export_gate_logs():
     """Export gate logs to Excel"""
     try:
@@ -195,56 +229,53 @@ def export_gate_logs():
             except ValueError:
                 return jsonify({'success': False, 'message': 'Invalid date format. Use YYYY-MM-DD'}), 400
         
-        # Create Excel file in memory
-        output = BytesIO()
+        def iso(value):
+            return value.isoformat() if value else None
         
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            # Export Gate Entry/Exit Logs
-            if log_type in ['all', 'entry']:
-                gate_logs = gate_entry_service_db.get_gate_logs(limit=10000, date_filter=date_filter)
-                if gate_logs:
-                    df_gate = pd.DataFrame(gate_logs)
-                    # Reorder and rename columns for better readability
-                    column_mapping = {
-                        'userName': 'Name',
-                        'userPhone': 'Phone',
-                        'action': 'Action',
-                        'method': 'Method',
-                        'status': 'Status',
-                        'timestamp': 'Timestamp',
-                        'entryTime': 'Entry Time',
-                        'exitTime': 'Exit Time',
-                        'details': 'Details'
-                    }
-                    df_gate = df_gate.rename(columns=column_mapping)
-                    # Select only relevant columns
-                    columns_to_export = ['Name', 'Phone', 'Action', 'Method', 'Status', 'Timestamp', 'Entry Time', 'Exit Time', 'Details']
-                    df_gate = df_gate[[col for col in columns_to_export if col in df_gate.columns]]
-                    df_gate.to_excel(writer, sheet_name='Gate Entry Logs', index=False)
-            
-            # Export Going Out Logs
-            if log_type in ['all', 'going_out']:
-                going_out_logs = gate_entry_service_db.get_going_out_logs(limit=10000, date_filter=date_filter)
-                if going_out_logs:
-                    df_going_out = pd.DataFrame(going_out_logs)
-                    # Reorder and rename columns
-                    column_mapping = {
-                        'userName': 'Name',
-                        'userPhone': 'Phone',
-                        'reasonType': 'Reason Type',
-                        'reasonDetails': 'Reason Details',
-                        'goingOutTime': 'Going Out Time',
-                        'comingBackTime': 'Coming Back Time',
-                        'durationMinutes': 'Duration (Minutes)',
-                        'status': 'Status'
-                    }
-                    df_going_out = df_going_out.rename(columns=column_mapping)
-                    # Select only relevant columns
-                    columns_to_export = ['Name', 'Phone', 'Reason Type', 'Reason Details', 'Going Out Time', 'Coming Back Time', 'Duration (Minutes)', 'Status']
-                    df_going_out = df_going_out[[col for col in columns_to_export if col in df_going_out.columns]]
-                    df_going_out.to_excel(writer, sheet_name='Going Out Logs', index=False)
+        # Stream rows from the database into a write-only workbook
+        workbook = StreamingWorkbook()
+        
+        # Export Gate Entry/Exit Logs
+        if log_type in ['all', 'entry']:
+            sheet = workbook.add_sheet(
+                'Gate Entry Logs',
+                ['Name', 'Phone', 'Action', 'Method', 'Status', 'Timestamp', 'Entry Time', 'Exit Time', 'Details']
+            )
+            for log in gate_entry_service_db.iter_gate_log_rows(date_filter=date_filter):
+                sheet.append([
+                    log.user_name,
+                    log.user_phone,
+                    log.action,
+                    log.method,
+                    log.status,
+                    iso(log.timestamp),
+                    iso(log.entry_time),
+                    iso(log.exit_time),
+                    log.details
+                ])
+        
+        # Export Going Out Logs
+        if log_type in ['all', 'going_out']:
+            sheet = workbook.add_sheet(
+                'Going Out Logs',
+                ['Name', 'Phone', 'Reason Type', 'Reason Details', 'Going Out Time', 'Coming Back Time', 'Duration (Minutes)', 'Status']
+            )
+            for log in gate_entry_service_db.iter_going_out_log_rows(date_filter=date_filter):
+                sheet.append([
+                    log.user_name,
+                    log.user_phone,
+                    log.reason_type,
+                    log.reason_details,
+                    iso(log.going_out_time),
+                    iso(log.coming_back_time),
+                    log.duration_minutes,
+                    log.status
+                ])
+        
+        if not workbook.sheets:
+            return jsonify({'success': False, 'message': 'Invalid type. Use all, entry or going_out'}), 400
         
-        output.seek(0)
+        output = workbook.save()
         
         # Generate filename
         filename = f"gate_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
@@ -253,7 +284,7 @@ def export_gate_logs():
         
         return send_file(
             output,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            mimetype=XLSX_MIMETYPE,
             as_attachment=True,
             download_name=filename
         )
@@ -297,6 +328,8 @@ def get_user_status(phone):
 
 
 @gate_entry_bp.route('/gate-entry/recognize-face', methods=['POST'])
+@rate_limit('recognize_face', 'RATE_LIMIT_RECOGNIZE_FACE', '20/15', key=device_key, message_key='message')
+@single_flight(key=device_key)
 def recognize_face():
     """Recognize face from photo and perform entry/exit"""
     if not is_face_recognition_available():
@@ -1,9 +1,16 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, send_file
 from services.hr_service import HRService
+from services.payroll_batch_service import PayrollBatchService
 from services.audit_service import AuditService
 from models import AuditAction, AuditModule
 from utils.audit_middleware import audit_route, log_model_change
-from datetime import datetime
+from utils.excel_export import XLSX_MIMETYPE
+from utils.pagination import parse_date_arg, parse_page_request, page_response
+from utils.db_routing import read_only
+from services.document_render_service import DocumentRenderService, RenderBusyError
+from werkzeug.utils import secure_filename
+from datetime import datetime, timedelta
+import re
 import traceback
 
 hr_bp = Blueprint('hr', __name__)
@@ -16,6 +23,7 @@ def hr_health_check():
     }), 200
 
 @hr_bp.route('/hr/dashboard', methods=['GET'])
+@read_only
 def get_hr_dashboard():
     try:
         data = HRService.get_dashboard_data()
@@ -29,8 +37,15 @@ def get_employees():
     department = request.args.get('department')
     status = request.args.get('status')
     try:
-        employees = HRService.get_employees(department, status)
-        return jsonify(employees), 200
+        page_request = parse_page_request(request.args, HRService.EMPLOYEE_SORT_FIELDS, 'createdAt')
+        if not page_request.requested:
+            # Unpaged callers keep the original 50 most recent employees
+            employees = HRService.get_employees(department, status)
+            return jsonify(employees), 200
+        employees = HRService.get_employees(department, status, page=page_request)
+        return page_response(employees, page_request)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -252,11 +267,14 @@ def get_employee_attendance(employee_id):
 
 @hr_bp.route('/hr/attendance', methods=['GET'])
 def get_all_attendance():
-    start_date = request.args.get('startDate')
-    end_date = request.args.get('endDate')
     try:
-        records = HRService.get_all_attendance(start_date, end_date)
-        return jsonify(records), 200
+        start_date = parse_date_arg(request.args, 'startDate')
+        end_date = parse_date_arg(request.args, 'endDate')
+        page_request = parse_page_request(request.args, HRService.ATTENDANCE_SORT_FIELDS, 'date')
+        records = HRService.get_all_attendance(start_date, end_date, page=page_request)
+        return page_response(records, page_request)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -329,8 +347,11 @@ def handle_leave_requests():
         employee_id = request.args.get('employeeId')
         status = request.args.get('status')
         try:
-            leaves = HRService.get_leave_requests(employee_id, status)
-            return jsonify(leaves), 200
+            page_request = parse_page_request(request.args, HRService.LEAVE_SORT_FIELDS, 'createdAt')
+            leaves = HRService.get_leave_requests(employee_id, status, page=page_request)
+            return page_response(leaves, page_request)
+        except ValueError as ve:
+            return jsonify({'error': str(ve)}), 400
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
@@ -600,6 +621,30 @@ def generate_payroll(employee_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@hr_bp.route('/hr/payrolls/batch', methods=['POST'])
+def run_batch_payroll():
+    """Generate payroll for all active employees in one transaction (dryRun=true to preview)"""
+    data = request.get_json() or {}
+    dry_run = str(data.get('dryRun', request.args.get('dryRun', 'false'))).lower() in ('true', '1', 'yes')
+    run_async = str(data.get('async', request.args.get('async', 'false'))).lower() in ('true', '1', 'yes')
+    user_name = data.get('generatedBy') or request.headers.get('X-User-Email', 'Unknown User')
+    try:
+        if run_async and not dry_run:
+            # Poll GET /api/jobs/<id> for the result
+            job = PayrollBatchService.queue_payroll(data, user_name)
+            return jsonify(job), 202
+
+        result = PayrollBatchService.run_payroll(data, dry_run=dry_run)
+
+        if not dry_run and result['count']:
+            PayrollBatchService.log_batch_audit(result, user_name)
+
+        return jsonify(result), 200 if dry_run else 201
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @hr_bp.route('/hr/payrolls/<int:payroll_id>/process', methods=['PUT'])
 def process_payroll(payroll_id):
     data = request.get_json() or {}
@@ -698,8 +743,11 @@ def delete_payroll(payroll_id):
 @hr_bp.route('/hr/payrolls', methods=['GET'])
 def get_payrolls():
     try:
-        payrolls = HRService.get_payrolls()
-        return jsonify(payrolls), 200
+        page_request = parse_page_request(request.args, HRService.PAYROLL_SORT_FIELDS, 'payPeriodEnd')
+        payrolls = HRService.get_payrolls(page=page_request)
+        return page_response(payrolls, page_request)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -708,6 +756,13 @@ def download_payslip(payroll_id):
     try:
         from flask import Response, make_response
 
+        if request.args.get('format') == 'pdf':
+            pdf_data = HRService.generate_payslip_pdf(payroll_id)
+            response = make_response(pdf_data)
+            response.headers['Content-Type'] = 'application/pdf'
+            response.headers['Content-Disposition'] = f'attachment; filename=payslip_{payroll_id}.pdf'
+            return response
+
         # Generate HTML payslip
         payslip_html = HRService.generate_payslip(payroll_id)
 
@@ -719,22 +774,77 @@ def download_payslip(payroll_id):
 
     except ValueError as ve:
         return jsonify({'error': str(ve)}), 404
+    except RenderBusyError as rb:
+        return jsonify({'error': str(rb)}), 503, {'Retry-After': str(rb.retry_after)}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@hr_bp.route('/hr/payrolls/export', methods=['GET'])
-def export_payroll_report():
+@hr_bp.route('/hr/payrolls/payslips/batch', methods=['GET'])
+def download_payslips_batch():
+    """
+    Payslips for a month (?month=YYYY-MM) or period (?startDate=&endDate=) as one ZIP
+
+    If the ZIP for the current payrolls is already rendered it is sent
+    straight away; otherwise rendering is queued and the job is returned with
+    202. Poll GET /api/jobs/<id> and fetch result.downloadUrl when it succeeds.
+    """
+    month = request.args.get('month')
+    start_date = request.args.get('startDate')
+    end_date = request.args.get('endDate')
     try:
-        from flask import make_response
+        if month:
+            start = datetime.strptime(month, '%Y-%m').date()
+            next_month = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+            start_date = start.isoformat()
+            end_date = (next_month - timedelta(days=1)).isoformat()
+        if not start_date or not end_date:
+            return jsonify({'error': 'month or startDate and endDate are required'}), 400
+
+        key = HRService.payslips_zip_key(start_date, end_date)
+        path = DocumentRenderService.cached_zip_path(key)
+        if path:
+            return send_file(
+                path,
+                mimetype='application/zip',
+                as_attachment=True,
+                download_name=f'payslips_{start_date}_{end_date}.zip'
+            )
 
-        # Generate Excel report
-        excel_buffer = HRService.export_payroll_report()
+        # Poll GET /api/jobs/<id>; the finished job's result has the downloadUrl
+        return jsonify(HRService.queue_payslips_zip(start_date, end_date, key)), 202
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        # Return Excel response
-        response = make_response(excel_buffer.getvalue())
-        response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        response.headers['Content-Disposition'] = 'attachment; filename=payroll_report.xlsx'
-        return response
+@hr_bp.route('/hr/payrolls/payslips/batch/<key>', methods=['GET'])
+def download_rendered_payslips(key):
+    """Download a payslip ZIP rendered by a 'render_payslips_zip' job (key from the job result)"""
+    if not re.fullmatch(r'[0-9a-f]{64}', key):
+        return jsonify({'error': 'Invalid key'}), 400
+    path = DocumentRenderService.cached_zip_path(key)
+    if path is None:
+        return jsonify({'error': 'ZIP not found or expired; request the batch again'}), 404
+    return send_file(
+        path,
+        mimetype='application/zip',
+        as_attachment=True,
+        download_name=secure_filename(request.args.get('filename', '')) or f'payslips_{key[:12]}.zip'
+    )
+
+@hr_bp.route('/hr/payrolls/export', methods=['GET'])
+@read_only
+def export_payroll_report():
+    try:
+        # Generate Excel report into a temp file and stream it back
+        excel_file = HRService.export_payroll_report()
+
+        return send_file(
+            excel_file,
+            mimetype=XLSX_MIMETYPE,
+            as_attachment=True,
+            download_name='payroll_report.xlsx'
+        )
 
     except ValueError as ve:
         return jsonify({'error': str(ve)}), 400
@@ -832,8 +942,11 @@ def get_job_applications():
     job_posting_id = request.args.get('jobPostingId')
     status = request.args.get('status')
     try:
-        applications = HRService.get_job_applications(job_posting_id=job_posting_id, status=status)
-        return jsonify(applications), 200
+        page_request = parse_page_request(request.args, HRService.APPLICATION_SORT_FIELDS, 'createdAt')
+        applications = HRService.get_job_applications(job_posting_id=job_posting_id, status=status, page=page_request)
+        return page_response(applications, page_request)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1018,8 +1131,11 @@ def get_candidates():
     search = request.args.get('search')
     status = request.args.get('status')
     try:
-        candidates = HRService.get_candidates(search, status)
-        return jsonify(candidates), 200
+        page_request = parse_page_request(request.args, HRService.CANDIDATE_SORT_FIELDS, 'createdAt')
+        candidates = HRService.get_candidates(search, status, page=page_request)
+        return page_response(candidates, page_request)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -0,0 +1,50 @@
+"""
+Job Routes Module
+Status of background jobs (see services/job_queue_service.py)
+"""
+from flask import Blueprint, request, jsonify
+from services.job_queue_service import JobQueueService
+
+jobs_bp = Blueprint('jobs', __name__)
+
+
+@jobs_bp.route('/jobs', methods=['GET'])
+def list_jobs():
+    """Most recent jobs; filter with ?status=&type=&limit="""
+    try:
+        limit = min(int(request.args.get('limit', 50)), 500)
+        jobs = JobQueueService.list_jobs(
+            status=request.args.get('status'),
+            job_type=request.args.get('type'),
+            limit=limit
+        )
+        return jsonify(jobs), 200
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@jobs_bp.route('/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status, attempts, last error and result of one job"""
+    try:
+        job = JobQueueService.get_job(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(job), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@jobs_bp.route('/jobs/<int:job_id>/retry', methods=['POST'])
+def retry_job(job_id):
+    """Requeue a failed job"""
+    try:
+        return jsonify(JobQueueService.retry_job(job_id)), 200
+    except LookupError as le:
+        return jsonify({'error': str(le)}), 404
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -6,6 +6,7 @@ from services import ProductionService
 from services.audit_service import AuditService
 from models import AuditAction, AuditModule
 from utils.audit_middleware import audit_route
+from utils.pagination import parse_page_request, page_response
 
 production_bp = Blueprint('production', __name__)
 
@@ -13,8 +14,11 @@ production_bp = Blueprint('production', __name__)
 def get_production_orders():
     """Get all production orders"""
     try:
-        orders = ProductionService.get_all_orders()
-        return jsonify(orders), 200
+        page_request = parse_page_request(request.args, ProductionService.PRODUCTION_ORDER_SORT_FIELDS, 'createdAt')
+        orders = ProductionService.get_all_orders(page=page_request)
+        return page_response(orders, page_request)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -5,6 +5,7 @@ from flask import Blueprint, request, jsonify
 from services.purchase_service import PurchaseService
 from services.audit_service import AuditService
 from models import AuditAction, AuditModule, PurchaseOrder
+from utils.pagination import parse_page_request, page_response
 
 purchase_bp = Blueprint('purchase', __name__)
 
@@ -12,8 +13,11 @@ purchase_bp = Blueprint('purchase', __name__)
 def get_purchase_orders():
     """Get all purchase orders"""
     try:
-        orders = PurchaseService.get_all_purchase_orders()
-        return jsonify(orders), 200
+        page_request = parse_page_request(request.args, PurchaseService.PURCHASE_ORDER_SORT_FIELDS, 'createdAt')
+        orders = PurchaseService.get_all_purchase_orders(page=page_request)
+        return page_response(orders, page_request)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
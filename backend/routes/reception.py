@@ -4,7 +4,10 @@ API endpoints for reception department operations
 """
 from flask import Blueprint, request, jsonify
 from services.guest_list_service import GuestListService
-from models import AuditAction, AuditModule
+from utils.pagination import filter_args, parse_date_arg, parse_page_request, page_response
+from utils.db_routing import read_only
+from utils.change_tracking import conditional_by_tables
+from models import AuditAction, AuditModule, GuestList
 from services.audit_service import AuditService
 
 reception_bp = Blueprint('reception', __name__)
@@ -14,17 +17,15 @@ reception_bp = Blueprint('reception', __name__)
 def get_all_guests():
     """Get all guest entries with optional filters"""
     try:
-        filters = {
-            'status': request.args.get('status'),
-            'startDate': request.args.get('startDate'),
-            'endDate': request.args.get('endDate'),
-            'search': request.args.get('search')
-        }
-        # Remove None values
-        filters = {k: v for k, v in filters.items() if v is not None}
-        
-        guests = GuestListService.get_all_guests(filters if filters else None)
-        return jsonify(guests), 200
+        filters = filter_args(request.args, 'status', 'startDate', 'endDate', 'search')
+        for name in ('startDate', 'endDate'):
+            if name in filters:
+                filters[name] = parse_date_arg(request.args, name)
+        page_request = parse_page_request(request.args, GuestListService.GUEST_SORT_FIELDS, 'visitDate')
+        guests = GuestListService.get_all_guests(filters if filters else None, page=page_request)
+        return page_response(guests, page_request)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -40,6 +41,8 @@ def get_todays_guests():
 
 
 @reception_bp.route('/reception/guests/summary', methods=['GET'])
+@read_only
+@conditional_by_tables(GuestList)
 def get_guest_summary():
     """Get summary statistics for guest visits"""
     try:
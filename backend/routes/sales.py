@@ -7,6 +7,10 @@ from services.sales_service import SalesService
 from services.gst_verification_service import GSTVerificationService
 from services.audit_service import AuditService
 from models import AuditAction, AuditModule, User, SalesOrder
+from utils.pagination import parse_page_request, page_response
+from utils.db_routing import read_only
+from services.document_render_service import RenderBusyError
+from utils.change_tracking import conditional_by_tables
 
 sales_bp = Blueprint('sales', __name__)
 
@@ -47,19 +51,17 @@ def get_sales_orders():
         
         print(f"[SALES FILTER DEBUG] Final sales_person filter: '{sales_person}'")
         
-        orders = SalesService.get_sales_orders(status=status, sales_person=sales_person)
+        page_request = parse_page_request(request.args, SalesService.ORDER_SORT_FIELDS, 'createdAt')
+        orders = SalesService.get_sales_orders(status=status, sales_person=sales_person, page=page_request)
         
-        print(f"[SALES FILTER DEBUG] Found {len(orders)} orders")
-        if orders and len(orders) > 0:
-            print(f"[SALES FILTER DEBUG] Sample order sales_person values: {[repr(o.get('salesPerson')) for o in orders[:3]]}")
-        
-        # Also show ALL sales_person values in database for debugging
-        from models import SalesOrder
-        all_sales_persons = SalesOrder.query.with_entities(SalesOrder.sales_person).distinct().all()
-        print(f"[SALES FILTER DEBUG] All unique sales_person values in DB: {[repr(sp[0]) for sp in all_sales_persons]}")
+        print(f"[SALES FILTER DEBUG] Found {len(orders.items)} orders (more: {orders.has_more})")
+        if orders.items:
+            print(f"[SALES FILTER DEBUG] Sample order sales_person values: {[repr(o.get('salesPerson')) for o in orders.items[:3]]}")
         print(f"[SALES FILTER DEBUG] ===== END =====\n")
         
-        return jsonify(orders), 200
+        return page_response(orders, page_request)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         print(f"[SALES FILTER ERROR] {e}")
         import traceback
@@ -318,8 +320,11 @@ def apply_coupon(order_id):
 def get_customers():
     """Get all customers"""
     try:
-        customers = SalesService.get_customers()
-        return jsonify(customers), 200
+        page_request = parse_page_request(request.args, SalesService.CUSTOMER_SORT_FIELDS, 'name', 'asc')
+        customers = SalesService.get_customers(page=page_request)
+        return page_response(customers, page_request)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -342,6 +347,8 @@ def create_customer():
 
 
 @sales_bp.route('/summary', methods=['GET'])
+@read_only
+@conditional_by_tables(SalesOrder)
 def get_sales_summary():
     """Get sales summary statistics"""
     try:
@@ -576,8 +583,8 @@ def verify_gst_number():
         if not gst_number:
             return jsonify({'error': 'GST number is required'}), 400
 
-        # Verify GST number using real government portal
-        result = GSTVerificationService.verify_gst_number(gst_number)
+        # Cached answers are reused unless the client asks for a fresh lookup
+        result = GSTVerificationService.verify_gst_number(gst_number, refresh=bool(data.get('refresh')))
 
         return jsonify(result), 200
 
@@ -593,6 +600,7 @@ def verify_gst_number():
 # ==================== SALES TARGET & DASHBOARD ENDPOINTS ====================
 
 @sales_bp.route('/dashboard', methods=['GET'])
+@read_only
 def get_salesperson_dashboard():
     """Get sales dashboard for the current salesperson with target tracking"""
     try:
@@ -871,6 +879,18 @@ def download_proforma_invoice(order_id):
             
             print(f"After Override - unitPrice: {order_dict.get('unitPrice')}, finalAmount: {order_dict.get('finalAmount')}, transportCost: {order_dict.get('transportCost')}")
         
+        if request.args.get('format') == 'pdf':
+            from services.document_render_service import DocumentRenderService
+            pdf_data = DocumentRenderService.render_pdf(
+                'proforma_invoice',
+                order_dict,
+                lambda: generate_proforma_invoice(order_dict)
+            )
+            return pdf_data, 200, {
+                'Content-Type': 'application/pdf',
+                'Content-Disposition': f'inline; filename=invoice_{order_id}.pdf'
+            }
+        
         # Generate HTML
         html_content = generate_proforma_invoice(order_dict)
         
@@ -878,6 +898,8 @@ def download_proforma_invoice(order_id):
         from flask import Response
         return Response(html_content, mimetype='text/html')
         
+    except RenderBusyError as rb:
+        return jsonify({'error': str(rb)}), 503, {'Retry-After': str(rb.retry_after)}
     except Exception as e:
         print(f"Error generating invoice: {e}")
         import traceback
@@ -1,10 +1,14 @@
 """
 Store and inventory management API routes
 """
+from datetime import datetime, time
 from flask import Blueprint, request, jsonify
 from services import InventoryService, PurchaseService
+from services.stock_ledger_service import StockLedgerService
 from services.audit_service import AuditService
 from models import AuditAction, AuditModule
+from utils.timezone_helpers import IST
+from utils.pagination import parse_page_request, page_response
 
 store_bp = Blueprint('store', __name__)
 
@@ -14,8 +18,11 @@ def get_store_inventory():
     """Get store inventory with optional search"""
     try:
         search = request.args.get('search', '')
-        inventory = InventoryService.get_all_inventory(search)
-        return jsonify(inventory), 200
+        page_request = parse_page_request(request.args, InventoryService.INVENTORY_SORT_FIELDS, 'name', 'asc')
+        inventory = InventoryService.get_all_inventory(search, page=page_request)
+        return page_response(inventory, page_request)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -116,6 +123,49 @@ def bulk_add_inventory_items():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@store_bp.route('/store/inventory/as-of', methods=['GET'])
+def get_inventory_as_of():
+    """Get every item's stock balance at a past date/time (date only means end of that day)"""
+    try:
+        as_of_param = request.args.get('date')
+        if not as_of_param:
+            return jsonify({'error': 'date parameter is required'}), 400
+
+        try:
+            if len(as_of_param) == 10:
+                as_of = datetime.combine(datetime.strptime(as_of_param, '%Y-%m-%d').date(), time.max)
+            else:
+                as_of = datetime.fromisoformat(as_of_param.replace('Z', '+00:00'))
+                if as_of.tzinfo is not None:
+                    # Ledger times are naive IST wall-clock; convert before dropping the offset
+                    as_of = as_of.astimezone(IST).replace(tzinfo=None)
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD or ISO datetime'}), 400
+
+        inventory = StockLedgerService.get_stock_as_of(as_of)
+        return jsonify({'asOf': as_of.isoformat(), 'inventory': inventory}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@store_bp.route('/store/inventory/<int:item_id>/movements', methods=['GET'])
+def get_inventory_movements(item_id):
+    """Get the stock movement history for an inventory item"""
+    try:
+        limit = min(request.args.get('limit', 200, type=int), 1000)
+        movements = StockLedgerService.get_item_movements(item_id, limit=limit)
+        return jsonify(movements), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@store_bp.route('/store/inventory/checkpoints', methods=['POST'])
+def create_inventory_checkpoints():
+    """Snapshot current balances (run periodically, e.g. nightly, to keep as-of queries fast)"""
+    try:
+        result = StockLedgerService.create_checkpoints()
+        return jsonify(result), 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Store operations routes
 @store_bp.route('/store/orders/pending', methods=['GET'])
 def get_pending_store_orders():
@@ -27,7 +27,11 @@ from services.transport_service import TransportService
 from services.audit_service import AuditService
 from models import AuditAction, AuditModule, User, SalesOrder
 from models.sales import TransportApprovalRequest
+from models.showroom import DispatchRequest, TransportJob
 from utils.jwt_helpers import get_jwt_identity_safe
+from utils.db_routing import read_only
+from utils.change_tracking import conditional_by_tables
+from utils.pagination import parse_page_request, page_response
 
 transport_bp = Blueprint('transport', __name__)
 
@@ -157,8 +161,11 @@ def get_pending_transport_jobs():
 def get_all_transport_jobs():
     """Get all transport jobs with all statuses"""
     try:
-        jobs = TransportService.get_all_transport_jobs()
-        return jsonify(jobs), 200
+        page_request = parse_page_request(request.args, TransportService.TRANSPORT_JOB_SORT_FIELDS, 'createdAt')
+        jobs = TransportService.get_all_transport_jobs(page=page_request)
+        return page_response(jobs, page_request)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -295,6 +302,8 @@ def get_in_transit_deliveries():
 
 
 @transport_bp.route('/transport/summary', methods=['GET'])
+@read_only
+@conditional_by_tables(TransportJob, DispatchRequest)
 def get_transport_summary():
     """Get transport department summary statistics"""
     try:
@@ -337,8 +346,11 @@ def search_transport_jobs():
 def get_fleet_vehicles():
     """Get all fleet vehicles"""
     try:
-        vehicles = TransportService.get_fleet_vehicles()
-        return jsonify(vehicles), 200
+        page_request = parse_page_request(request.args, TransportService.VEHICLE_SORT_FIELDS, 'createdAt')
+        vehicles = TransportService.get_fleet_vehicles(page=page_request)
+        return page_response(vehicles, page_request)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -2,12 +2,15 @@
 Watchman Routes Module
 API endpoints for watchman operations (gate security)
 """
-from flask import Blueprint, request, jsonify, current_app, send_from_directory
+from flask import Blueprint, request, jsonify, send_from_directory
 import os
-from werkzeug.utils import secure_filename
 from services.watchman_service import WatchmanService
 from services.guest_list_service import GuestListService
-from models import AuditAction, AuditModule, GatePass
+from services.upload_service import UploadService
+from utils.pagination import filter_args, parse_date_arg, parse_page_request, page_response
+from utils.db_routing import read_only
+from utils.change_tracking import conditional_by_tables
+from models import AuditAction, AuditModule, GatePass, GuestList
 from services.audit_service import AuditService
 import traceback
 
@@ -67,33 +70,19 @@ def verify_customer_pickup(gate_pass_id):
 
         action = data.get('action', 'release')
 
-        # Handle file uploads
-        upload_folder = os.path.join(os.getcwd(), 'backend', 'uploads')
-        os.makedirs(upload_folder, exist_ok=True)
-
-        # Get backend base URL from config
-        backend_url = current_app.config.get('BACKEND_BASE_URL', 'http://localhost:5000')
-
+        # Handle file uploads (stored by content hash; full URL kept for direct browser access)
         saved_files = {}
         # send in photo
         if 'sendInPhoto' in request.files:
             f = request.files['sendInPhoto']
             if f and f.filename:
-                filename = secure_filename(f.filename)
-                filepath = os.path.join(upload_folder, filename)
-                f.save(filepath)
-                # Store full URL for direct browser access
-                saved_files['send_in_photo'] = f'{backend_url}/api/watchman/uploads/{filename}'
+                saved_files['send_in_photo'] = UploadService.url(UploadService.store(f.stream))
 
         # after loading photo
         if 'afterLoadingPhoto' in request.files:
             f = request.files['afterLoadingPhoto']
             if f and f.filename:
-                filename = secure_filename(f.filename)
-                filepath = os.path.join(upload_folder, filename)
-                f.save(filepath)
-                # Store full URL for direct browser access
-                saved_files['after_loading_photo'] = f'{backend_url}/api/watchman/uploads/{filename}'
+                saved_files['after_loading_photo'] = UploadService.url(UploadService.store(f.stream))
 
         # Merge files info into data passed to service
         data.update(saved_files)
@@ -200,6 +189,8 @@ def reject_customer_pickup(gate_pass_id):
 
 
 @watchman_bp.route('/watchman/summary', methods=['GET'])
+@read_only
+@conditional_by_tables(GatePass)
 def get_daily_summary():
     """Get daily summary of watchman activities"""
     try:
@@ -252,17 +243,15 @@ def search_gate_passes():
 def get_all_guests():
     """Get all guest entries with optional filters"""
     try:
-        filters = {
-            'status': request.args.get('status'),
-            'startDate': request.args.get('startDate'),
-            'endDate': request.args.get('endDate'),
-            'search': request.args.get('search')
-        }
-        # Remove None values
-        filters = {k: v for k, v in filters.items() if v is not None}
-        
-        guests = GuestListService.get_all_guests(filters if filters else None)
-        return jsonify(guests), 200
+        filters = filter_args(request.args, 'status', 'startDate', 'endDate', 'search')
+        for name in ('startDate', 'endDate'):
+            if name in filters:
+                filters[name] = parse_date_arg(request.args, name)
+        page_request = parse_page_request(request.args, GuestListService.GUEST_SORT_FIELDS, 'visitDate')
+        guests = GuestListService.get_all_guests(filters if filters else None, page=page_request)
+        return page_response(guests, page_request)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -278,6 +267,8 @@ def get_todays_guests():
 
 
 @watchman_bp.route('/watchman/guests/summary', methods=['GET'])
+@read_only
+@conditional_by_tables(GuestList)
 def get_guest_summary():
     """Get summary statistics for guest visits"""
     try:
@@ -349,6 +340,26 @@ def check_in_guest(guest_id):
         return jsonify({'error': str(e)}), 500
 
 
+@watchman_bp.route('/watchman/guests/<int:guest_id>/photo', methods=['POST'])
+def upload_guest_photo(guest_id):
+    """Attach a visitor photo (multipart field 'photo' or JSON base64 'photo')"""
+    try:
+        photo_file = request.files.get('photo')
+        photo_base64 = None if photo_file else (request.get_json(silent=True) or {}).get('photo')
+        guest = GuestListService.set_visitor_photo(
+            guest_id,
+            photo_file=photo_file.stream if photo_file else None,
+            photo_base64=photo_base64
+        )
+        return jsonify(guest), 200
+    except LookupError as le:
+        return jsonify({'error': str(le)}), 404
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @watchman_bp.route('/watchman/guests/<int:guest_id>/check-out', methods=['POST'])
 def check_out_guest(guest_id):
     """Check out a guest (mark departure)"""
@@ -0,0 +1,86 @@
+"""
+Micro-benchmark for invoice HTML rendering
+
+Compares the precompiled Jinja2 invoice template against an uncached render
+(template parsed and amount-in-words computed on every call). Pass the path
+of an older invoice_generator.py with --legacy to benchmark it as well, e.g.
+
+    git show <rev>:backend/utils/invoice_generator.py > /tmp/legacy_invoice_generator.py
+    python scripts/benchmark_document_rendering.py --legacy /tmp/legacy_invoice_generator.py
+
+Run from the backend directory.
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape  # noqa: E402
+from num2words import num2words  # noqa: E402
+from utils import invoice_generator  # noqa: E402
+from utils.document_templates import TEMPLATE_DIR, _format_value  # noqa: E402
+
+SAMPLE_ORDER = {
+    'orderNumber': 'PRO/SH/25-2101',
+    'customerName': 'SM SCAFFOLDING AND MACHINARIES',
+    'customerAddress': 'Plot No.69, CTS No.1904/1/90, Shop No. 22/1',
+    'customerContact': '9800000000',
+    'gstNumber': '27ABCDE1234F1Z5',
+    'showroomProduct': {'name': 'DOUBLE WHEEL BARROW WITH CHAIN'},
+    'salesPerson': 'YOGESH SIR',
+    'quantity': 2,
+    'unitPrice': 84750.0,
+    'createdAt': '2025-03-31T10:15:00'
+}
+
+
+def render_uncached(sales_order):
+    """Render with a fresh environment and no memoization, as if nothing were precompiled"""
+    env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), autoescape=select_autoescape(['html']))
+    env.filters['fmt'] = _format_value
+    context = invoice_generator._invoice_context(sales_order, 'PRO/SH/25-2019')
+    context['amount_words'] = num2words(int(context['final_amount']), lang='en_IN').title()
+    return env.get_template('invoice.html').render(
+        document_title='Proforma Invoice',
+        document_heading='PROFORMA INVOICE',
+        number_label='Proforma Invoice No',
+        footer_document_name='proforma invoice',
+        **context
+    )
+
+
+def load_legacy(path):
+    """Import an older invoice_generator.py as part of the utils package"""
+    spec = importlib.util.spec_from_file_location('utils._legacy_invoice_generator', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def bench(label, func, number):
+    func(SAMPLE_ORDER)  # Warm up
+    seconds = min(timeit.repeat(lambda: func(SAMPLE_ORDER), number=number, repeat=5))
+    per_call_us = seconds / number * 1e6
+    print(f"{label:<28} {per_call_us:10.1f} us/render {number / seconds:12,.0f} renders/s")
+    return per_call_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=2000, help='Renders per timing run')
+    parser.add_argument('--legacy', help='Path to an older invoice_generator.py to compare against')
+    args = parser.parse_args()
+
+    bench('precompiled template', invoice_generator.generate_proforma_invoice, args.number)
+    bench('uncached template', render_uncached, max(args.number // 20, 10))
+
+    if args.legacy:
+        legacy = load_legacy(args.legacy)
+        bench('legacy f-string', legacy.generate_proforma_invoice, args.number)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+JSON serialization and response size benchmark
+
+For each endpoint, compares Flask's stdlib JSON provider with the orjson
+provider (utils/json_provider.py): time to serialize the response payload
+and time for the whole request. It also prints the bytes on the wire with
+no compression, gzip and Brotli (utils/compression.py). Requests go
+through the Flask test client against the database of the chosen config,
+so run it on a copy with realistic data:
+
+    python scripts/benchmark_json.py
+    python scripts/benchmark_json.py --config production --repeat 50
+    python scripts/benchmark_json.py --path "/api/sales/orders?limit=500"
+
+Run from the backend directory.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_PATHS = (
+    '/api/sales/orders?limit=500',
+    '/api/hr/attendance?limit=500'
+)
+
+
+def _median_ms(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def benchmark(app, paths=DEFAULT_PATHS, repeat=20):
+    """Return one result dict per path"""
+    from flask.json.provider import DefaultJSONProvider
+
+    fast_provider = app.json
+    stdlib_provider = DefaultJSONProvider(app)
+    client = app.test_client()
+    results = []
+
+    for path in paths:
+        response = client.get(path, headers={'Accept-Encoding': 'identity'})
+        if response.status_code != 200:
+            raise SystemExit(f"{path} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+        payload = response.get_json()
+
+        sizes = {
+            encoding: len(client.get(path, headers={'Accept-Encoding': encoding}).get_data())
+            for encoding in ('identity', 'gzip', 'br')
+        }
+
+        timings = {}
+        for label, provider in (('stdlib', stdlib_provider), ('orjson', fast_provider)):
+            app.json = provider
+            try:
+                timings[f'{label}_dumps_ms'] = _median_ms(lambda: provider.dumps(payload), repeat)
+                timings[f'{label}_request_ms'] = _median_ms(lambda: client.get(path, headers={'Accept-Encoding': 'identity'}), repeat)
+            finally:
+                app.json = fast_provider
+
+        results.append({
+            'path': path,
+            'items': len(payload['items'] if isinstance(payload, dict) and 'items' in payload else payload),
+            'sizes': sizes,
+            **timings
+        })
+    return results
+
+
+def print_results(results):
+    for result in results:
+        sizes = result['sizes']
+        print(f"\n{result['path']}  ({result['items']} items)")
+        print(f"  serialize   stdlib {result['stdlib_dumps_ms']:8.2f} ms   orjson {result['orjson_dumps_ms']:8.2f} ms")
+        print(f"  request     stdlib {result['stdlib_request_ms']:8.2f} ms   orjson {result['orjson_request_ms']:8.2f} ms")
+        print(
+            f"  wire bytes  identity {sizes['identity']:>10,}   gzip {sizes['gzip']:>9,}"
+            f" ({sizes['gzip'] / max(sizes['identity'], 1):.0%})   br {sizes['br']:>9,}"
+            f" ({sizes['br'] / max(sizes['identity'], 1):.0%})"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--config', default=os.getenv('FLASK_CONFIG', 'default'), help='Config name from config.py')
+    parser.add_argument('--path', action='append', help='Endpoint to measure (repeatable)')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed runs per measurement (median is shown)')
+    args = parser.parse_args()
+
+    from app import create_app
+    app = create_app(args.config)
+    with app.app_context():
+        print_results(benchmark(app, args.path or DEFAULT_PATHS, args.repeat))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+Background job worker
+
+Runs queued jobs from the background_jobs table in a separate process. Use
+it with JOB_QUEUE_MODE=worker on the web processes so they only enqueue:
+
+    python scripts/job_worker.py                        # run until stopped
+    python scripts/job_worker.py --concurrency 4
+    python scripts/job_worker.py --type send_email      # only some job types
+    python scripts/job_worker.py --once                 # run due jobs and exit
+
+Run from the backend directory.
+"""
+import argparse
+import logging
+import os
+import signal
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# This process is the worker; keep create_app() from starting an embedded one
+os.environ['JOB_QUEUE_MODE'] = 'worker'
+
+from app import create_app  # noqa: E402
+from services.job_queue_service import JobQueueService, JobWorker  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, help='Jobs run at once (defaults to JOB_QUEUE_CONCURRENCY)')
+    parser.add_argument('--type', action='append', dest='job_types', choices=sorted(JobQueueService.HANDLERS),
+                        help='Only run this job type (repeatable)')
+    parser.add_argument('--once', action='store_true', help='Run the jobs that are due now, then exit')
+    parser.add_argument('--config', help='Config name (defaults to FLASK_CONFIG)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    app = create_app(args.config)
+    worker = JobWorker(
+        app,
+        concurrency=args.concurrency or app.config.get('JOB_QUEUE_CONCURRENCY', 2),
+        job_types=args.job_types
+    )
+
+    if args.once:
+        total = 0
+        while True:
+            claimed = worker.run_once(wait=True)
+            if not claimed:
+                break
+            total += claimed
+        print(f"Ran {total} jobs")
+        return 0
+
+    # Finish running jobs on SIGTERM (deploys) instead of abandoning them
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    try:
+        worker.run_forever()
+    except KeyboardInterrupt:
+        worker.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""
+Run database migrations out-of-band
+
+Applies the migrations in utils/migration_manager.py that are missing from
+the schema_migrations ledger, so web workers can boot with
+SKIP_MIGRATIONS=true and do no schema work at all, e.g. as a release step:
+
+    python scripts/migrate.py             # run pending migrations
+    python scripts/migrate.py status      # list applied / pending / changed
+    python scripts/migrate.py baseline    # mark all as applied without running
+
+Run from the backend directory.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep create_app() from migrating on its own; this script does it explicitly
+os.environ['SKIP_MIGRATIONS'] = 'true'
+
+from app import create_app  # noqa: E402
+from models import db  # noqa: E402
+from utils.migration_manager import migration_manager  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', nargs='?', default='run', choices=['run', 'status', 'baseline'])
+    parser.add_argument('--config', help='Config name (defaults to FLASK_CONFIG)')
+    args = parser.parse_args()
+
+    app = create_app(args.config)
+    with app.app_context():
+        migration_manager.init_app(app, db)
+        try:
+            if args.command == 'status':
+                for migration_id, state in migration_manager.status():
+                    print(f"{state:<8} {migration_id}")
+                return 0
+            if args.command == 'baseline':
+                migration_manager.baseline()
+                return 0
+            return 0 if migration_manager.run_all_migrations() else 1
+        finally:
+            migration_manager.engine.dispose()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
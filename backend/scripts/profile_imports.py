@@ -0,0 +1,93 @@
+"""
+Import-time profile of the Flask app
+
+Runs `python -X importtime` on a fresh interpreter that builds the app, then
+prints the slowest top-level imports, the boot time and peak RSS. Exits with
+status 1 if any of the heavy optional libraries (OpenCV, numpy, pandas,
+Pillow, BeautifulSoup, WeasyPrint, ReportLab, openpyxl) were imported at boot;
+those must only load on first use. Use it as a regression check:
+
+    python scripts/profile_imports.py
+    python scripts/profile_imports.py --top 40 --allow PIL
+
+Run from the backend directory.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Top-level packages that must not be imported while the app boots
+HEAVY_MODULES = ('cv2', 'numpy', 'pandas', 'PIL', 'bs4', 'weasyprint', 'reportlab', 'openpyxl')
+
+# Builds the app without touching the database (TESTING skips migrations)
+BOOT_CODE = """
+import resource, sys, time
+started = time.perf_counter()
+from app import create_app
+create_app('testing')
+elapsed = time.perf_counter() - started
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(f"BOOT {elapsed:.3f} {rss_kb} {','.join(sorted(sys.modules))}")
+"""
+
+
+def profile():
+    """Run the boot code under -X importtime; return (per-module timings, boot seconds, RSS kB, loaded modules)"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', BOOT_CODE],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(f"App boot failed with exit code {result.returncode}")
+
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings.append((name.rstrip(), int(self_us), int(cumulative_us)))
+
+    boot_line = next(line for line in result.stdout.splitlines() if line.startswith('BOOT '))
+    _, seconds, rss_kb, modules = boot_line.split(' ', 3)
+    return timings, float(seconds), int(rss_kb), set(modules.split(','))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--top', type=int, default=25, help='Number of slowest imports to list')
+    parser.add_argument('--depth', type=int, default=3, help='Deepest import nesting level to list')
+    parser.add_argument('--allow', action='append', default=[], help='Heavy module allowed at boot (repeatable)')
+    args = parser.parse_args()
+
+    timings, seconds, rss_kb, modules = profile()
+
+    # -X importtime indents each nested import by two more spaces
+    shallow = sorted(
+        (entry for entry in timings if (len(entry[0]) - len(entry[0].lstrip()) - 1) // 2 <= args.depth),
+        key=lambda entry: entry[2],
+        reverse=True
+    )
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_us, cumulative_us in shallow[:args.top]:
+        print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:9.1f}  {name.rstrip()}")
+
+    print(f"\nBoot time: {seconds * 1000:.0f} ms")
+    print(f"Peak RSS:  {rss_kb / 1024:.1f} MB")
+    print(f"Modules:   {len(modules)}")
+
+    loaded = [name for name in HEAVY_MODULES if name in modules and name not in args.allow]
+    if loaded:
+        print(f"\n❌ Heavy modules imported at boot: {', '.join(loaded)}")
+        return 1
+    print("\n✅ No heavy modules imported at boot")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,9 +5,13 @@ Handles business logic for approval requests requiring admin verification
 from datetime import datetime
 from utils.timezone_helpers import get_ist_now
 from models import db, ApprovalRequest, SalesOrder, ShowroomProduct
+from utils.pagination import paginate
 
 class ApprovalService:
     """Service class for approval operations"""
+
+    # API sort names accepted by the paged list endpoints
+    APPROVAL_SORT_FIELDS = {'createdAt': ApprovalRequest.created_at}
     
     @staticmethod
     def create_coupon_approval_request(sales_order_id, requested_by, coupon_code, discount_amount, request_details):
@@ -254,10 +258,14 @@ class ApprovalService:
             raise Exception(f"Error rejecting request: {str(e)}")
     
     @staticmethod
-    def get_all_approvals():
-        """Get all approval requests (pending, approved, rejected)"""
+    def get_all_approvals(page=None):
+        """Get all approval requests (pending, approved, rejected), as a Page when a PageRequest is given"""
         try:
-            approval_requests = ApprovalRequest.query.order_by(ApprovalRequest.created_at.desc()).all()
+            if page is not None:
+                result_page = paginate(ApprovalRequest.query, page, ApprovalRequest.id)
+                approval_requests = result_page.items
+            else:
+                approval_requests = ApprovalRequest.query.order_by(ApprovalRequest.created_at.desc()).all()
             
             approvals = []
             for request in approval_requests:
@@ -273,6 +281,9 @@ class ApprovalService:
                 
                 approvals.append(approval_data)
             
+            if page is not None:
+                result_page.items = approvals
+                return result_page
             return approvals
         except Exception as e:
             raise Exception(f"Error fetching all approvals: {str(e)}")
@@ -3,13 +3,19 @@ Assembly order business logic service
 """
 from datetime import datetime
 from utils.timezone_helpers import get_ist_now
-from models import db, AssemblyOrder, PurchaseOrder
+from models import db, AssemblyOrder, PurchaseOrder, ReworkOrder
 from utils.validators import validate_positive_integer, validate_status
+from services.showroom_availability_service import ShowroomAvailabilityService
+from utils.pagination import paginate
 
 class AssemblyService:
     """Service class for assembly order operations"""
     
     VALID_STATUSES = ['pending', 'in_progress', 'paused', 'completed', 'sent_to_showroom']
+
+    # API sort names accepted by the paged list endpoints
+    ASSEMBLY_ORDER_SORT_FIELDS = {'createdAt': AssemblyOrder.created_at}
+    REWORK_ORDER_SORT_FIELDS = {'createdAt': ReworkOrder.created_at}
     
     @staticmethod
     def get_ready_assembly_orders():
@@ -28,9 +34,11 @@ class AssemblyService:
             raise Exception(f"Error fetching assembly orders: {str(e)}")
     
     @staticmethod
-    def get_all_assembly_orders():
-        """Get all assembly orders"""
+    def get_all_assembly_orders(page=None):
+        """Get all assembly orders, or a Page of them when a PageRequest is given"""
         try:
+            if page is not None:
+                return paginate(AssemblyOrder.query, page, AssemblyOrder.id).map(lambda order: order.to_dict())
             orders = AssemblyOrder.query.order_by(AssemblyOrder.created_at.desc()).all()
             return [order.to_dict() for order in orders]
         except Exception as e:
@@ -213,14 +221,14 @@ class AssemblyService:
             raise Exception(f"Error fetching assembly order: {str(e)}")
 
     @staticmethod
-    def get_rework_orders():
-        """Get all rework orders for the assembly department"""
+    def get_rework_orders(page=None):
+        """Get open rework orders for the assembly department, as a Page when a PageRequest is given"""
         try:
-            from models import ReworkOrder
-            
-            rework_orders = ReworkOrder.query.filter(
-                ReworkOrder.status.in_(['pending', 'in_progress'])
-            ).order_by(ReworkOrder.created_at.desc()).all()
+            query = ReworkOrder.query.filter(ReworkOrder.status.in_(['pending', 'in_progress']))
+            if page is not None:
+                return paginate(query, page, ReworkOrder.id).map(lambda order: order.to_dict())
+
+            rework_orders = query.order_by(ReworkOrder.created_at.desc()).all()
             
             return [order.to_dict() for order in rework_orders]
         except Exception as e:
@@ -248,6 +256,7 @@ class AssemblyService:
                 rework_order.notes = data['notes']
             
             db.session.commit()
+            ShowroomAvailabilityService.invalidate()
             return rework_order.to_dict()
             
         except Exception as e:
@@ -298,6 +307,7 @@ class AssemblyService:
                         original_assembly_order.status = 'partially_completed'
             
             db.session.commit()
+            ShowroomAvailabilityService.invalidate()
             
             return {
                 'message': f'Rework completed for {len(failed_machines)} machines. Machines returned to testing.',
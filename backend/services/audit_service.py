@@ -5,7 +5,8 @@ Audit Service for logging system activities
 from flask import request, session, g, current_app
 from flask_jwt_extended import get_jwt_identity
 from utils.jwt_helpers import get_jwt_identity_safe
-from models import AuditTrail, AuditAction, AuditModule, User
+from models import db, AuditTrail, AuditAction, AuditModule, User
+from utils.change_tracking import cached_by_tables
 from functools import wraps
 import uuid
 import json
@@ -190,6 +191,23 @@ class AuditService:
             print(f"[AuditService] Error logging data change: {e}")
             return None
 
+    @staticmethod
+    @cached_by_tables(User, copy_result=False)
+    def get_user_directory():
+        """{user id: (full name, department)} for labelling audit rows; cached until users change"""
+        rows = db.session.query(User.id, User.full_name, User.department).all()
+        return {user_id: (full_name, department) for user_id, full_name, department in rows}
+
+    @staticmethod
+    def add_user_info(logs):
+        """Add user_name and user_department to audit log dicts in place"""
+        directory = AuditService.get_user_directory()
+        for log in logs:
+            user = directory.get(log['user_id']) if log['user_id'] else None
+            if user:
+                log['user_name'], log['user_department'] = user
+        return logs
+
 
 # ----------------------------------------------------------------------
 # Decorators
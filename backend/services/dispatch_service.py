@@ -5,10 +5,15 @@ Handles business logic for dispatch operations
 from datetime import datetime
 from utils.timezone_helpers import get_ist_now
 from models import db, DispatchRequest, SalesOrder, ShowroomProduct, TransportJob, GatePass
+from utils.pagination import paginate
+from utils.change_tracking import cached_by_tables
 
 
 class DispatchService:
     """Service class for dispatch operations"""
+
+    # API sort names accepted by the paged list endpoints
+    DISPATCH_SORT_FIELDS = {'createdAt': DispatchRequest.created_at, 'updatedAt': DispatchRequest.updated_at}
     
     @staticmethod
     def get_pending_dispatch_orders():
@@ -45,10 +50,14 @@ class DispatchService:
             raise Exception(f"Error fetching pending dispatch orders: {str(e)}")
     
     @staticmethod
-    def get_all_dispatch_orders():
-        """Get all dispatch orders with status filtering"""
+    def get_all_dispatch_orders(page=None):
+        """Get all dispatch orders, or a Page of them when a PageRequest is given"""
         try:
-            dispatch_requests = DispatchRequest.query.order_by(DispatchRequest.created_at.desc()).all()
+            if page is not None:
+                result_page = paginate(DispatchRequest.query, page, DispatchRequest.id)
+                dispatch_requests = result_page.items
+            else:
+                dispatch_requests = DispatchRequest.query.order_by(DispatchRequest.created_at.desc()).all()
 
             orders = []
             for request in dispatch_requests:
@@ -100,6 +109,9 @@ class DispatchService:
                     'transporterName': company_name  # Also add as transporterName for consistency
                 })
 
+            if page is not None:
+                result_page.items = orders
+                return result_page
             return orders
         except Exception as e:
             raise Exception(f"Error fetching dispatch orders: {str(e)}")
@@ -451,6 +463,7 @@ class DispatchService:
             raise Exception(f"Error updating transport status: {str(e)}")
     
     @staticmethod
+    @cached_by_tables(DispatchRequest)
     def get_dispatch_summary():
         """Get dispatch department summary statistics"""
         try:
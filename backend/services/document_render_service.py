@@ -0,0 +1,272 @@
+"""
+Document Render Service Module
+Converts invoice and payslip HTML to PDF in a bounded process pool with an on-disk cache
+(which also keeps batch ZIPs rendered by background jobs until they are downloaded)
+"""
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app
+from utils.pdf_renderer import html_to_pdf
+
+logger = logging.getLogger(__name__)
+
+# Bump when invoice/payslip templates change so cached PDFs are not reused
+RENDER_VERSION = 2
+
+
+class RenderBusyError(Exception):
+    """Raised when the render pool is saturated and the caller should retry later"""
+
+    retry_after = 5  # Seconds suggested to clients in Retry-After
+
+
+class DocumentRenderService:
+    """Service class for PDF rendering off the request thread"""
+
+    # One pool per gunicorn worker process, created on first use. PDF
+    # conversion is CPU-bound, so it runs in child processes; the request
+    # thread only waits on the future.
+    _executor = None
+    _slots = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _setting(name, default):
+        try:
+            return current_app.config.get(name, default)
+        except RuntimeError:
+            return default
+
+    @classmethod
+    def _get_executor(cls):
+        with cls._lock:
+            if cls._executor is None:
+                workers = int(cls._setting('PDF_RENDER_WORKERS', 2))
+                cls._executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    max_tasks_per_child=int(cls._setting('PDF_RENDER_TASKS_PER_CHILD', 50))
+                )
+                # Queued + running jobs; beyond this callers get RenderBusyError
+                cls._slots = threading.BoundedSemaphore(workers * int(cls._setting('PDF_RENDER_QUEUE_FACTOR', 4)))
+            return cls._executor, cls._slots
+
+    @classmethod
+    def shutdown(cls):
+        """Stop the pool (used by tests and worker shutdown hooks)"""
+        with cls._lock:
+            if cls._executor is not None:
+                cls._executor.shutdown(wait=True, cancel_futures=True)
+            cls._executor = None
+            cls._slots = None
+
+    @classmethod
+    def _discard_broken_pool(cls, executor):
+        """Drop a pool whose child died so the next call starts a fresh one"""
+        with cls._lock:
+            if cls._executor is executor:
+                cls._executor = None
+                cls._slots = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def _result(cls, future, executor):
+        try:
+            return future.result(timeout=float(cls._setting('PDF_RENDER_TIMEOUT', 60)))
+        except BrokenProcessPool:
+            logger.error("PDF render pool crashed; it will be recreated")
+            cls._discard_broken_pool(executor)
+            raise
+
+    @staticmethod
+    def content_key(kind, source):
+        """
+        Cache key for a document: SHA-256 of its kind and source record
+
+        Any change to the order or payroll (including updatedAt) yields a new
+        key, so stale PDFs are never served and simply age out of the cache.
+        """
+        payload = json.dumps(
+            {'kind': kind, 'version': RENDER_VERSION, 'source': source},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def _cache_dir(cls):
+        path = cls._setting('PDF_CACHE_DIR', None) or os.path.join(tempfile.gettempdir(), 'alankar_pdf_cache')
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @classmethod
+    def _cache_get(cls, key):
+        path = os.path.join(cls._cache_dir(), f'{key}.pdf')
+        try:
+            with open(path, 'rb') as pdf_file:
+                data = pdf_file.read()
+            os.utime(path)  # Mark as recently used for trimming
+            return data
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def _cache_put(cls, key, data):
+        cache_dir = cls._cache_dir()
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_path, os.path.join(cache_dir, f'{key}.pdf'))
+        cls._trim_cache(cache_dir)
+
+    @classmethod
+    def _trim_cache(cls, cache_dir):
+        """Keep at most PDF_CACHE_MAX_FILES PDFs and ZIPs, dropping the least recently used"""
+        max_files = int(cls._setting('PDF_CACHE_MAX_FILES', 2000))
+        try:
+            entries = [entry for entry in os.scandir(cache_dir) if entry.name.endswith(('.pdf', '.zip'))]
+            if len(entries) <= max_files:
+                return
+            entries.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in entries[:len(entries) - max_files]:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+        except OSError as e:
+            logger.warning(f"PDF cache trim failed: {e}")
+
+    @classmethod
+    def submit(cls, html):
+        """
+        Queue one HTML document for conversion
+
+        Returns:
+            concurrent.futures.Future resolving to PDF bytes
+
+        Raises:
+            RenderBusyError: When the pool already has its maximum of queued jobs
+        """
+        executor, slots = cls._get_executor()
+        if not slots.acquire(timeout=float(cls._setting('PDF_RENDER_QUEUE_TIMEOUT', 5))):
+            raise RenderBusyError('PDF renderer is busy, please retry shortly')
+
+        try:
+            future = executor.submit(html_to_pdf, html)
+        except BrokenProcessPool:
+            slots.release()
+            cls._discard_broken_pool(executor)
+            raise
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        future.executor = executor
+        return future
+
+    @classmethod
+    def render_pdf(cls, kind, source, build_html):
+        """
+        Get the PDF for a document, rendering it in the pool on a cache miss
+
+        Args:
+            kind: Document type, e.g. 'proforma_invoice', 'final_invoice', 'payslip'
+            source: JSON-serializable source record used for the cache key
+            build_html: Callable returning the document HTML (only called on a miss)
+
+        Returns:
+            bytes: PDF data
+        """
+        key = cls.content_key(kind, source)
+        cached = cls._cache_get(key)
+        if cached is not None:
+            return cached
+
+        future = cls.submit(build_html())
+        data = cls._result(future, future.executor)
+        cls._cache_put(key, data)
+        return data
+
+    @classmethod
+    def render_zip(cls, documents):
+        """
+        Render many documents concurrently and pack them into one ZIP
+
+        Args:
+            documents: Iterable of (filename, kind, source, build_html) tuples
+
+        Returns:
+            A temp file object with the ZIP data positioned at the start
+        """
+        # Keep at most one job per worker in flight so a large batch never
+        # starves single-document requests of queue slots
+        window = int(cls._setting('PDF_RENDER_WORKERS', 2))
+        pending = []
+
+        zip_file = tempfile.TemporaryFile(suffix='.zip')
+        try:
+            with zipfile.ZipFile(zip_file, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+
+                def finish_oldest():
+                    filename, key, future = pending.pop(0)
+                    data = cls._result(future, future.executor)
+                    cls._cache_put(key, data)
+                    archive.writestr(filename, data)
+
+                for filename, kind, source, build_html in documents:
+                    key = cls.content_key(kind, source)
+                    cached = cls._cache_get(key)
+                    if cached is not None:
+                        archive.writestr(filename, cached)
+                        continue
+
+                    if len(pending) >= window:
+                        finish_oldest()
+                    pending.append((filename, key, cls.submit(build_html())))
+
+                while pending:
+                    finish_oldest()
+
+            zip_file.seek(0)
+            return zip_file
+        except Exception:
+            zip_file.close()
+            raise
+
+    @staticmethod
+    def zip_key(documents):
+        """Cache key for a ZIP of (filename, kind, source, build_html) documents"""
+        return DocumentRenderService.content_key(
+            'zip',
+            [(filename, kind, source) for filename, kind, source, _ in documents]
+        )
+
+    @classmethod
+    def cached_zip_path(cls, key):
+        """Path of the stored ZIP for key, or None if it was never stored or has been trimmed"""
+        path = os.path.join(cls._cache_dir(), f'{key}.zip')
+        if not os.path.exists(path):
+            return None
+        os.utime(path)
+        return path
+
+    @classmethod
+    def store_zip(cls, key, zip_file):
+        """Keep a ZIP from render_zip in the cache under key and return its path"""
+        cache_dir = cls._cache_dir()
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as tmp_file:
+            shutil.copyfileobj(zip_file, tmp_file)
+        path = os.path.join(cache_dir, f'{key}.zip')
+        os.replace(tmp_path, path)
+        cls._trim_cache(cache_dir)
+        return path
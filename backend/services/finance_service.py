@@ -4,12 +4,19 @@ Handles business logic for finance operations
 """
 from datetime import datetime
 from models import db, PurchaseOrder, ProductionOrder, FinanceTransaction, ShowroomProduct, SalesOrder, SalesTransaction
+from utils.change_tracking import cached_by_tables
+from utils.pagination import paginate
 import json
 import traceback
 
 
 class FinanceService:
     """Service class for finance operations"""
+
+    # API sort names accepted by the paged list endpoints
+    TRANSACTION_SORT_FIELDS = {'createdAt': FinanceTransaction.created_at}
+    PURCHASE_BILL_SORT_FIELDS = {'createdAt': PurchaseOrder.created_at}
+    SALES_BILL_SORT_FIELDS = {'createdAt': SalesOrder.created_at, 'updatedAt': SalesOrder.updated_at}
     
     @staticmethod
     def get_purchase_orders_for_approval():
@@ -20,11 +27,15 @@ class FinanceService:
         return [order.to_dict() for order in orders]
     
     @staticmethod
-    def get_approved_purchase_orders():
-        """Get all approved/processed purchase orders - only those that went through finance approval"""
-        orders = PurchaseOrder.query.filter(
-            PurchaseOrder.status.in_(['finance_approved', 'completed'])
-        ).order_by(PurchaseOrder.created_at.desc()).all()
+    def get_approved_purchase_orders(page=None):
+        """
+        Get all approved/processed purchase orders - only those that went through finance approval
+        (a Page of them when a PageRequest is given)
+        """
+        query = PurchaseOrder.query.filter(PurchaseOrder.status.in_(['finance_approved', 'completed']))
+        if page is not None:
+            return paginate(query, page, PurchaseOrder.id).map(lambda order: order.to_dict())
+        orders = query.order_by(PurchaseOrder.created_at.desc()).all()
         return [order.to_dict() for order in orders]
     
     @staticmethod
@@ -36,11 +47,12 @@ class FinanceService:
         return [order.to_dict() for order in orders]
     
     @staticmethod
-    def get_approved_sales_orders():
-        """Get all completed sales orders"""
-        orders = SalesOrder.query.filter(
-            SalesOrder.payment_status.in_(['completed', 'partial'])
-        ).order_by(SalesOrder.created_at.desc()).all()
+    def get_approved_sales_orders(page=None):
+        """Get all completed sales orders, or a Page of them when a PageRequest is given"""
+        query = SalesOrder.query.filter(SalesOrder.payment_status.in_(['completed', 'partial']))
+        if page is not None:
+            return paginate(query, page, SalesOrder.id).map(lambda order: order.to_dict())
+        orders = query.order_by(SalesOrder.created_at.desc()).all()
         return [order.to_dict() for order in orders]
     
     @staticmethod
@@ -113,6 +125,7 @@ class FinanceService:
         }
     
     @staticmethod
+    @cached_by_tables(SalesTransaction, SalesOrder, FinanceTransaction, PurchaseOrder)
     def get_dashboard_data():
         """Get financial summary for dashboard"""
         try:
@@ -190,12 +203,15 @@ class FinanceService:
             }
     
     @staticmethod
-    def get_transactions(transaction_type=None, limit=50):
-        """Get all financial transactions with filtering"""
+    def get_transactions(transaction_type=None, limit=50, page=None):
+        """Get financial transactions with filtering, as a Page when a PageRequest is given"""
         query = FinanceTransaction.query
         
         if transaction_type:
             query = query.filter_by(transaction_type=transaction_type)
+
+        if page is not None:
+            return paginate(query, page, FinanceTransaction.id).map(lambda txn: txn.to_dict())
             
         transactions = query.order_by(
             FinanceTransaction.created_at.desc()
@@ -2,17 +2,24 @@
 Gate Entry Service - Database Implementation
 Replaces Excel-based storage with MySQL database
 """
+import base64
+import io
 import json
 import logging
 from datetime import datetime, date, timedelta
+from functools import lru_cache
 from typing import Dict, List, Optional
-from sqlalchemy import and_, or_, func, desc
+from sqlalchemy import and_, or_, desc
 from sqlalchemy.exc import SQLAlchemyError
 
 from models import db
 from models.gate_entry import GateUser, GateEntryLog, GoingOutLog, GateEntrySession
 from utils.face_recognition_utils import generate_face_encoding, recognize_face_from_database, is_face_recognition_available
 from services.attendance_integration_service import AttendanceIntegrationService
+from services.gate_presence_service import gate_presence
+from services.upload_service import UploadService
+from services.job_queue_service import JobQueueService
+from utils.timezone_helpers import day_bounds
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -20,6 +27,7 @@ logger = logging.getLogger(__name__)
 
 # Constants
 COOLING_PERIOD_SECONDS = 120  # 2 minutes
+THUMBNAIL_SIZE = 160  # px, longest side of listing thumbnails
 
 
 def _check_cv2_available():
@@ -31,6 +39,40 @@ def _check_cv2_available():
         return "❌ cv2 NOT available"
 
 
+def _decode_photo(photo: str) -> tuple:
+    """Split a stored base64 photo (optionally a data: URL) into (mimetype, bytes)"""
+    mimetype = 'image/jpeg'
+    if photo.startswith('data:'):
+        header, _, photo = photo.partition(',')
+        mimetype = header[5:].split(';')[0] or mimetype
+    return mimetype, base64.b64decode(photo)
+
+
+def _store_photo(photo: str) -> Optional[str]:
+    """Copy a base64 photo into the upload store; None if it cannot be stored"""
+    if not photo:
+        return None
+    try:
+        return UploadService.store_base64(photo)
+    except Exception as e:
+        logger.warning(f"Could not store gate user photo in upload store: {e}")
+        return None
+
+
+@lru_cache(maxsize=512)
+def _photo_thumbnail(user_id: int, version: int) -> bytes:
+    """JPEG thumbnail of a user's stored photo; cached per (user, version) so the blob is only read on a miss"""
+    from PIL import Image
+    
+    photo = db.session.query(GateUser.photo).filter(GateUser.id == user_id).scalar()
+    _, data = _decode_photo(photo)
+    image = Image.open(io.BytesIO(data))
+    image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+    output = io.BytesIO()
+    image.convert('RGB').save(output, format='JPEG', quality=80)
+    return output.getvalue()
+
+
 class GateEntryServiceDB:
     """Database-based gate entry service"""
     
@@ -38,7 +80,93 @@ class GateEntryServiceDB:
         """Initialize gate entry service with attendance integration"""
         self.attendance_service = AttendanceIntegrationService()
     
-    def register_user(self, name: str, phone: str, photos: list = None, face_encoding: str = None) -> Dict:
+    def _encode_photos(self, name: str, phone: str, photos: list) -> tuple:
+        """
+        Generate face encodings for each registration photo
+
+        Returns:
+            (encodings, photos): encodings that succeeded and the photos that had content
+        """
+        encodings = []
+        face_recognition_available = is_face_recognition_available()
+        
+        logger.info(f"╔════════════════════════════════════════════════════════════════════════════════╗")
+        logger.info(f"║ FACE ENCODING REGISTRATION STARTED")
+        logger.info(f"╚════════════════════════════════════════════════════════════════════════════════╝")
+        logger.info(f"User: {name} ({phone})")
+        logger.info(f"Photos received: {photos is not None}")
+        logger.info(f"Photos type: {type(photos)}")
+        if photos:
+            logger.info(f"Number of photos: {len(photos)}")
+            for i, p in enumerate(photos):
+                if p:
+                    logger.info(f"  Photo {i+1}: size={len(str(p))} bytes, is_string={isinstance(p, str)}")
+                else:
+                    logger.info(f"  Photo {i+1}: EMPTY/NONE")
+        logger.info(f"Face recognition available: {face_recognition_available}")
+        logger.info(f"OpenCV cv2 module: {_check_cv2_available()}")
+        
+        # IMPORTANT: Check if photos exist and have content
+        if not photos:
+            logger.warning(f"⚠️  No photos provided at all for {name}")
+            # Still allow registration without encoding
+        elif not isinstance(photos, list):
+            logger.error(f"❌ Photos is not a list, it's: {type(photos)}")
+            photos = []
+        else:
+            # Validate photos have content
+            valid_photos = [p for p in photos if p and len(str(p)) > 100]  # Must have content
+            logger.info(f"Valid photos (with content): {len(valid_photos)} out of {len(photos)}")
+            
+            if not valid_photos:
+                logger.error(f"❌ No valid photos with content found for {name}")
+                photos = []
+            else:
+                photos = valid_photos
+        
+        # Generate face encodings from all photos
+        if photos and face_recognition_available:
+            logger.info(f"🔄 Starting face encoding generation for {len(photos)} photos...")
+            for idx, photo in enumerate(photos):
+                try:
+                    logger.info(f"\n--- Processing photo {idx + 1}/{len(photos)} ---")
+                    logger.info(f"Photo size: {len(str(photo))} bytes")
+                    logger.info(f"Photo type: {type(photo).__name__}")
+                    
+                    encoding_result = generate_face_encoding(photo)
+                    success = encoding_result.get('success', False)
+                    message = encoding_result.get('message', 'Unknown error')
+                    face_count = encoding_result.get('face_count', 0)
+                    
+                    logger.info(f"Result: success={success}, message='{message}', faces_detected={face_count}")
+                    
+                    if success and encoding_result.get('encoding'):
+                        # encoding_result['encoding'] is already a JSON string, so parse it first
+                        try:
+                            encoding_data = json.loads(encoding_result['encoding'])
+                            encodings.append(encoding_data)
+                            logger.info(f"✅ Successfully added encoding #{len(encodings)}")
+                            logger.info(f"Encoding data shape: {len(encoding_data)}x{len(encoding_data[0]) if encoding_data else 0}")
+                        except json.JSONDecodeError as je:
+                            logger.error(f"❌ Failed to parse JSON encoding for photo {idx + 1}: {je}")
+                            logger.error(f"Encoding string length: {len(encoding_result['encoding'])}")
+                    else:
+                        logger.warning(f"⚠️  Face encoding failed: {message}")
+                except Exception as e:
+                    logger.error(f"❌ Exception processing photo {idx + 1}: {e}", exc_info=True)
+            
+            logger.info(f"\n{'='*80}")
+            logger.info(f"Face encoding summary: {len(encodings)} faces successfully encoded out of {len(photos)} photos")
+            logger.info(f"{'='*80}\n")
+        elif not face_recognition_available:
+            logger.warning(f"⚠️  Face recognition not available - registering without encoding")
+        else:
+            logger.warning(f"⚠️  No photos to process")
+        
+        return encodings, photos
+    
+    def register_user(self, name: str, phone: str, photos: list = None, face_encoding: str = None,
+                      defer_encoding: bool = False) -> Dict:
         """
         Register a new user for gate entry system (multi-photo).
         NOTE: This is now only called from HR registration, not directly from gate entry routes.
@@ -52,81 +180,12 @@ class GateEntryServiceDB:
                     'message': 'User with this phone number already exists'
                 }
             
-            encodings = []
-            face_recognition_available = is_face_recognition_available()
-            
-            logger.info(f"╔════════════════════════════════════════════════════════════════════════════════╗")
-            logger.info(f"║ FACE ENCODING REGISTRATION STARTED")
-            logger.info(f"╚════════════════════════════════════════════════════════════════════════════════╝")
-            logger.info(f"User: {name} ({phone})")
-            logger.info(f"Photos received: {photos is not None}")
-            logger.info(f"Photos type: {type(photos)}")
-            if photos:
-                logger.info(f"Number of photos: {len(photos)}")
-                for i, p in enumerate(photos):
-                    if p:
-                        logger.info(f"  Photo {i+1}: size={len(str(p))} bytes, is_string={isinstance(p, str)}")
-                    else:
-                        logger.info(f"  Photo {i+1}: EMPTY/NONE")
-            logger.info(f"Face recognition available: {face_recognition_available}")
-            logger.info(f"OpenCV cv2 module: {_check_cv2_available()}")
-            
-            # IMPORTANT: Check if photos exist and have content
-            if not photos:
-                logger.warning(f"⚠️  No photos provided at all for {name}")
-                # Still allow registration without encoding
-            elif not isinstance(photos, list):
-                logger.error(f"❌ Photos is not a list, it's: {type(photos)}")
-                photos = []
-            else:
-                # Validate photos have content
-                valid_photos = [p for p in photos if p and len(str(p)) > 100]  # Must have content
-                logger.info(f"Valid photos (with content): {len(valid_photos)} out of {len(photos)}")
-                
-                if not valid_photos:
-                    logger.error(f"❌ No valid photos with content found for {name}")
-                    photos = []
-                else:
-                    photos = valid_photos
-            
-            # Generate face encodings from all photos
-            if photos and face_recognition_available:
-                logger.info(f"🔄 Starting face encoding generation for {len(photos)} photos...")
-                for idx, photo in enumerate(photos):
-                    try:
-                        logger.info(f"\n--- Processing photo {idx + 1}/{len(photos)} ---")
-                        logger.info(f"Photo size: {len(str(photo))} bytes")
-                        logger.info(f"Photo type: {type(photo).__name__}")
-                        
-                        encoding_result = generate_face_encoding(photo)
-                        success = encoding_result.get('success', False)
-                        message = encoding_result.get('message', 'Unknown error')
-                        face_count = encoding_result.get('face_count', 0)
-                        
-                        logger.info(f"Result: success={success}, message='{message}', faces_detected={face_count}")
-                        
-                        if success and encoding_result.get('encoding'):
-                            # encoding_result['encoding'] is already a JSON string, so parse it first
-                            try:
-                                encoding_data = json.loads(encoding_result['encoding'])
-                                encodings.append(encoding_data)
-                                logger.info(f"✅ Successfully added encoding #{len(encodings)}")
-                                logger.info(f"Encoding data shape: {len(encoding_data)}x{len(encoding_data[0]) if encoding_data else 0}")
-                            except json.JSONDecodeError as je:
-                                logger.error(f"❌ Failed to parse JSON encoding for photo {idx + 1}: {je}")
-                                logger.error(f"Encoding string length: {len(encoding_result['encoding'])}")
-                        else:
-                            logger.warning(f"⚠️  Face encoding failed: {message}")
-                    except Exception as e:
-                        logger.error(f"❌ Exception processing photo {idx + 1}: {e}", exc_info=True)
-                
-                logger.info(f"\n{'='*80}")
-                logger.info(f"Face encoding summary: {len(encodings)} faces successfully encoded out of {len(photos)} photos")
-                logger.info(f"{'='*80}\n")
-            elif not face_recognition_available:
-                logger.warning(f"⚠️  Face recognition not available - registering without encoding")
+            if defer_encoding and photos:
+                # Encoding is CPU-heavy: store the photos and let a background job do it
+                encodings = []
+                photos = [p for p in photos if p and len(str(p)) > 100] if isinstance(photos, list) else []
             else:
-                logger.warning(f"⚠️  No photos to process")
+                encodings, photos = self._encode_photos(name, phone, photos)
             
             # Store all encodings as JSON array (proper encoding, not double-encoded)
             face_encoding_stored = json.dumps(encodings) if encodings else None
@@ -140,24 +199,41 @@ class GateEntryServiceDB:
                 name=name,
                 phone=phone,
                 photo=photo,
+                photo_key=_store_photo(photo),
                 face_encoding=face_encoding_stored,
                 status='active'
             )
             db.session.add(new_user)
             db.session.commit()
             
+            encoding_job = None
+            if defer_encoding and photos:
+                photo_keys = [new_user.photo_key] + [_store_photo(p) for p in photos[1:]]
+                photo_keys = [key for key in photo_keys if key]
+                if photo_keys:
+                    encoding_job = JobQueueService.enqueue(
+                        'gate_user_face_encoding',
+                        {'user_id': new_user.id, 'photo_keys': photo_keys},
+                        idempotency_key=f"gate-face-encoding:{new_user.id}"
+                    )
+            
             has_face_encoding = bool(encodings) and len(encodings) > 0
             logger.info(f"✅ User registered: {name} ({phone})")
             logger.info(f"   Face encodings: {len(encodings)}")
             logger.info(f"   Has face encoding: {has_face_encoding}")
             
+            if encoding_job:
+                message = f'User {name} registered successfully (face encoding queued)'
+            else:
+                message = f'User {name} registered successfully' + (f' with {len(encodings)} face images' if has_face_encoding else ' (no face encoding)')
             return {
                 'success': True,
-                'message': f'User {name} registered successfully' + (f' with {len(encodings)} face images' if has_face_encoding else ' (no face encoding)'),
+                'message': message,
                 'user_id': new_user.id,
                 'user': new_user.to_dict(),
                 'has_face_encoding': has_face_encoding,
-                'face_encodings_count': len(encodings)
+                'face_encodings_count': len(encodings),
+                'face_encoding_job_id': encoding_job['id'] if encoding_job else None
             }
             
         except SQLAlchemyError as e:
@@ -175,21 +251,115 @@ class GateEntryServiceDB:
                 'message': f'Error registering user: {str(e)}'
             }
     
-    def get_users(self, status: str = None) -> List[Dict]:
-        """Get all registered users"""
+    def encode_user_faces(self, user_id: int, photo_keys: list) -> Dict:
+        """
+        Generate and store face encodings for a registered user from photos in
+        the upload store (the 'gate_user_face_encoding' background job)
+        """
+        user = GateUser.query.get(user_id)
+        if not user:
+            return {'encodings': 0, 'message': 'User no longer exists'}
+        
+        photos = []
+        for key in photo_keys:
+            path, mimetype, _ = UploadService.open(key)
+            with open(path, 'rb') as photo_file:
+                photos.append(f"data:{mimetype};base64," + base64.b64encode(photo_file.read()).decode('ascii'))
+        
+        encodings, _ = self._encode_photos(user.name, user.phone, photos)
+        if not encodings:
+            # Not retried: the photos themselves had no usable face
+            return {'encodings': 0, 'message': 'No face could be encoded from the photos'}
+        
+        user.face_encoding = json.dumps(encodings)
+        if user.phone:
+            # Keep the HR employee record in step, as HRService.create_employee does
+            from models.hr import Employee
+            Employee.query.filter_by(phone=user.phone).update(
+                {Employee.face_encoding: user.face_encoding}, synchronize_session=False
+            )
+        db.session.commit()
+        logger.info(f"✅ Stored {len(encodings)} face encodings for gate user {user_id}")
+        return {'encodings': len(encodings)}
+    
+    def get_users(self, status: str = None, detail: bool = False) -> List[Dict]:
+        """
+        Get all registered users
+        By default only list columns are selected (no photo or face_encoding
+        blobs) and each user carries a thumbnail URL; detail=True returns the
+        full to_dict() form including the base64 photo.
+        """
         try:
-            query = GateUser.query
-            
+            if detail:
+                query = GateUser.query
+                if status:
+                    query = query.filter_by(status=status)
+                users = query.order_by(GateUser.name).all()
+                return [user.to_dict() for user in users]
+            
+            query = db.session.query(
+                GateUser.id,
+                GateUser.name,
+                GateUser.phone,
+                GateUser.status,
+                GateUser.has_face_encoding,
+                GateUser.photo.isnot(None).label('has_photo'),
+                GateUser.photo_key,
+                GateUser.registered_at,
+                GateUser.last_entry,
+                GateUser.last_exit,
+                GateUser.created_at,
+                GateUser.updated_at
+            )
             if status:
-                query = query.filter_by(status=status)
-            
-            users = query.order_by(GateUser.name).all()
-            return [user.to_dict() for user in users]
+                query = query.filter(GateUser.status == status)
+            
+            return [
+                {
+                    'id': row.id,
+                    'name': row.name,
+                    'phone': row.phone,
+                    'status': row.status,
+                    'hasFaceEncoding': bool(row.has_face_encoding),
+                    'hasPhoto': bool(row.has_photo),
+                    'thumbnailUrl': (
+                        UploadService.url(row.photo_key, 'sm') if row.photo_key
+                        else GateUser.photo_url(row.id, row.updated_at) if row.has_photo
+                        else None
+                    ),
+                    'registeredAt': row.registered_at.isoformat() if row.registered_at else None,
+                    'lastEntry': row.last_entry.isoformat() if row.last_entry else None,
+                    'lastExit': row.last_exit.isoformat() if row.last_exit else None,
+                    'createdAt': row.created_at.isoformat() if row.created_at else None,
+                    'updatedAt': row.updated_at.isoformat() if row.updated_at else None
+                }
+                for row in query.order_by(GateUser.name)
+            ]
             
         except Exception as e:
             logger.error(f"Error getting users: {e}")
             return []
     
+    def get_user_photo(self, user_id: int, thumbnail: bool = True) -> Optional[tuple]:
+        """
+        Get a user's stored photo as image bytes
+        Returns: (data, mimetype, version) or None when the user has no photo
+        """
+        row = db.session.query(
+            GateUser.updated_at,
+            GateUser.photo.isnot(None).label('has_photo')
+        ).filter(GateUser.id == user_id).first()
+        if not row or not row.has_photo:
+            return None
+        
+        version = int(row.updated_at.timestamp()) if row.updated_at else 0
+        if thumbnail:
+            return _photo_thumbnail(user_id, version), 'image/jpeg', version
+        
+        photo = db.session.query(GateUser.photo).filter(GateUser.id == user_id).scalar()
+        mimetype, data = _decode_photo(photo)
+        return data, mimetype, version
+    
     def get_user_by_phone(self, phone: str) -> Optional[GateUser]:
         """Get user by phone number"""
         try:
@@ -221,6 +391,8 @@ class GateEntryServiceDB:
             for field in allowed_fields:
                 if field in kwargs:
                     setattr(user, field, kwargs[field])
+            if 'photo' in kwargs:
+                user.photo_key = _store_photo(kwargs['photo'])
             
             db.session.commit()
             
@@ -262,8 +434,10 @@ class GateEntryServiceDB:
             GateEntryLog.query.filter_by(user_id=user.id).delete()
             
             # Now delete the user
+            user_id = user.id
             db.session.delete(user)
             db.session.commit()
+            gate_presence.forget_user(user_id)
             
             logger.info(f"User deleted: {phone}")
             return {
@@ -286,35 +460,48 @@ class GateEntryServiceDB:
                 'message': f'Error deleting user: {str(e)}'
             }
     
+    @staticmethod
+    def _status_from_session(status, exit_time, last_action_time) -> tuple:
+        """Map a day's session state to (status, has_exited_today, last_action_time)"""
+        if status == 'inside':
+            return "INSIDE", exit_time is not None, last_action_time
+        if status == 'exited':
+            return "EXITED_TODAY", True, last_action_time
+        return "OUTSIDE", False, last_action_time
+    
+    def _get_today_session(self, user_id: int, today: date) -> Optional[GateEntrySession]:
+        """Today's session row for a user (authoritative, used before writes)"""
+        return GateEntrySession.query.filter(
+            and_(
+                GateEntrySession.user_id == user_id,
+                GateEntrySession.date == today
+            )
+        ).first()
+    
+    def _find_open_going_out(self, user_id: int) -> Optional[GoingOutLog]:
+        """Latest open going out log for a user today (authoritative, used before writes)"""
+        day_start, day_end = day_bounds(date.today())
+        return GoingOutLog.query.filter(
+            and_(
+                GoingOutLog.user_id == user_id,
+                GoingOutLog.status == 'out',
+                GoingOutLog.going_out_time >= day_start,
+                GoingOutLog.going_out_time < day_end
+            )
+        ).order_by(desc(GoingOutLog.going_out_time)).first()
+    
     def get_user_status_and_history(self, user: GateUser) -> tuple:
         """
         Check user status and return (status, has_exited_today, last_action_time)
         Status can be: INSIDE, OUTSIDE, EXITED_TODAY
+        Answered from the presence registry without a database query
         """
         try:
-            today = date.today()
-            
-            # Get today's session
-            session = GateEntrySession.query.filter(
-                and_(
-                    GateEntrySession.user_id == user.id,
-                    GateEntrySession.date == today
-                )
-            ).first()
-            
+            session = gate_presence.get_session(user.id)
             if not session:
                 return "OUTSIDE", False, None
+            return self._status_from_session(session['status'], session['exit_time'], session['last_action_time'])
             
-            last_action_time = session.last_action_time
-            
-            if session.status == 'inside':
-                has_exited = session.exit_time is not None
-                return "INSIDE", has_exited, last_action_time
-            elif session.status == 'exited':
-                return "EXITED_TODAY", True, last_action_time
-            else:
-                return "OUTSIDE", False, last_action_time
-                
         except Exception as e:
             logger.error(f"Error getting user status: {e}")
             return "OUTSIDE", False, None
@@ -324,21 +511,12 @@ class GateEntryServiceDB:
         Check if user is currently out for work/personal reasons
         Returns: (status, reason_type, going_out_time)
         Status can be: OUT, IN_OFFICE
+        Answered from the presence registry without a database query
         """
         try:
-            today = date.today()
-            
-            # Find open going out entry for today
-            going_out = GoingOutLog.query.filter(
-                and_(
-                    GoingOutLog.user_id == user.id,
-                    GoingOutLog.status == 'out',
-                    func.date(GoingOutLog.going_out_time) == today
-                )
-            ).order_by(desc(GoingOutLog.going_out_time)).first()
-            
+            going_out = gate_presence.get_going_out(user.id)
             if going_out:
-                return "OUT", going_out.reason_type, going_out.going_out_time
+                return "OUT", going_out['reason_type'], going_out['going_out_time']
             
             return "IN_OFFICE", None, None
             
@@ -368,7 +546,14 @@ class GateEntryServiceDB:
             now = datetime.now()
             today = now.date()
             
-            user_status, has_exited_today, last_action_time = self.get_user_status_and_history(user)
+            # Read the session row once: it decides the checks below and is updated afterwards
+            session = self._get_today_session(user.id, today)
+            if session:
+                user_status, has_exited_today, last_action_time = self._status_from_session(
+                    session.status, session.exit_time, session.last_action_time
+                )
+            else:
+                user_status, has_exited_today, last_action_time = "OUTSIDE", False, None
             
             # Check cooling period
             if not override_cooling and last_action_time:
@@ -400,13 +585,6 @@ class GateEntryServiceDB:
                 }
             
             # Create or update session
-            session = GateEntrySession.query.filter(
-                and_(
-                    GateEntrySession.user_id == user.id,
-                    GateEntrySession.date == today
-                )
-            ).first()
-            
             if not session:
                 session = GateEntrySession(
                     user_id=user.id,
@@ -442,6 +620,7 @@ class GateEntryServiceDB:
             user.last_entry = now
             
             db.session.commit()
+            gate_presence.record_session(session)
             
             logger.info(f"Manual entry recorded for {user.name}")
             
@@ -492,8 +671,14 @@ class GateEntryServiceDB:
             now = datetime.now()
             today = now.date()
             
-            # Check user status
-            user_status, has_exited_today, last_action_time = self.get_user_status_and_history(user)
+            # Read the session row once: it decides the checks below and is updated afterwards
+            session = self._get_today_session(user.id, today)
+            if session:
+                user_status, has_exited_today, last_action_time = self._status_from_session(
+                    session.status, session.exit_time, session.last_action_time
+                )
+            else:
+                user_status, has_exited_today, last_action_time = "OUTSIDE", False, None
             
             # Check cooling period
             if not override_cooling and last_action_time:
@@ -525,13 +710,6 @@ class GateEntryServiceDB:
                 }
             
             # Update session
-            session = GateEntrySession.query.filter(
-                and_(
-                    GateEntrySession.user_id == user.id,
-                    GateEntrySession.date == today
-                )
-            ).first()
-            
             if session:
                 session.exit_time = now
                 session.status = 'exited'
@@ -568,6 +746,7 @@ class GateEntryServiceDB:
             user.last_exit = now
             
             db.session.commit()
+            gate_presence.record_session(session)
             
             logger.info(f"Manual exit recorded for {user.name}")
             
@@ -617,11 +796,11 @@ class GateEntryServiceDB:
                 }
             
             # Check if user is already out
-            going_out_status, current_reason, _ = self.get_going_out_status(user)
-            if going_out_status == "OUT":
+            open_log = self._find_open_going_out(user.id)
+            if open_log:
                 return {
                     'success': False,
-                    'message': f'User is already out for {current_reason}'
+                    'message': f'User is already out for {open_log.reason_type}'
                 }
             
             now = datetime.now()
@@ -638,6 +817,7 @@ class GateEntryServiceDB:
             )
             db.session.add(going_out_log)
             db.session.commit()
+            gate_presence.record_going_out(going_out_log)
             
             logger.info(f"Going out recorded for {user.name} - {reason_type}")
             return {
@@ -674,31 +854,15 @@ class GateEntryServiceDB:
                     'message': 'User not found. Please register first.'
                 }
             
-            # Check if user is out
-            going_out_status, current_reason, going_out_time = self.get_going_out_status(user)
-            if going_out_status != "OUT":
+            # Find the open going out log
+            going_out_log = self._find_open_going_out(user.id)
+            if not going_out_log:
                 return {
                     'success': False,
                     'message': 'User is not currently out'
                 }
             
             now = datetime.now()
-            today = date.today()
-            
-            # Find the open going out log
-            going_out_log = GoingOutLog.query.filter(
-                and_(
-                    GoingOutLog.user_id == user.id,
-                    GoingOutLog.status == 'out',
-                    func.date(GoingOutLog.going_out_time) == today
-                )
-            ).order_by(desc(GoingOutLog.going_out_time)).first()
-            
-            if not going_out_log:
-                return {
-                    'success': False,
-                    'message': 'No going out record found'
-                }
             
             # Update going out log
             going_out_log.coming_back_time = now
@@ -709,6 +873,7 @@ class GateEntryServiceDB:
             going_out_log.duration_minutes = round(duration, 1)
             
             db.session.commit()
+            gate_presence.record_coming_back(user.id)
             
             logger.info(f"Coming back recorded for {user.name}")
             return {
@@ -740,7 +905,8 @@ class GateEntryServiceDB:
             query = GateEntryLog.query
             
             if date_filter:
-                query = query.filter(func.date(GateEntryLog.timestamp) == date_filter)
+                day_start, day_end = day_bounds(date_filter)
+                query = query.filter(GateEntryLog.timestamp >= day_start, GateEntryLog.timestamp < day_end)
             
             logs = query.order_by(desc(GateEntryLog.timestamp)).limit(limit).all()
             return [log.to_dict() for log in logs]
@@ -755,7 +921,8 @@ class GateEntryServiceDB:
             query = GoingOutLog.query
             
             if date_filter:
-                query = query.filter(func.date(GoingOutLog.going_out_time) == date_filter)
+                day_start, day_end = day_bounds(date_filter)
+                query = query.filter(GoingOutLog.going_out_time >= day_start, GoingOutLog.going_out_time < day_end)
             
             if status:
                 query = query.filter_by(status=status)
@@ -767,34 +934,66 @@ class GateEntryServiceDB:
             logger.error(f"Error getting going out logs: {e}")
             return []
     
-    def get_today_logs(self) -> Dict:
-        """Get summary of today's gate activities"""
+    def iter_gate_log_rows(self, date_filter: date = None, batch_size: int = 500):
+        """Yield gate log rows (newest first) for export, fetched in batches"""
+        query = db.session.query(
+            GateEntryLog.user_name,
+            GateEntryLog.user_phone,
+            GateEntryLog.action,
+            GateEntryLog.method,
+            GateEntryLog.status,
+            GateEntryLog.timestamp,
+            GateEntryLog.entry_time,
+            GateEntryLog.exit_time,
+            GateEntryLog.details
+        )
+        
+        if date_filter:
+            day_start, day_end = day_bounds(date_filter)
+            query = query.filter(GateEntryLog.timestamp >= day_start, GateEntryLog.timestamp < day_end)
+        
+        return query.order_by(desc(GateEntryLog.timestamp)).yield_per(batch_size)
+    
+    def iter_going_out_log_rows(self, date_filter: date = None, batch_size: int = 500):
+        """Yield going out log rows (newest first) for export, fetched in batches"""
+        query = db.session.query(
+            GoingOutLog.user_name,
+            GoingOutLog.user_phone,
+            GoingOutLog.reason_type,
+            GoingOutLog.reason_details,
+            GoingOutLog.going_out_time,
+            GoingOutLog.coming_back_time,
+            GoingOutLog.duration_minutes,
+            GoingOutLog.status
+        )
+        
+        if date_filter:
+            day_start, day_end = day_bounds(date_filter)
+            query = query.filter(GoingOutLog.going_out_time >= day_start, GoingOutLog.going_out_time < day_end)
+        
+        return query.order_by(desc(GoingOutLog.going_out_time)).yield_per(batch_size)
+    
+    def get_today_logs(self, include_records: bool = True) -> Dict:
+        """
+        Get summary of today's gate activities
+        Counters come from the presence registry; include_records=False skips
+        loading today's session and going out rows
+        """
         try:
-            today = date.today()
-            
-            # Get today's sessions
-            sessions = GateEntrySession.query.filter_by(date=today).all()
+            summary = gate_presence.counts()
             
-            total_entries = sum(1 for s in sessions if s.entry_time)
-            total_exits = sum(1 for s in sessions if s.exit_time)
-            currently_inside = sum(1 for s in sessions if s.status == 'inside')
+            if include_records:
+                today = date.today()
+                day_start, day_end = day_bounds(today)
+                sessions = GateEntrySession.query.filter_by(date=today).all()
+                going_out_logs = GoingOutLog.query.filter(
+                    GoingOutLog.going_out_time >= day_start,
+                    GoingOutLog.going_out_time < day_end
+                ).all()
+                summary['sessions'] = [s.to_dict() for s in sessions]
+                summary['going_out_logs'] = [log.to_dict() for log in going_out_logs]
             
-            # Get going out logs
-            going_out_logs = GoingOutLog.query.filter(
-                func.date(GoingOutLog.going_out_time) == today
-            ).all()
-            
-            currently_out = sum(1 for log in going_out_logs if log.status == 'out')
-            
-            return {
-                'date': today.isoformat(),
-                'total_entries': total_entries,
-                'total_exits': total_exits,
-                'currently_inside': currently_inside,
-                'currently_out': currently_out,
-                'sessions': [s.to_dict() for s in sessions],
-                'going_out_logs': [log.to_dict() for log in going_out_logs]
-            }
+            return summary
             
         except Exception as e:
             logger.error(f"Error getting today's logs: {e}")
@@ -808,6 +1007,22 @@ class GateEntryServiceDB:
                 'going_out_logs': []
             }
     
+    def get_presence(self) -> Dict:
+        """Who is inside / out right now plus today's counters"""
+        try:
+            return gate_presence.snapshot()
+        except Exception as e:
+            logger.error(f"Error getting presence: {e}")
+            return {
+                'date': date.today().isoformat(),
+                'total_entries': 0,
+                'total_exits': 0,
+                'currently_inside': 0,
+                'currently_out': 0,
+                'inside': [],
+                'out': []
+            }
+    
     def get_user_history(self, user_phone: str, days: int = 30) -> Dict:
         """Get user's gate entry history"""
         try:
@@ -861,4 +1076,8 @@ class GateEntryServiceDB:
 
 
 # Create singleton instance
-gate_entry_service_db = GateEntryServiceDB()
\ No newline at end of file
+gate_entry_service_db = GateEntryServiceDB()
+
+def encode_user_faces_job(payload):
+    """Background job handler for 'gate_user_face_encoding'"""
+    return gate_entry_service_db.encode_user_faces(payload['user_id'], payload['photo_keys'])
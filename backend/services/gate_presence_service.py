@@ -0,0 +1,375 @@
+"""
+Gate Presence Registry
+In-memory view of who is inside / out today, so status checks and the
+guard tablet / reception counters do not hit the database on every poll.
+
+The database stays the source of truth: the registry is rebuilt from
+today's GateEntrySession and open GoingOutLog rows on first use, at the
+start of each day and every GATE_PRESENCE_RESYNC_SECONDS, and is updated
+by GateEntryServiceDB after each committed gate action. When
+GATE_PRESENCE_REDIS_URL is set, updates are also published over Redis
+pub/sub so every worker process applies them. Without it, reads compare the
+two tables' change versions (utils/change_tracking.py) with those seen at
+the last load and rebuild when another worker has written since.
+"""
+import json
+import logging
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from flask import current_app
+from sqlalchemy import func
+
+from models import db
+from models.gate_entry import GateEntrySession, GoingOutLog
+from utils.change_tracking import get_cache_versions
+from utils.timezone_helpers import day_bounds
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'gate-presence'
+TRACKED_TABLES = (GateEntrySession.__tablename__, GoingOutLog.__tablename__)
+SESSION_FIELDS = ('user_name', 'user_phone', 'status', 'entry_time', 'exit_time', 'last_action_time')
+OUT_FIELDS = ('user_name', 'user_phone', 'reason_type', 'going_out_time')
+
+
+def _encode(record):
+    if record is None:
+        return None
+    return {key: value.isoformat() if isinstance(value, datetime) else value for key, value in record.items()}
+
+
+def _decode(record):
+    if record is None:
+        return None
+    decoded = dict(record)
+    for key in ('entry_time', 'exit_time', 'last_action_time', 'going_out_time'):
+        if decoded.get(key):
+            decoded[key] = datetime.fromisoformat(decoded[key])
+    return decoded
+
+
+def _session_counts(record):
+    """(entries, exits, inside) contribution of one user's session to today's counters"""
+    if record is None:
+        return 0, 0, 0
+    return (
+        1 if record['entry_time'] else 0,
+        1 if record['exit_time'] else 0,
+        1 if record['status'] == 'inside' else 0
+    )
+
+
+class GatePresenceRegistry:
+    """Per-process presence state for the current day"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._rebuild_lock = threading.Lock()
+        self._origin = uuid.uuid4().hex  # Identifies this process's own pub/sub messages
+        self._day = None
+        self._loaded_at = 0.0
+        self._versions = None  # Change versions of TRACKED_TABLES when last loaded
+        self._pending = None  # Updates received while a rebuild reads the database
+        self._sessions = {}  # user_id -> session record
+        self._out = {}  # user_id -> open going-out record
+        self._total_entries = 0
+        self._total_exits = 0
+        self._currently_inside = 0
+        self._redis = None
+        self._subscriber = None
+
+    @staticmethod
+    def _setting(name, default):
+        try:
+            return current_app.config.get(name, default)
+        except RuntimeError:
+            return default
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def rebuild(self):
+        """Reload today's presence from the database"""
+        with self._rebuild_lock:
+            with self._lock:
+                self._pending = []
+            try:
+                sessions, out, versions = self._load()
+            except Exception:
+                with self._lock:
+                    self._pending = None
+                raise
+
+            with self._lock:
+                self._day = date.today()
+                self._loaded_at = time.monotonic()
+                self._versions = versions
+                self._sessions = sessions
+                self._out = out
+                self._total_entries = sum(1 for record in sessions.values() if record['entry_time'])
+                self._total_exits = sum(1 for record in sessions.values() if record['exit_time'])
+                self._currently_inside = sum(1 for record in sessions.values() if record['status'] == 'inside')
+                # Updates committed while we were reading may be missing from the rows; replay them in order
+                for kind, user_id, record in self._pending:
+                    self._apply(kind, user_id, record)
+                self._pending = None
+
+        self._start_subscriber()
+        logger.info(f"Gate presence loaded: {len(sessions)} sessions, {len(out)} out")
+
+    def _load(self):
+        """Read today's sessions and open going-out records, plus the versions they reflect"""
+        today = date.today()
+        day_start, day_end = day_bounds(today)
+
+        # Versions first: a write landing after this read is caught by the next check
+        versions = self._read_versions()
+
+        session_rows = db.session.query(
+            GateEntrySession.user_id,
+            GateEntrySession.user_name,
+            GateEntrySession.user_phone,
+            GateEntrySession.status,
+            GateEntrySession.entry_time,
+            GateEntrySession.exit_time,
+            GateEntrySession.last_action_time
+        ).filter(GateEntrySession.date == today).all()
+
+        # Latest open going-out log per user today
+        latest_out = db.session.query(
+            GoingOutLog.user_id,
+            func.max(GoingOutLog.id).label('log_id')
+        ).filter(
+            GoingOutLog.status == 'out',
+            GoingOutLog.going_out_time >= day_start,
+            GoingOutLog.going_out_time < day_end
+        ).group_by(GoingOutLog.user_id).subquery()
+
+        out_rows = db.session.query(
+            GoingOutLog.user_id,
+            GoingOutLog.user_name,
+            GoingOutLog.user_phone,
+            GoingOutLog.reason_type,
+            GoingOutLog.going_out_time
+        ).join(latest_out, GoingOutLog.id == latest_out.c.log_id).all()
+
+        sessions = {row.user_id: {field: getattr(row, field) for field in SESSION_FIELDS} for row in session_rows}
+        out = {row.user_id: {field: getattr(row, field) for field in OUT_FIELDS} for row in out_rows}
+        return sessions, out, versions
+
+    @staticmethod
+    def _read_versions():
+        try:
+            return get_cache_versions(TRACKED_TABLES)
+        except Exception as e:
+            logger.warning(f"Gate presence change versions unavailable: {e}")
+            return None
+
+    def _ensure_current(self):
+        resync_seconds = float(self._setting('GATE_PRESENCE_RESYNC_SECONDS', 300))
+        with self._lock:
+            fresh = (
+                self._day == date.today()
+                and time.monotonic() - self._loaded_at < resync_seconds
+            )
+            synced = self._subscriber is not None
+            loaded_versions = self._versions
+        if fresh and not synced:
+            # No pub/sub: other workers' gate actions only show up as new table versions
+            fresh = loaded_versions is not None and self._read_versions() == loaded_versions
+        if not fresh:
+            self.rebuild()
+
+    def invalidate(self):
+        """Force a reload from the database on next access"""
+        with self._lock:
+            self._day = None
+
+    # ------------------------------------------------------------------
+    # Queries (O(1) after load)
+    # ------------------------------------------------------------------
+
+    def get_session(self, user_id):
+        """Today's session record for a user, or None"""
+        self._ensure_current()
+        with self._lock:
+            record = self._sessions.get(user_id)
+            return dict(record) if record else None
+
+    def get_going_out(self, user_id):
+        """Open going-out record for a user today, or None"""
+        self._ensure_current()
+        with self._lock:
+            record = self._out.get(user_id)
+            return dict(record) if record else None
+
+    def counts(self):
+        """Today's counters"""
+        self._ensure_current()
+        with self._lock:
+            return {
+                'date': self._day.isoformat(),
+                'total_entries': self._total_entries,
+                'total_exits': self._total_exits,
+                'currently_inside': self._currently_inside,
+                'currently_out': len(self._out)
+            }
+
+    def snapshot(self):
+        """Counters plus who is inside and who is out right now"""
+        self._ensure_current()
+        with self._lock:
+            inside = [
+                {
+                    'userId': user_id,
+                    'userName': record['user_name'],
+                    'userPhone': record['user_phone'],
+                    'entryTime': record['entry_time'].isoformat() if record['entry_time'] else None
+                }
+                for user_id, record in self._sessions.items() if record['status'] == 'inside'
+            ]
+            out = [
+                {
+                    'userId': user_id,
+                    'userName': record['user_name'],
+                    'userPhone': record['user_phone'],
+                    'reasonType': record['reason_type'],
+                    'goingOutTime': record['going_out_time'].isoformat() if record['going_out_time'] else None
+                }
+                for user_id, record in self._out.items()
+            ]
+        summary = self.counts()
+        summary['inside'] = sorted(inside, key=lambda item: item['userName'] or '')
+        summary['out'] = sorted(out, key=lambda item: item['userName'] or '')
+        return summary
+
+    # ------------------------------------------------------------------
+    # Updates (call after the database commit)
+    # ------------------------------------------------------------------
+
+    def _apply_session(self, user_id, record):
+        old = _session_counts(self._sessions.get(user_id))
+        new = _session_counts(record)
+        if record is None:
+            self._sessions.pop(user_id, None)
+        else:
+            self._sessions[user_id] = record
+        self._total_entries += new[0] - old[0]
+        self._total_exits += new[1] - old[1]
+        self._currently_inside += new[2] - old[2]
+
+    def _apply_out(self, user_id, record):
+        if record is None:
+            self._out.pop(user_id, None)
+        else:
+            self._out[user_id] = record
+
+    def _apply(self, kind, user_id, record):
+        with self._lock:
+            if kind == 'session':
+                self._apply_session(user_id, record)
+            elif kind == 'out':
+                self._apply_out(user_id, record)
+            elif kind == 'forget':
+                self._apply_session(user_id, None)
+                self._apply_out(user_id, None)
+
+    def _receive(self, kind, user_id, record, day):
+        """Apply an update for the given day, or keep it for the rebuild in progress"""
+        with self._lock:
+            if self._pending is not None and day == date.today():
+                self._pending.append((kind, user_id, record))
+            if self._day is None or day != self._day:
+                # Not loaded yet (or a new day): the next read rebuilds from the DB
+                self._day = None
+                return
+            self._apply(kind, user_id, record)
+
+    def _update(self, kind, user_id, record=None):
+        self._receive(kind, user_id, record, date.today())
+        self._publish(kind, user_id, record)
+
+    def record_session(self, session):
+        """Apply a committed GateEntrySession change"""
+        if session.date != date.today():
+            return
+        self._update('session', session.user_id, {field: getattr(session, field) for field in SESSION_FIELDS})
+
+    def record_going_out(self, going_out_log):
+        """Apply a committed GoingOutLog with status 'out'"""
+        self._update('out', going_out_log.user_id, {field: getattr(going_out_log, field) for field in OUT_FIELDS})
+
+    def record_coming_back(self, user_id):
+        """Apply a committed return from going out"""
+        self._update('out', user_id, None)
+
+    def forget_user(self, user_id):
+        """Drop a deleted user"""
+        self._update('forget', user_id)
+
+    # ------------------------------------------------------------------
+    # Cross-process sync
+    # ------------------------------------------------------------------
+
+    def _get_redis(self):
+        url = self._setting('GATE_PRESENCE_REDIS_URL', None)
+        if not url:
+            return None
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(url)
+        return self._redis
+
+    def _publish(self, kind, user_id, record):
+        try:
+            client = self._get_redis()
+            if client is None:
+                return
+            client.publish(CHANNEL, json.dumps({
+                'origin': self._origin,
+                'day': date.today().isoformat(),
+                'kind': kind,
+                'userId': user_id,
+                'record': _encode(record)
+            }))
+        except Exception as e:
+            logger.warning(f"Gate presence publish failed: {e}")
+
+    def _handle_message(self, message):
+        payload = json.loads(message['data'])
+        if payload['origin'] == self._origin:
+            return
+        self._receive(payload['kind'], payload['userId'], _decode(payload['record']), date.fromisoformat(payload['day']))
+
+    def _listen(self, client):
+        while True:
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CHANNEL)
+                for message in pubsub.listen():
+                    self._handle_message(message)
+            except Exception as e:
+                logger.warning(f"Gate presence subscriber error, reloading from database: {e}")
+                self.invalidate()  # Messages may have been missed
+                time.sleep(5)
+
+    def _start_subscriber(self):
+        with self._lock:
+            if self._subscriber is not None:
+                return
+            try:
+                client = self._get_redis()
+            except Exception as e:
+                logger.warning(f"Gate presence Redis unavailable: {e}")
+                return
+            if client is None:
+                return
+            self._subscriber = threading.Thread(target=self._listen, args=(client,), name='gate-presence-sync', daemon=True)
+            self._subscriber.start()
+
+
+# Create singleton instance
+gate_presence = GatePresenceRegistry()
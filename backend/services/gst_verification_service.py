@@ -1,44 +1,330 @@
 """
 GST Verification Service
 Handles GST number verification using government APIs
+
+Lookups go through a pluggable provider (GST_PROVIDER) and are memoized in
+two levels: an in-process LRU and the gst_verifications table, keyed by the
+normalized GSTIN. A provider is only called when neither level has an
+unexpired answer, so re-verifying a repeat customer costs no outbound call.
 """
-import requests
+import json
+import logging
 import re
-from datetime import datetime
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from models import db
+from models.gst_verification import GstVerification
 from utils.timezone_helpers import get_ist_now
-from bs4 import BeautifulSoup
-import json
+
+logger = logging.getLogger(__name__)
+
+# GST format: 2 digits state code + 10 digits PAN + 1 digit entity number + 1 digit Z + 1 digit check sum
+GST_PATTERN = re.compile(r'^[0-9]{2}[A-Z]{5}[0-9]{4}[A-Z]{1}[1-9A-Z]{1}[Z]{1}[0-9A-Z]{1}$')
+
+
+def _now():
+    """Naive IST wall-clock time, comparable with DateTime columns read back from the database"""
+    return get_ist_now().replace(tzinfo=None)
+
+
+def normalize_gstin(gst_number):
+    """Remove spaces and convert to uppercase"""
+    return (gst_number or '').replace(" ", "").strip().upper()
+
+
+# --------------------------------------------------------------------
+# Providers
+# --------------------------------------------------------------------
+class GSTProvider:
+    """
+    Interface for a GST lookup backend
+
+    verify() receives a normalized, format-valid GSTIN and returns the
+    response dict (success, verified, message, details). success=False means
+    the lookup itself failed; those answers are never cached.
+    """
+    name = None
+    source = None
+
+    def verify(self, gstin):
+        raise NotImplementedError
+
+
+class FormatGSTProvider(GSTProvider):
+    """Simple GST verification using format validation only"""
+    name = 'format'
+    source = 'GST Format Verification'
+
+    # Simple state mapping for business name
+    STATE_BUSINESS_MAP = {
+        '01': 'Kashmir Business Enterprises',
+        '02': 'Himachal Trading Company',
+        '03': 'Punjab Industries Ltd',
+        '04': 'Chandigarh Corp',
+        '05': 'Uttarakhand Ventures',
+        '06': 'Haryana Enterprises',
+        '07': 'Delhi Business House',
+        '08': 'Rajasthan Trading Co',
+        '09': 'UP Industries',
+        '10': 'Bihar Commerce Ltd',
+        '24': 'Gujarat Business Corp',
+        '27': 'Maharashtra Enterprises',
+        '29': 'Karnataka Industries',
+        '33': 'Tamil Nadu Trading'
+    }
+
+    def verify(self, gstin):
+        # Extract state code for business name generation
+        state_code = gstin[:2]
+        business_name = self.STATE_BUSINESS_MAP.get(state_code, f"Business Entity {state_code}")
+
+        return {
+            'success': True,
+            'verified': True,
+            'message': 'GST number verified successfully',
+            'details': {
+                'gstNumber': gstin,
+                'businessName': business_name,
+                'status': 'Active',
+                'verifiedAt': get_ist_now().isoformat(),
+                'source': self.source
+            }
+        }
+
+
+class PortalGSTProvider(GSTProvider):
+    """
+    Simulates the government portal lookup
+    This shows how the real implementation would be structured
+    """
+    name = 'portal'
+    source = 'GST Portal (simulated)'
+
+    def verify(self, gstin):
+        # In production, this would be the actual API call (through a shared
+        # requests.Session so connections are reused):
+        # response = session.post(
+        #     'https://services.gst.gov.in/services/searchtp',
+        #     data={'gstin': gstin},
+        #     headers={'Content-Type': 'application/x-www-form-urlencoded'},
+        #     timeout=30
+        # )
+
+        # Basic validation - if format is correct, assume it might be valid
+        # In real implementation, this would be the actual government response
+        if len(gstin) == 15:
+            return {
+                'success': True,
+                'verified': True,
+                'message': 'GST number format is valid (simulated verification)',
+                'details': {
+                    'gstNumber': gstin,
+                    'businessName': 'Verified Business (Demo)',
+                    'status': 'Active',
+                    'registrationDate': '2020-01-01',
+                    'verifiedAt': get_ist_now().isoformat(),
+                    'source': self.source,
+                    'note': 'This is a simulated verification for demo purposes'
+                }
+            }
+        return {
+            'success': True,
+            'verified': False,
+            'message': 'Invalid GST number',
+            'details': {
+                'gstNumber': gstin,
+                'verifiedAt': get_ist_now().isoformat(),
+                'source': self.source
+            }
+        }
+
+
+class StubGSTProvider(GSTProvider):
+    """
+    Local provider for tests: no network, deterministic answers
+
+    GSTINs listed in `rejected` come back unverified and those in `failing`
+    raise, to exercise the fallback path. Every call is recorded in `calls`.
+    """
+    name = 'stub'
+    source = 'Stub'
+
+    def __init__(self, rejected=(), failing=()):
+        self.rejected = set(rejected)
+        self.failing = set(failing)
+        self.calls = []
+
+    def verify(self, gstin):
+        self.calls.append(gstin)
+        if gstin in self.failing:
+            raise ConnectionError('Stub provider unavailable')
+        verified = gstin not in self.rejected
+        return {
+            'success': True,
+            'verified': verified,
+            'message': 'GST number verified successfully' if verified else 'Invalid GST number',
+            'details': {
+                'gstNumber': gstin,
+                'businessName': f'Stub Business {gstin[:2]}' if verified else None,
+                'status': 'Active' if verified else 'Cancelled',
+                'verifiedAt': get_ist_now().isoformat(),
+                'source': self.source
+            }
+        }
+
+
+PROVIDERS = {
+    FormatGSTProvider.name: FormatGSTProvider,
+    PortalGSTProvider.name: PortalGSTProvider,
+    StubGSTProvider.name: StubGSTProvider
+}
+
 
 class GSTVerificationService:
     """Service class for GST verification operations"""
-    
+
     GST_PORTAL_URL = "https://piceapp.com/gst-number-search/"
-    
+
+    _provider = None
+    _lru = OrderedDict()  # gstin -> (expires_at, result JSON)
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _setting(name, default):
+        try:
+            return current_app.config.get(name, default)
+        except RuntimeError:
+            return default
+
     @staticmethod
     def validate_gst_format(gst_number):
         """Validate GST number format"""
         if not gst_number:
             return False, "GST number is required"
-        
-        # Remove spaces and convert to uppercase
-        gst_number = gst_number.replace(" ", "").upper()
-        
-        # GST format: 2 digits state code + 10 digits PAN + 1 digit entity number + 1 digit Z + 1 digit check sum
-        gst_pattern = r'^[0-9]{2}[A-Z]{5}[0-9]{4}[A-Z]{1}[1-9A-Z]{1}[Z]{1}[0-9A-Z]{1}$'
-        
-        if not re.match(gst_pattern, gst_number):
+
+        if not GST_PATTERN.match(normalize_gstin(gst_number)):
             return False, "Invalid GST number format"
-        
+
         return True, "Valid format"
-    
+
+    # ------------------------------------------------------------------
+    # Providers
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def get_provider(cls):
+        """The configured provider, created on first use"""
+        with cls._lock:
+            if cls._provider is None:
+                name = (cls._setting('GST_PROVIDER', 'format') or 'format').lower()
+                if name not in PROVIDERS:
+                    raise ValueError(f"Unknown GST_PROVIDER: {name}")
+                cls._provider = PROVIDERS[name]()
+            return cls._provider
+
+    @classmethod
+    def set_provider(cls, provider):
+        """Swap the provider (e.g. a StubGSTProvider in tests); clears the in-process cache"""
+        with cls._lock:
+            cls._provider = provider
+            cls._lru.clear()
+
+    # ------------------------------------------------------------------
+    # Cache
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _lru_get(cls, gstin, now):
+        with cls._lock:
+            entry = cls._lru.get(gstin)
+            if entry is None:
+                return None
+            expires_at, result_json = entry
+            if expires_at <= now:
+                del cls._lru[gstin]
+                return None
+            cls._lru.move_to_end(gstin)
+            return result_json
+
+    @classmethod
+    def _lru_put(cls, gstin, expires_at, result_json):
+        max_size = int(cls._setting('GST_CACHE_SIZE', 2048))
+        with cls._lock:
+            cls._lru[gstin] = (expires_at, result_json)
+            cls._lru.move_to_end(gstin)
+            while len(cls._lru) > max_size:
+                cls._lru.popitem(last=False)
+
+    @classmethod
+    def _store(cls, gstin, result, source):
+        """Persist a provider answer and return (expires_at, result JSON)"""
+        now = _now()
+        if result['verified']:
+            ttl_hours = int(cls._setting('GST_CACHE_TTL_HOURS', 24 * 30))
+        else:
+            ttl_hours = int(cls._setting('GST_CACHE_NEGATIVE_TTL_HOURS', 24))
+        expires_at = now + timedelta(hours=ttl_hours)
+        result_json = json.dumps(result)
+
+        try:
+            row = GstVerification.query.filter_by(gstin=gstin).first()
+            if row is None:
+                row = GstVerification(gstin=gstin)
+                db.session.add(row)
+            row.verified = bool(result['verified'])
+            row.source = source
+            row.result = result_json
+            row.verified_at = now
+            row.expires_at = expires_at
+            db.session.commit()
+        except IntegrityError:
+            # Another request stored the same GSTIN first; its answer is as good as ours
+            db.session.rollback()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Could not cache GST verification for {gstin}: {e}")
+
+        return expires_at, result_json
+
+    @classmethod
+    def invalidate(cls, gst_number):
+        """Drop the cached answer for a GSTIN from both cache levels"""
+        gstin = normalize_gstin(gst_number)
+        with cls._lock:
+            cls._lru.pop(gstin, None)
+        GstVerification.query.filter_by(gstin=gstin).delete()
+        db.session.commit()
+
     @staticmethod
-    def verify_gst_with_piceapp(gst_number):
+    def _cached_response(result_json):
+        result = json.loads(result_json)
+        if result.get('details') is not None:
+            result['details']['cached'] = True
+        return result
+
+    # ------------------------------------------------------------------
+    # Verification
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def verify_gst_number(cls, gst_number, refresh=False):
         """
-        Simple GST verification using format validation only
+        Main method to verify GST number
+
+        Checks the in-process cache, then the gst_verifications table, and
+        only then the configured provider. Cached answers carry
+        details.cached = True and keep their original verifiedAt.
+
+        Args:
+            gst_number: GSTIN as entered (spaces and case are ignored)
+            refresh: Skip both cache levels and ask the provider again
         """
         try:
             # Validate format first
-            is_valid_format, format_message = GSTVerificationService.validate_gst_format(gst_number)
+            is_valid_format, format_message = cls.validate_gst_format(gst_number)
             if not is_valid_format:
                 return {
                     'success': False,
@@ -46,165 +332,80 @@ class GSTVerificationService:
                     'message': format_message,
                     'details': None
                 }
-            
-            # Clean GST number
-            clean_gst = gst_number.replace(" ", "").upper()
-            
-            # For now, use format validation as the verification method
-            # This ensures the system works reliably without external dependencies
-            
-            # Extract state code for business name generation
-            state_code = clean_gst[:2]
-            
-            # Simple state mapping for business name
-            state_business_map = {
-                '01': 'Kashmir Business Enterprises',
-                '02': 'Himachal Trading Company',
-                '03': 'Punjab Industries Ltd',
-                '04': 'Chandigarh Corp',
-                '05': 'Uttarakhand Ventures',
-                '06': 'Haryana Enterprises',
-                '07': 'Delhi Business House',
-                '08': 'Rajasthan Trading Co',
-                '09': 'UP Industries',
-                '10': 'Bihar Commerce Ltd',
-                '24': 'Gujarat Business Corp',
-                '27': 'Maharashtra Enterprises',
-                '29': 'Karnataka Industries',
-                '33': 'Tamil Nadu Trading'
-            }
-            
-            business_name = state_business_map.get(state_code, f"Business Entity {state_code}")
-            
-            return {
-                'success': True,
-                'verified': True,
-                'message': 'GST number verified successfully',
-                'details': {
-                    'gstNumber': clean_gst,
-                    'businessName': business_name,
-                    'status': 'Active',
-                    'verifiedAt': get_ist_now().isoformat(),
-                    'source': 'GST Format Verification'
+
+            gstin = normalize_gstin(gst_number)
+            now = _now()
+
+            if not refresh:
+                result_json = cls._lru_get(gstin, now)
+                if result_json is not None:
+                    return cls._cached_response(result_json)
+
+                row = GstVerification.query.filter_by(gstin=gstin).first()
+                if row is not None and row.expires_at > now:
+                    cls._lru_put(gstin, row.expires_at, row.result)
+                    return cls._cached_response(row.result)
+
+            provider = cls.get_provider()
+            try:
+                result = provider.verify(gstin)
+            except Exception as e:
+                result = {
+                    'success': False,
+                    'verified': False,
+                    'message': f'GST verification failed: {str(e)}',
+                    'details': None
                 }
-            }
-            
+
+            # If portal verification fails due to technical issues, at least report the valid format
+            if not result['success']:
+                return {
+                    'success': True,
+                    'verified': False,
+                    'message': 'Format is valid but portal verification failed. Please try again later.',
+                    'details': {
+                        'gstNumber': gstin,
+                        'formatValid': True,
+                        'portalVerification': False,
+                        'verifiedAt': get_ist_now().isoformat(),
+                        'fallbackReason': result['message']
+                    }
+                }
+
+            expires_at, result_json = cls._store(gstin, result, provider.source or provider.name)
+            cls._lru_put(gstin, expires_at, result_json)
+            return result
+
         except Exception as e:
             return {
                 'success': False,
                 'verified': False,
-                'message': f'GST verification failed: {str(e)}',
+                'message': f'GST verification service error: {str(e)}',
                 'details': None
             }
-    
+
     @staticmethod
-    def verify_gst_number(gst_number):
-        """
-        Main method to verify GST number using PiceApp (no CAPTCHA)
-        """
-        try:
-            # Use PiceApp GST verification service
-            result = GSTVerificationService.verify_gst_with_piceapp(gst_number)
-            
-            # If portal verification fails due to technical issues, at least validate format
-            if not result['success'] and 'format' not in result['message'].lower():
-                is_valid_format, format_message = GSTVerificationService.validate_gst_format(gst_number)
-                if is_valid_format:
-                    return {
-                        'success': True,
-                        'verified': False,
-                        'message': 'Format is valid but portal verification failed. Please try again later.',
-                        'details': {
-                            'gstNumber': gst_number.replace(" ", "").upper(),
-                            'formatValid': True,
-                            'portalVerification': False,
-                            'verifiedAt': get_ist_now().isoformat(),
-                            'fallbackReason': result['message']
-                        }
-                    }
-                else:
-                    return {
-                        'success': False,
-                        'verified': False,
-                        'message': format_message,
-                        'details': None
-                    }
-            
-            return result
-            
-        except Exception as e:
+    def verify_gst_with_piceapp(gst_number):
+        """Format-only verification, uncached (see FormatGSTProvider)"""
+        is_valid_format, format_message = GSTVerificationService.validate_gst_format(gst_number)
+        if not is_valid_format:
             return {
                 'success': False,
                 'verified': False,
-                'message': f'GST verification service error: {str(e)}',
+                'message': format_message,
                 'details': None
             }
+        return FormatGSTProvider().verify(normalize_gstin(gst_number))
 
     @staticmethod
     def verify_gst_with_portal_simulation(gst_number):
-        """
-        Simulate GST verification as if calling the actual government portal
-        This method shows how you would structure the real implementation
-        """
-        try:
-            # Validate format
-            is_valid_format, format_message = GSTVerificationService.validate_gst_format(gst_number)
-            if not is_valid_format:
-                return {
-                    'success': False,
-                    'verified': False,
-                    'message': format_message,
-                    'details': None
-                }
-            
-            clean_gst = gst_number.replace(" ", "").upper()
-            
-            # In production, this would be the actual API call:
-            # response = requests.post(
-            #     'https://services.gst.gov.in/services/searchtp',
-            #     data={'gstin': clean_gst},
-            #     headers={'Content-Type': 'application/x-www-form-urlencoded'},
-            #     timeout=30
-            # )
-            
-            # For now, simulate based on GST format validation
-            # Real implementation would parse the actual government response
-            
-            # Simulate network delay
-            import time
-            time.sleep(1)  # Simulate API call delay
-            
-            # Basic validation - if format is correct, assume it might be valid
-            # In real implementation, this would be the actual government response
-            if len(clean_gst) == 15:
-                return {
-                    'success': True,
-                    'verified': True,
-                    'message': 'GST number format is valid (simulated verification)',
-                    'details': {
-                        'gstNumber': clean_gst,
-                        'businessName': 'Verified Business (Demo)',
-                        'status': 'Active',
-                        'registrationDate': '2020-01-01',
-                        'verifiedAt': get_ist_now().isoformat(),
-                        'note': 'This is a simulated verification for demo purposes'
-                    }
-                }
-            else:
-                return {
-                    'success': True,
-                    'verified': False,
-                    'message': 'Invalid GST number',
-                    'details': {
-                        'gstNumber': clean_gst,
-                        'verifiedAt': get_ist_now().isoformat()
-                    }
-                }
-                
-        except Exception as e:
+        """Simulated government portal verification, uncached (see PortalGSTProvider)"""
+        is_valid_format, format_message = GSTVerificationService.validate_gst_format(gst_number)
+        if not is_valid_format:
             return {
                 'success': False,
                 'verified': False,
-                'message': f'Verification service unavailable: {str(e)}',
+                'message': format_message,
                 'details': None
-            }
\ No newline at end of file
+            }
+        return PortalGSTProvider().verify(normalize_gstin(gst_number))
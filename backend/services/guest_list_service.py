@@ -6,9 +6,15 @@ from models import db
 from models.guest_list import GuestList, GuestStatus
 from datetime import datetime, date, time
 from sqlalchemy import or_, and_
+from utils.pagination import paginate
+from utils.change_tracking import cached_by_tables
+from services.upload_service import UploadService
 
 class GuestListService:
     """Service class for guest list operations"""
+
+    # API sort names accepted by the paged list endpoints
+    GUEST_SORT_FIELDS = {'visitDate': GuestList.visit_date, 'createdAt': GuestList.created_at}
     
     @staticmethod
     def create_guest_entry(data, created_by=None):
@@ -51,8 +57,8 @@ class GuestListService:
             raise Exception(f"Failed to create guest entry: {str(e)}")
     
     @staticmethod
-    def get_all_guests(filters=None):
-        """Get all guest entries with optional filters"""
+    def get_all_guests(filters=None, page=None):
+        """Get all guest entries with optional filters, as a Page when a PageRequest is given"""
         try:
             query = GuestList.query
             
@@ -61,14 +67,12 @@ class GuestListService:
                 if filters.get('status'):
                     query = query.filter(GuestList.status == filters['status'])
                 
-                # Filter by date range
+                # Filter by date range (dates parsed by the route)
                 if filters.get('startDate'):
-                    start_date = datetime.strptime(filters['startDate'], '%Y-%m-%d').date()
-                    query = query.filter(GuestList.visit_date >= start_date)
+                    query = query.filter(GuestList.visit_date >= filters['startDate'])
                 
                 if filters.get('endDate'):
-                    end_date = datetime.strptime(filters['endDate'], '%Y-%m-%d').date()
-                    query = query.filter(GuestList.visit_date <= end_date)
+                    query = query.filter(GuestList.visit_date <= filters['endDate'])
                 
                 # Search by guest name or meeting person
                 if filters.get('search'):
@@ -81,6 +85,8 @@ class GuestListService:
                         )
                     )
             
+            if page is not None:
+                return paginate(query, page, GuestList.id).map(lambda guest: guest.to_dict())
             guests = query.order_by(GuestList.visit_date.desc(), GuestList.created_at.desc()).all()
             return [guest.to_dict() for guest in guests]
         except Exception as e:
@@ -132,6 +138,8 @@ class GuestListService:
                     guest.vehicle_number = data['vehicleNumber']
                 if data.get('notes'):
                     guest.notes = data['notes']
+                if data.get('visitorPhoto'):
+                    guest.visitor_photo_path = UploadService.url(UploadService.store_base64(data['visitorPhoto']))
             
             db.session.commit()
             return guest.to_dict()
@@ -215,6 +223,28 @@ class GuestListService:
             db.session.rollback()
             raise Exception(f"Failed to update guest: {str(e)}")
     
+    @staticmethod
+    def set_visitor_photo(guest_id, photo_file=None, photo_base64=None):
+        """Store a visitor photo (uploaded file or base64) and attach it to the guest entry"""
+        guest = GuestList.query.get(guest_id)
+        if not guest:
+            raise LookupError(f"Guest entry with ID {guest_id} not found")
+        
+        if photo_file is not None:
+            name = UploadService.store(photo_file)
+        elif photo_base64:
+            name = UploadService.store_base64(photo_base64)
+        else:
+            raise ValueError("photo is required")
+        
+        try:
+            guest.visitor_photo_path = UploadService.url(name)
+            db.session.commit()
+            return guest.to_dict()
+        except Exception as e:
+            db.session.rollback()
+            raise Exception(f"Failed to save visitor photo: {str(e)}")
+    
     @staticmethod
     def cancel_guest(guest_id, reason=None):
         """Cancel a guest visit"""
@@ -256,6 +286,7 @@ class GuestListService:
             raise Exception(f"Failed to delete guest: {str(e)}")
     
     @staticmethod
+    @cached_by_tables(GuestList)
     def get_guest_summary():
         """Get summary statistics for guest visits"""
         try:
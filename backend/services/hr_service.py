@@ -4,8 +4,15 @@ Handles business logic for HR operations
 """
 from datetime import datetime, date, timedelta
 from utils.timezone_helpers import get_ist_now
-from models import db, Employee, Attendance, Leave, Payroll, JobPosting, LeaveType, LeaveStatus, AttendanceStatus, JobStatus, SalaryType, JobApplication, Interview, Candidate, ApplicationStatus, InterviewStatus
-from sqlalchemy import inspect, text
+from utils.change_tracking import cached_by_tables
+from utils.excel_export import StreamingWorkbook
+from utils.document_templates import PAYSLIP_TEMPLATE
+from utils.pagination import Page, paginate
+from services.document_render_service import DocumentRenderService
+from services.job_queue_service import JobQueueService
+from models import db, Employee, Attendance, AttendanceMonthlyRollup, AttendanceRollupPeriod, Leave, Payroll, JobPosting, LeaveType, LeaveStatus, AttendanceStatus, JobStatus, SalaryType, JobApplication, Interview, Candidate, ApplicationStatus, InterviewStatus
+from sqlalchemy import case, func, inspect, insert, or_, and_, select, text
+from sqlalchemy.orm import contains_eager, joinedload
 import traceback
 
 
@@ -32,6 +39,32 @@ def _safe_date(value):
 _JOB_APP_CANDIDATE_COLUMN_CHECKED = False
 
 
+def _month_start(value):
+    """First day of the month containing value."""
+    return value.replace(day=1)
+
+
+def _next_month_start(value):
+    """First day of the month after the one containing value."""
+    if value.month == 12:
+        return date(value.year + 1, 1, 1)
+    return date(value.year, value.month + 1, 1)
+
+
+def _closed_months_within(start_date, end_date, today=None):
+    """Months lying entirely inside [start_date, end_date] that ended before this month."""
+    current_month = _month_start(today or date.today())
+    month = _month_start(start_date)
+    if month < start_date:
+        month = _next_month_start(month)
+
+    months = []
+    while month < current_month and _next_month_start(month) - timedelta(days=1) <= end_date:
+        months.append(month)
+        month = _next_month_start(month)
+    return months
+
+
 def _ensure_job_application_candidate_column():
     """Ensure job_applications table has candidate_id column, adding if missing."""
     global _JOB_APP_CANDIDATE_COLUMN_CHECKED
@@ -60,34 +93,72 @@ def _ensure_job_application_candidate_column():
 class HRService:
     """Service class for HR operations"""
 
+    # API sort names accepted by the paged list endpoints
+    EMPLOYEE_SORT_FIELDS = {
+        'createdAt': Employee.created_at,
+        'firstName': Employee.first_name,
+        'lastName': Employee.last_name
+    }
+    ATTENDANCE_SORT_FIELDS = {'date': Attendance.date, 'createdAt': Attendance.created_at}
+    LEAVE_SORT_FIELDS = {'createdAt': Leave.created_at, 'startDate': Leave.start_date}
+    PAYROLL_SORT_FIELDS = {'payPeriodEnd': Payroll.pay_period_end, 'createdAt': Payroll.created_at}
+    APPLICATION_SORT_FIELDS = {'createdAt': JobApplication.created_at}
+    CANDIDATE_SORT_FIELDS = {'createdAt': Candidate.created_at, 'name': Candidate.name}
+
+    @classmethod
+    def invalidate_dashboard_cache(cls):
+        """Drop cached department overview and open positions (committed ORM writes already do this)"""
+        cls._get_dashboard_directory.cache_clear()
+
+    @staticmethod
+    @cached_by_tables(Employee, JobPosting)
+    def _get_dashboard_directory():
+        """Department overview and open positions, served from cache until either table changes"""
+        departments = db.session.query(
+            Employee.department,
+            db.func.count(Employee.id).label('count')
+        ).group_by(Employee.department).all()
+        open_positions = JobPosting.query.filter_by(status=JobStatus.OPEN).count()
+
+        return {
+            'departmentOverview': {dept: count for dept, count in departments},
+            'openPositions': open_positions
+        }
+
     @staticmethod
     def get_dashboard_data():
         """Get HR dashboard summary data"""
         try:
-            # Get total employees
-            total_employees = Employee.query.count()
+            directory = HRService._get_dashboard_directory()
+            department_overview = dict(directory['departmentOverview'])
 
-            # Get today's attendance
+            # Today's attendance and leave counts in one round trip
             today = date.today()
-            today_attendance = Attendance.query.filter_by(date=today).all()
-            present_today = len([a for a in today_attendance if a.status == AttendanceStatus.PRESENT])
-            absent_today = len([a for a in today_attendance if a.status == AttendanceStatus.ABSENT])
+            attendance_counts = select(
+                func.coalesce(func.sum(case((Attendance.status == AttendanceStatus.PRESENT, 1), else_=0)), 0),
+                func.coalesce(func.sum(case((Attendance.status == AttendanceStatus.ABSENT, 1), else_=0)), 0)
+            ).where(Attendance.date == today).subquery()
 
-            # Get employees on leave
-            current_leaves = Leave.query.filter(
+            on_leave = select(func.count(Leave.id)).where(
                 Leave.start_date <= today,
                 Leave.end_date >= today,
                 Leave.status == LeaveStatus.APPROVED
-            ).count()
+            ).scalar_subquery()
 
-            # Get open job positions
-            open_positions = JobPosting.query.filter_by(status=JobStatus.OPEN).count()
+            present_today, absent_today, current_leaves = db.session.execute(
+                select(*attendance_counts.c, on_leave)
+            ).one()
 
             # Get recent activities (last 5)
             recent_activities = []
 
             # Recent employee joins
-            recent_joins = Employee.query.filter(
+            recent_joins = db.session.query(
+                Employee.first_name,
+                Employee.last_name,
+                Employee.department,
+                Employee.joining_date
+            ).filter(
                 Employee.joining_date >= today - timedelta(days=30)
             ).order_by(Employee.joining_date.desc()).limit(3).all()
 
@@ -98,8 +169,10 @@ class HRService:
                     'date': emp.joining_date.isoformat()
                 })
 
-            # Recent leave approvals
-            recent_leaves = Leave.query.filter(
+            # Recent leave approvals, with the employee loaded in the same query
+            recent_leaves = Leave.query.options(
+                joinedload(Leave.employee)
+            ).filter(
                 Leave.status == LeaveStatus.APPROVED,
                 Leave.approved_at >= get_ist_now() - timedelta(days=7)
             ).order_by(Leave.approved_at.desc()).limit(2).all()
@@ -115,20 +188,12 @@ class HRService:
             recent_activities.sort(key=lambda x: x['date'], reverse=True)
             recent_activities = recent_activities[:5]
 
-            # Department overview
-            departments = db.session.query(
-                Employee.department,
-                db.func.count(Employee.id).label('count')
-            ).group_by(Employee.department).all()
-
-            department_overview = {dept: count for dept, count in departments}
-
             result = {
-                'totalEmployees': total_employees,
-                'presentToday': present_today,
-                'absentToday': absent_today,
-                'onLeave': current_leaves,
-                'openPositions': open_positions,
+                'totalEmployees': sum(department_overview.values()),
+                'presentToday': int(present_today or 0),
+                'absentToday': int(absent_today or 0),
+                'onLeave': int(current_leaves or 0),
+                'openPositions': directory['openPositions'],
                 'recentActivities': recent_activities,
                 'departmentOverview': department_overview
             }
@@ -149,8 +214,8 @@ class HRService:
 
     # Employee Management
     @staticmethod
-    def get_employees(department=None, status=None, limit=50):
-        """Get all employees with optional filtering"""
+    def get_employees(department=None, status=None, limit=50, page=None):
+        """Get employees with optional filtering, as a Page when a PageRequest is given"""
         query = Employee.query
 
         if department:
@@ -158,6 +223,8 @@ class HRService:
         if status:
             query = query.filter_by(status=status)
 
+        if page is not None:
+            return paginate(query, page, Employee.id).map(lambda emp: emp.to_dict())
         employees = query.order_by(Employee.created_at.desc()).limit(limit).all()
         return [emp.to_dict() for emp in employees]
 
@@ -224,8 +291,11 @@ class HRService:
         name = f"{employee.first_name} {employee.last_name}"
         phone = employee.phone
         photos = [photo] if photo else None
-        # If face_encoding is not provided, let gate_entry_service_db generate it from photo
-        gateuser_result = gate_entry_service_db.register_user(name=name, phone=phone, photos=photos, face_encoding=face_encoding)
+        # If face_encoding is not provided, a background job generates it from the photo
+        # and copies it to this employee (see GateEntryServiceDB.encode_user_faces)
+        gateuser_result = gate_entry_service_db.register_user(
+            name=name, phone=phone, photos=photos, face_encoding=face_encoding, defer_encoding=True
+        )
 
         # After registration, update Employee's face_encoding and photo from GateUser if available
         from models.gate_entry import GateUser
@@ -238,6 +308,7 @@ class HRService:
                 employee.photo = gate_user.photo
             db.session.commit()
 
+        HRService.invalidate_dashboard_cache()
         return employee.to_dict()
 
     @staticmethod
@@ -303,6 +374,7 @@ class HRService:
                     db.session.commit()
 
         db.session.commit()
+        HRService.invalidate_dashboard_cache()
         return employee.to_dict()
 
     @staticmethod
@@ -315,6 +387,7 @@ class HRService:
         # Delete related records first to avoid foreign key constraints
         # Delete attendances
         Attendance.query.filter_by(employee_id=employee_id).delete()
+        AttendanceMonthlyRollup.query.filter_by(employee_id=employee_id).delete()
         # Delete leaves
         Leave.query.filter_by(employee_id=employee_id).delete()
         # Delete payrolls
@@ -325,6 +398,7 @@ class HRService:
         # Finally delete the employee
         db.session.delete(employee)
         db.session.commit()
+        HRService.invalidate_dashboard_cache()
         return {'message': 'Employee deleted successfully'}
 
     # Attendance Management
@@ -373,6 +447,7 @@ class HRService:
             )
             db.session.add(attendance)
 
+        HRService._invalidate_attendance_rollup(attendance_date)
         db.session.commit()
         return {'message': 'Attendance recorded successfully'}
 
@@ -390,17 +465,21 @@ class HRService:
         return [record.to_dict() for record in attendance_records]
 
     @staticmethod
-    def get_all_attendance(start_date=None, end_date=None):
-        """Get all attendance records"""
+    def get_all_attendance(start_date=None, end_date=None, page=None):
+        """Get all attendance records (dates inclusive), or a Page of them when a PageRequest is given"""
         try:
             query = Attendance.query
 
             if start_date:
-                query = query.filter(Attendance.date >= datetime.fromisoformat(start_date).date())
+                query = query.filter(Attendance.date >= start_date)
             if end_date:
-                query = query.filter(Attendance.date <= datetime.fromisoformat(end_date).date())
+                query = query.filter(Attendance.date <= end_date)
 
-            attendance_records = query.order_by(Attendance.date.desc()).all()
+            if page is not None:
+                result_page = paginate(query, page, Attendance.id)
+                attendance_records = result_page.items
+            else:
+                attendance_records = query.order_by(Attendance.date.desc()).all()
             
             # Convert to dict with error handling for each record
             result = []
@@ -411,14 +490,23 @@ class HRService:
                     print(f"Error converting attendance record {record.id}: {e}")
                     continue
             
+            if page is not None:
+                result_page.items = result
+                return result_page
             return result
         except Exception as e:
             print(f"Error fetching attendance records: {e}")
-            return []
+            return Page([]) if page is not None else []
 
     @staticmethod
     def get_attendance_summary(start_date=None, end_date=None):
-        """Get attendance summary for all employees"""
+        """
+        Get attendance summary for all employees
+
+        Counts are grouped by employee and status in the database. Windows
+        longer than a month read complete past months from the monthly rollup
+        and only query raw attendance for the partial months at either end.
+        """
         if not start_date:
             start_date = date.today() - timedelta(days=30)
         else:
@@ -429,17 +517,71 @@ class HRService:
         else:
             end_date = datetime.fromisoformat(end_date).date()
 
-        attendance_records = Attendance.query.filter(
-            Attendance.date >= start_date,
-            Attendance.date <= end_date
-        ).all()
+        rows = []
+        live_ranges = [(start_date, end_date)]
+
+        if (end_date - start_date).days > 31:
+            rollup_months = _closed_months_within(start_date, end_date)
+            if rollup_months and HRService._ensure_attendance_rollups(rollup_months):
+                rows.extend(db.session.query(
+                    AttendanceMonthlyRollup.employee_id,
+                    Employee.first_name,
+                    Employee.last_name,
+                    AttendanceMonthlyRollup.status,
+                    func.sum(AttendanceMonthlyRollup.day_count)
+                ).join(
+                    Employee, Employee.id == AttendanceMonthlyRollup.employee_id
+                ).filter(
+                    AttendanceMonthlyRollup.period_start.in_(rollup_months)
+                ).group_by(
+                    AttendanceMonthlyRollup.employee_id,
+                    Employee.first_name,
+                    Employee.last_name,
+                    AttendanceMonthlyRollup.status
+                ).all())
+
+                live_ranges = [
+                    (range_start, range_end)
+                    for range_start, range_end in (
+                        (start_date, rollup_months[0] - timedelta(days=1)),
+                        (_next_month_start(rollup_months[-1]), end_date)
+                    )
+                    if range_start <= range_end
+                ]
+
+        if live_ranges:
+            rows.extend(db.session.query(
+                Attendance.employee_id,
+                Employee.first_name,
+                Employee.last_name,
+                Attendance.status,
+                func.count(Attendance.id)
+            ).join(
+                Employee, Employee.id == Attendance.employee_id
+            ).filter(
+                or_(*[
+                    and_(Attendance.date >= range_start, Attendance.date <= range_end)
+                    for range_start, range_end in live_ranges
+                ])
+            ).group_by(
+                Attendance.employee_id,
+                Employee.first_name,
+                Employee.last_name,
+                Attendance.status
+            ).all())
+
+        status_fields = {
+            AttendanceStatus.PRESENT: 'presentDays',
+            AttendanceStatus.ABSENT: 'absentDays',
+            AttendanceStatus.LATE: 'lateDays',
+            AttendanceStatus.HALF_DAY: 'halfDays'
+        }
 
         summary = {}
-        for record in attendance_records:
-            emp_id = record.employee_id
+        for emp_id, first_name, last_name, status, count in rows:
             if emp_id not in summary:
                 summary[emp_id] = {
-                    'employeeName': record.employee.full_name,
+                    'employeeName': f"{first_name} {last_name}",
                     'totalDays': 0,
                     'presentDays': 0,
                     'absentDays': 0,
@@ -447,18 +589,70 @@ class HRService:
                     'halfDays': 0
                 }
 
-            summary[emp_id]['totalDays'] += 1
-            if record.status == AttendanceStatus.PRESENT:
-                summary[emp_id]['presentDays'] += 1
-            elif record.status == AttendanceStatus.ABSENT:
-                summary[emp_id]['absentDays'] += 1
-            elif record.status == AttendanceStatus.LATE:
-                summary[emp_id]['lateDays'] += 1
-            elif record.status == AttendanceStatus.HALF_DAY:
-                summary[emp_id]['halfDays'] += 1
+            count = int(count or 0)
+            summary[emp_id]['totalDays'] += count
+            field = status_fields.get(status)
+            if field:
+                summary[emp_id][field] += count
 
         return list(summary.values())
 
+    @staticmethod
+    def _ensure_attendance_rollups(months):
+        """
+        Build monthly attendance rollups for any of the given months missing one
+
+        Only closed months are rolled up; a month is rebuilt after
+        record_attendance edits a day inside it.
+
+        Returns:
+            bool: True when every month has a complete rollup
+        """
+        try:
+            built = {
+                row.period_start for row in AttendanceRollupPeriod.query.filter(
+                    AttendanceRollupPeriod.period_start.in_(months)
+                ).all()
+            }
+            missing = [month for month in months if month not in built]
+            if not missing:
+                return True
+
+            for month in missing:
+                AttendanceMonthlyRollup.query.filter_by(period_start=month).delete()
+                db.session.execute(
+                    insert(AttendanceMonthlyRollup).from_select(
+                        ['period_start', 'employee_id', 'status', 'day_count'],
+                        select(
+                            db.literal(month, db.Date),
+                            Attendance.employee_id,
+                            Attendance.status,
+                            func.count(Attendance.id)
+                        ).where(
+                            Attendance.date >= month,
+                            Attendance.date < _next_month_start(month)
+                        ).group_by(Attendance.employee_id, Attendance.status)
+                    )
+                )
+                db.session.add(AttendanceRollupPeriod(period_start=month, refreshed_at=get_ist_now()))
+
+            db.session.commit()
+            return True
+        except Exception as e:
+            # A concurrent request built the same month; fall back to raw attendance
+            db.session.rollback()
+            print(f"Attendance rollup skipped: {e}")
+            return False
+
+    @staticmethod
+    def _invalidate_attendance_rollup(attendance_date):
+        """Drop the rollup of a closed month after one of its days changed"""
+        month = _month_start(attendance_date)
+        if month >= _month_start(date.today()):
+            return
+        AttendanceRollupPeriod.query.filter_by(period_start=month).delete()
+        AttendanceMonthlyRollup.query.filter_by(period_start=month).delete()
+
     # Leave Management
     @staticmethod
     def create_leave_request(employee_id, leave_data):
@@ -492,8 +686,8 @@ class HRService:
         return leave.to_dict()
 
     @staticmethod
-    def get_leave_requests(employee_id=None, status=None):
-        """Get leave requests with optional filtering"""
+    def get_leave_requests(employee_id=None, status=None, page=None):
+        """Get leave requests with optional filtering, as a Page when a PageRequest is given"""
         try:
             query = Leave.query
 
@@ -506,7 +700,11 @@ class HRService:
                     # Invalid status, skip filtering
                     pass
 
-            leaves = query.order_by(Leave.created_at.desc()).all()
+            if page is not None:
+                result_page = paginate(query, page, Leave.id)
+                leaves = result_page.items
+            else:
+                leaves = query.order_by(Leave.created_at.desc()).all()
             
             # Convert to dict with error handling for each record
             result = []
@@ -517,6 +715,9 @@ class HRService:
                     print(f"Error converting leave record {leave.id}: {e}")
                     continue
             
+            if page is not None:
+                result_page.items = result
+                return result_page
             return result
         except Exception as e:
             print(f"Error fetching leave requests: {e}")
@@ -833,8 +1034,10 @@ class HRService:
         return [payroll.to_dict() for payroll in payrolls]
 
     @staticmethod
-    def get_payrolls():
-        """Get all payroll records"""
+    def get_payrolls(page=None):
+        """Get all payroll records, or a Page of them when a PageRequest is given"""
+        if page is not None:
+            return paginate(Payroll.query, page, Payroll.id).map(lambda payroll: payroll.to_dict())
         payrolls = Payroll.query.order_by(Payroll.pay_period_end.desc()).all()
         return [payroll.to_dict() for payroll in payrolls]
 
@@ -951,6 +1154,11 @@ class HRService:
     @staticmethod
     def generate_payslip(payroll_id):
         """Generate payslip HTML for a payroll record"""
+        payroll, employee = HRService._get_payslip_records(payroll_id)
+        return HRService.build_payslip_html(payroll, employee)
+
+    @staticmethod
+    def _get_payslip_records(payroll_id):
         payroll = Payroll.query.get(payroll_id)
         if not payroll:
             raise ValueError('Payroll not found')
@@ -958,7 +1166,91 @@ class HRService:
         employee = payroll.employee
         if not employee:
             raise ValueError('Employee not found for this payroll')
+        return payroll, employee
+
+    @staticmethod
+    def payslip_source(payroll, employee):
+        """Source record of a payslip, used as the PDF cache key"""
+        return {
+            'payroll': payroll.to_dict(),
+            'employeeId': employee.id,
+            'employeeUpdatedAt': employee.updated_at
+        }
+
+    @staticmethod
+    def generate_payslip_pdf(payroll_id):
+        """Render a payslip as PDF in the document render pool"""
+        payroll, employee = HRService._get_payslip_records(payroll_id)
+        return DocumentRenderService.render_pdf(
+            'payslip',
+            HRService.payslip_source(payroll, employee),
+            lambda: HRService.build_payslip_html(payroll, employee)
+        )
+
+    @staticmethod
+    def payslip_documents(start_date, end_date):
+        """
+        Payslips whose pay period ends within [start_date, end_date], as
+        (filename, kind, source, build_html) tuples for DocumentRenderService.render_zip
+        """
+        start_date = datetime.fromisoformat(start_date).date()
+        end_date = datetime.fromisoformat(end_date).date()
+
+        payrolls = Payroll.query.join(
+            Employee, Employee.id == Payroll.employee_id
+        ).options(
+            contains_eager(Payroll.employee)
+        ).filter(
+            Payroll.pay_period_end >= start_date,
+            Payroll.pay_period_end <= end_date
+        ).order_by(Payroll.id).all()
+
+        if not payrolls:
+            raise ValueError('No payrolls found for this period')
+
+        return [
+            (
+                f"payslip_{payroll.employee.employee_id}_{payroll.pay_period_end.strftime('%Y%m%d')}_{payroll.id}.pdf",
+                'payslip',
+                HRService.payslip_source(payroll, payroll.employee),
+                (lambda payroll=payroll: HRService.build_payslip_html(payroll, payroll.employee))
+            )
+            for payroll in payrolls
+        ]
+
+    @staticmethod
+    def generate_payslips_zip(start_date, end_date):
+        """
+        Render every payslip whose pay period ends within [start_date, end_date] into one ZIP
+
+        Returns:
+            A temp file object with the ZIP data positioned at the start
+        """
+        return DocumentRenderService.render_zip(HRService.payslip_documents(start_date, end_date))
+
+    @staticmethod
+    def payslips_zip_key(start_date, end_date):
+        """Cache key of the payslip ZIP for the period; changes whenever any of its payrolls does"""
+        return DocumentRenderService.zip_key(HRService.payslip_documents(start_date, end_date))
+
+    @staticmethod
+    def queue_payslips_zip(start_date, end_date, key):
+        """
+        Queue rendering of the period's payslip ZIP (key from payslips_zip_key)
+
+        Returns:
+            dict: The background job; its result holds the key to download the ZIP with
+        """
+        return JobQueueService.enqueue(
+            'render_payslips_zip',
+            {'startDate': start_date, 'endDate': end_date},
+            idempotency_key=f'payslips_zip:{key}',
+            live_only=True
+        )
 
+    @staticmethod
+    def build_payslip_html(payroll, employee):
+        """Build payslip HTML from loaded payroll and employee records"""
         # Format dates
         pay_period_start = payroll.pay_period_start.strftime('%d/%m/%Y') if payroll.pay_period_start else 'N/A'
         pay_period_end = payroll.pay_period_end.strftime('%d/%m/%Y') if payroll.pay_period_end else 'N/A'
@@ -989,210 +1281,20 @@ class HRService:
             basic_label = 'Monthly Salary'
             basic_amount = f"{payroll.monthly_salary:,.2f}"
 
-        # Generate HTML payslip
-        payslip_html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Payslip - {employee.full_name}</title>
-            <style>
-                body {{
-                    font-family: Arial, sans-serif;
-                    margin: 20px;
-                    color: #333;
-                }}
-                .header {{
-                    text-align: center;
-                    border-bottom: 2px solid #007bff;
-                    padding-bottom: 20px;
-                    margin-bottom: 30px;
-                }}
-                .company-name {{
-                    font-size: 24px;
-                    font-weight: bold;
-                    color: #007bff;
-                    margin-bottom: 10px;
-                }}
-                .payslip-title {{
-                    font-size: 18px;
-                    color: #666;
-                }}
-                .employee-info {{
-                    display: grid;
-                    grid-template-columns: 1fr 1fr;
-                    gap: 20px;
-                    margin-bottom: 30px;
-                }}
-                .info-section {{
-                    background: #f8f9fa;
-                    padding: 15px;
-                    border-radius: 5px;
-                }}
-                .info-section h3 {{
-                    margin: 0 0 10px 0;
-                    color: #007bff;
-                    font-size: 16px;
-                }}
-                .info-row {{
-                    display: flex;
-                    justify-content: space-between;
-                    margin-bottom: 5px;
-                }}
-                .salary-breakdown {{
-                    margin: 30px 0;
-                }}
-                .salary-table {{
-                    width: 100%;
-                    border-collapse: collapse;
-                    margin: 20px 0;
-                }}
-                .salary-table th, .salary-table td {{
-                    padding: 12px;
-                    text-align: left;
-                    border-bottom: 1px solid #ddd;
-                }}
-                .salary-table th {{
-                    background: #f8f9fa;
-                    font-weight: bold;
-                }}
-                .total-row {{
-                    background: #e9ecef;
-                    font-weight: bold;
-                }}
-                .net-salary {{
-                    font-size: 18px;
-                    color: #28a745;
-                    text-align: center;
-                    margin: 20px 0;
-                    padding: 15px;
-                    background: #d4edda;
-                    border-radius: 5px;
-                }}
-                .footer {{
-                    margin-top: 40px;
-                    text-align: center;
-                    color: #666;
-                    font-size: 12px;
-                }}
-                @media print {{
-                    body {{ margin: 0; }}
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <div class="company-name">ERP System</div>
-                <div class="payslip-title">Employee Payslip</div>
-            </div>
-
-            <div class="employee-info">
-                <div class="info-section">
-                    <h3>Employee Details</h3>
-                    <div class="info-row">
-                        <span>Name:</span>
-                        <span>{employee.full_name}</span>
-                    </div>
-                    <div class="info-row">
-                        <span>Employee ID:</span>
-                        <span>{employee.employee_id}</span>
-                    </div>
-                    <div class="info-row">
-                        <span>Department:</span>
-                        <span>{employee.department}</span>
-                    </div>
-                    <div class="info-row">
-                        <span>Designation:</span>
-                        <span>{employee.designation}</span>
-                    </div>
-                </div>
-
-                <div class="info-section">
-                    <h3>Pay Period</h3>
-                    <div class="info-row">
-                        <span>From:</span>
-                        <span>{pay_period_start}</span>
-                    </div>
-                    <div class="info-row">
-                        <span>To:</span>
-                        <span>{pay_period_end}</span>
-                    </div>
-                    <div class="info-row">
-                        <span>Payment Date:</span>
-                        <span>{payment_date}</span>
-                    </div>
-                    <div class="info-row">
-                        <span>Status:</span>
-                        <span>{payroll.status.title() if payroll.status else 'Pending'}</span>
-                    </div>
-                </div>
-            </div>
-
-            <div class="salary-breakdown">
-                <h3 style="color: #007bff; margin-bottom: 20px;">Salary Breakdown</h3>
-                <table class="salary-table">
-                    <thead>
-                        <tr>
-                            <th>Description</th>
-                            <th>Amount (₹)</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-                        <tr>
-                            <td>{basic_label}</td>
-                            <td>{basic_amount}</td>
-                        </tr>
-                        <tr>
-                            <td>Allowances</td>
-                            <td>{payroll.allowances:,.2f}</td>
-                        </tr>
-                        <tr class="total-row">
-                            <td>Gross Salary</td>
-                            <td>{payroll.gross_salary:,.2f}</td>
-                        </tr>
-                        <tr>
-                            <td colspan="2" style="font-weight: bold; background: #f8f9fa;">Deductions</td>
-                        </tr>
-                        <tr>
-                            <td>&nbsp;&nbsp;Provident Fund (12%)</td>
-                            <td>({pf_deduction:,.2f})</td>
-                        </tr>
-                        <tr>
-                            <td>&nbsp;&nbsp;ESI (0.75%)</td>
-                            <td>({esi_deduction:,.2f})</td>
-                        </tr>
-                        <tr>
-                            <td>&nbsp;&nbsp;Professional Tax</td>
-                            <td>({pt_deduction:,.2f})</td>
-                        </tr>
-                        <tr>
-                            <td>&nbsp;&nbsp;Income Tax (5%)</td>
-                            <td>({it_deduction:,.2f})</td>
-                        </tr>
-                        <tr class="total-row">
-                            <td>Total Deductions</td>
-                            <td>({payroll.deductions:,.2f})</td>
-                        </tr>
-                        <tr class="total-row">
-                            <td>Net Salary</td>
-                            <td>{payroll.net_salary:,.2f}</td>
-                        </tr>
-                    </tbody>
-                </table>
-            </div>
-
-            <div class="net-salary">
-                <strong>Net Salary Payable: ₹{payroll.net_salary:,.2f}</strong>
-            </div>
-
-            <div class="footer">
-                <p>This is a computer-generated payslip and does not require a signature.</p>
-                <p>Generated on {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}</p>
-            </div>
-        </body>
-        </html>
-        """
-
-        return payslip_html
+        return PAYSLIP_TEMPLATE.render(
+            payroll=payroll,
+            employee=employee,
+            pay_period_start=pay_period_start,
+            pay_period_end=pay_period_end,
+            payment_date=payment_date,
+            basic_label=basic_label,
+            basic_amount=basic_amount,
+            pf_deduction=pf_deduction,
+            esi_deduction=esi_deduction,
+            pt_deduction=pt_deduction,
+            it_deduction=it_deduction,
+            generated_at=datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+        )
 
     # Recruitment Management
     @staticmethod
@@ -1223,6 +1325,7 @@ class HRService:
 
         db.session.add(job)
         db.session.commit()
+        HRService.invalidate_dashboard_cache()
         return job.to_dict()
 
     @staticmethod
@@ -1245,6 +1348,7 @@ class HRService:
 
         job.status = JobStatus(status.upper())
         db.session.commit()
+        HRService.invalidate_dashboard_cache()
         return job.to_dict()
 
     @staticmethod
@@ -1280,6 +1384,7 @@ class HRService:
             job.status = JobStatus(job_data['status'].upper())
 
         db.session.commit()
+        HRService.invalidate_dashboard_cache()
         return job.to_dict()
 
     @staticmethod
@@ -1291,6 +1396,7 @@ class HRService:
 
         db.session.delete(job)
         db.session.commit()
+        HRService.invalidate_dashboard_cache()
         return {'message': 'Job posting deleted successfully'}
 
     # Job Application Management
@@ -1362,8 +1468,8 @@ class HRService:
         return application.to_dict()
 
     @staticmethod
-    def get_job_applications(job_posting_id=None, candidate_id=None, status=None):
-        """Get job applications with optional filtering"""
+    def get_job_applications(job_posting_id=None, candidate_id=None, status=None, page=None):
+        """Get job applications with optional filtering, as a Page when a PageRequest is given"""
         query = JobApplication.query.options(db.joinedload(JobApplication.candidate))
 
         if job_posting_id:
@@ -1376,6 +1482,8 @@ class HRService:
             except (ValueError, KeyError):
                 pass
 
+        if page is not None:
+            return paginate(query, page, JobApplication.id).map(lambda app: app.to_dict())
         applications = query.order_by(JobApplication.created_at.desc()).all()
         return [app.to_dict() for app in applications]
 
@@ -1535,8 +1643,8 @@ class HRService:
         return candidate.to_dict()
 
     @staticmethod
-    def get_candidates(search=None, status=None):
-        """Get candidates with optional filtering"""
+    def get_candidates(search=None, status=None, page=None):
+        """Get candidates with optional filtering, as a Page when a PageRequest is given"""
         query = Candidate.query
 
         if search:
@@ -1550,6 +1658,8 @@ class HRService:
                 )
             )
 
+        if page is not None:
+            return paginate(query, page, Candidate.id).map(lambda candidate: candidate.to_dict())
         candidates = query.order_by(Candidate.created_at.desc()).all()
         return [candidate.to_dict() for candidate in candidates]
 
@@ -1616,91 +1726,66 @@ class HRService:
 
     @staticmethod
     def export_payroll_report():
-        """Export payroll report as Excel file"""
-        try:
-            from openpyxl import Workbook
-            from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-            from io import BytesIO
-
-            # Get all payroll records with employee data
-            payrolls = Payroll.query.join(Employee).order_by(Payroll.pay_period_end.desc()).all()
-
-            # Create workbook and worksheet
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Payroll Report"
-
-            # Define styles
-            header_font = Font(bold=True, color="FFFFFF")
-            header_fill = PatternFill(start_color="007BFF", end_color="007BFF", fill_type="solid")
-            border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-            center_alignment = Alignment(horizontal='center')
-            right_alignment = Alignment(horizontal='right')
-
-            # Headers
-            headers = [
-                'Employee ID', 'Employee Name', 'Department', 'Designation',
-                'Pay Period Start', 'Pay Period End', 'Monthly Salary', 'Allowances',
-                'Gross Salary', 'Deductions', 'Net Salary', 'Status', 'Payment Date'
-            ]
-
-            # Write headers
-            for col_num, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col_num, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = center_alignment
-                cell.border = border
-
-            # Write data
-            for row_num, payroll in enumerate(payrolls, 2):
-                employee = payroll.employee
-
-                data = [
-                    employee.employee_id if employee else '',
-                    employee.full_name if employee else '',
-                    employee.department if employee else '',
-                    employee.designation if employee else '',
-                    payroll.pay_period_start.strftime('%d/%m/%Y') if payroll.pay_period_start else '',
-                    payroll.pay_period_end.strftime('%d/%m/%Y') if payroll.pay_period_end else '',
-                    f"{payroll.monthly_salary:,.2f}" if payroll.monthly_salary else '0.00',
-                    f"{payroll.allowances:,.2f}" if payroll.allowances else '0.00',
-                    f"{payroll.gross_salary:,.2f}" if payroll.gross_salary else '0.00',
-                    f"{payroll.deductions:,.2f}" if payroll.deductions else '0.00',
-                    f"{payroll.net_salary:,.2f}" if payroll.net_salary else '0.00',
-                    payroll.status.title() if payroll.status else 'Pending',
-                    payroll.payment_date.strftime('%d/%m/%Y') if payroll.payment_date else ''
-                ]
-
-                for col_num, value in enumerate(data, 1):
-                    cell = ws.cell(row=row_num, column=col_num, value=value)
-                    cell.border = border
-                    if col_num >= 7 and col_num <= 11:  # Salary columns
-                        cell.alignment = right_alignment
-
-            # Auto-adjust column widths
-            for col_num, header in enumerate(headers, 1):
-                column_letter = ws.cell(row=1, column=col_num).column_letter
-                max_length = len(header)
-                for row in range(1, len(payrolls) + 2):
-                    cell_value = str(ws.cell(row=row, column=col_num).value or '')
-                    max_length = max(max_length, len(cell_value))
-                ws.column_dimensions[column_letter].width = min(max_length + 2, 30)
-
+        """
+        Export payroll report as Excel file
 
-            # (Summary rows removed as per request; only table data will be exported)
+        Rows are streamed from the database in batches into a write-only
+        workbook, so memory stays flat regardless of how many payrolls exist.
 
-            # Save to BytesIO
-            excel_buffer = BytesIO()
-            wb.save(excel_buffer)
-            excel_buffer.seek(0)
+        Returns:
+            A temp file object positioned at the start of the .xlsx data
+        """
+        try:
+            workbook = StreamingWorkbook()
+            sheet = workbook.add_sheet(
+                "Payroll Report",
+                [
+                    'Employee ID', 'Employee Name', 'Department', 'Designation',
+                    'Pay Period Start', 'Pay Period End', 'Monthly Salary', 'Allowances',
+                    'Gross Salary', 'Deductions', 'Net Salary', 'Status', 'Payment Date'
+                ],
+                styled=True,
+                right_aligned_columns=range(6, 11),  # Salary columns
+                max_width=30
+            )
 
-            return excel_buffer
+            rows = db.session.query(
+                Employee.employee_id,
+                Employee.first_name,
+                Employee.last_name,
+                Employee.department,
+                Employee.designation,
+                Payroll.pay_period_start,
+                Payroll.pay_period_end,
+                Payroll.monthly_salary,
+                Payroll.allowances,
+                Payroll.gross_salary,
+                Payroll.deductions,
+                Payroll.net_salary,
+                Payroll.status,
+                Payroll.payment_date
+            ).join(
+                Employee, Employee.id == Payroll.employee_id
+            ).order_by(Payroll.pay_period_end.desc()).yield_per(500)
+
+            for row in rows:
+                sheet.append([
+                    row.employee_id or '',
+                    f"{row.first_name} {row.last_name}",
+                    row.department or '',
+                    row.designation or '',
+                    row.pay_period_start.strftime('%d/%m/%Y') if row.pay_period_start else '',
+                    row.pay_period_end.strftime('%d/%m/%Y') if row.pay_period_end else '',
+                    f"{row.monthly_salary:,.2f}" if row.monthly_salary else '0.00',
+                    f"{row.allowances:,.2f}" if row.allowances else '0.00',
+                    f"{row.gross_salary:,.2f}" if row.gross_salary else '0.00',
+                    f"{row.deductions:,.2f}" if row.deductions else '0.00',
+                    f"{row.net_salary:,.2f}" if row.net_salary else '0.00',
+                    row.status.title() if row.status else 'Pending',
+                    row.payment_date.strftime('%d/%m/%Y') if row.payment_date else ''
+                ])
+
+            return workbook.save()
 
         except Exception as e:
             print(f"Error generating payroll report: {e}")
@@ -1972,3 +2057,22 @@ class HRService:
                 'count': 0,
                 'employees': []
             }
+
+
+def render_payslips_zip_job(payload):
+    """Background job handler for 'render_payslips_zip'; stores the ZIP in the render cache"""
+    documents = HRService.payslip_documents(payload['startDate'], payload['endDate'])
+    key = DocumentRenderService.zip_key(documents)
+    if DocumentRenderService.cached_zip_path(key) is None:
+        zip_file = DocumentRenderService.render_zip(documents)
+        try:
+            DocumentRenderService.store_zip(key, zip_file)
+        finally:
+            zip_file.close()
+    filename = f"payslips_{payload['startDate']}_{payload['endDate']}.zip"
+    return {
+        'key': key,
+        'count': len(documents),
+        'filename': filename,
+        'downloadUrl': f'/api/hr/payrolls/payslips/batch/{key}?filename={filename}'
+    }
@@ -0,0 +1,192 @@
+"""
+Inventory allocation engine
+Row-locked, single-flush allocation of store inventory against material requirements
+"""
+from sqlalchemy.exc import OperationalError
+from utils.timezone_helpers import get_ist_now
+from models import db, StoreInventory
+from services.stock_ledger_service import StockLedgerService
+
+
+class StockConflictError(Exception):
+    """Raised when a concurrent writer changed stock between planning and applying"""
+
+
+class InventoryAllocationService:
+    """Service class for race-free inventory allocation"""
+
+    MAX_ATTEMPTS = 3
+
+    @staticmethod
+    def lock_items_by_name(names):
+        """
+        Load inventory items for the given names in one locking query
+
+        Rows are locked with SELECT ... FOR UPDATE in primary key order so two
+        transactions allocating overlapping materials always acquire locks in
+        the same order and cannot deadlock. Names are matched on the indexed
+        name_key; when several rows share a name the lowest id wins.
+
+        Args:
+            names: Iterable of material names
+
+        Returns:
+            dict: normalized name -> StoreInventory
+        """
+        keys = sorted({StoreInventory.normalize_name(name) for name in names if name})
+        if not keys:
+            return {}
+
+        items = StoreInventory.query.filter(
+            StoreInventory.name_key.in_(keys)
+        ).order_by(StoreInventory.id).with_for_update().populate_existing().all()
+
+        items_by_name = {}
+        for item in items:
+            items_by_name.setdefault(item.name_key, item)
+        return items_by_name
+
+    @staticmethod
+    def plan_allocation(materials, items_by_name):
+        """
+        Compute a full or partial allocation in memory
+
+        Materials are checked against a running balance so repeated names in
+        one requirement list cannot be allocated twice from the same stock.
+
+        Args:
+            materials: List of {'name', 'quantity'} dicts
+            items_by_name: Locked inventory rows from lock_items_by_name
+
+        Returns:
+            dict: stockCheck, shortages, allAvailable, partialAllocated and
+                  allocations (inventory id -> quantity to decrement)
+        """
+        balances = {name: item.quantity for name, item in items_by_name.items()}
+        stock_check_results = []
+        shortages = []
+        allocations = {}
+        all_available = True
+        partial_allocated = False
+
+        for material in materials:
+            name = material['name']
+            name_key = StoreInventory.normalize_name(name)
+            item = items_by_name.get(name_key)
+            required_qty = material.get('quantity', 0)
+            available_qty = balances.get(name_key, 0)
+
+            is_sufficient = available_qty >= required_qty
+            if not is_sufficient:
+                all_available = False
+                shortages.append({
+                    'name': name,
+                    'quantity': required_qty - available_qty
+                })
+
+            stock_check_results.append({
+                'material': name,
+                'required': required_qty,
+                'available': available_qty,
+                'sufficient': is_sufficient
+            })
+
+            if item is None or available_qty <= 0:
+                continue
+
+            allocated = min(required_qty, available_qty)
+            if allocated < required_qty:
+                partial_allocated = True
+            if allocated > 0:
+                allocations[item.id] = allocations.get(item.id, 0) + allocated
+                balances[name_key] = available_qty - allocated
+
+        return {
+            'stockCheck': stock_check_results,
+            'shortages': shortages,
+            'allAvailable': all_available,
+            'partialAllocated': partial_allocated,
+            'allocations': allocations
+        }
+
+    @staticmethod
+    def apply_allocations(items_by_name, allocations, reference_type=None, reference_id=None):
+        """
+        Apply planned decrements and flush them together
+
+        Decrements are written as quantity = quantity - n so the database
+        applies them against the current row value, and each one is recorded
+        as an 'allocation' movement in the stock ledger. After the flush the
+        touched rows are re-checked; a negative balance means a concurrent
+        writer slipped past the lock (e.g. SQLite, which ignores FOR UPDATE)
+        and raises StockConflictError so the caller can roll back and retry.
+        """
+        if not allocations:
+            return
+
+        now = get_ist_now()
+        movements = []
+        for item in items_by_name.values():
+            quantity = allocations.get(item.id)
+            if quantity:
+                item.quantity = StoreInventory.quantity - quantity
+                item.updated_at = now
+                movements.append({
+                    'inventory_id': item.id,
+                    'item_name': item.name,
+                    'quantity_change': -quantity,
+                    'movement_type': 'allocation',
+                    'reference_type': reference_type,
+                    'reference_id': reference_id
+                })
+
+        db.session.flush()
+        StockLedgerService.record_many(movements)
+
+        oversold = db.session.query(StoreInventory.id).filter(
+            StoreInventory.id.in_(list(allocations.keys())),
+            StoreInventory.quantity < 0
+        ).first()
+        if oversold:
+            raise StockConflictError('Stock changed during allocation')
+
+    @classmethod
+    def allocate(cls, materials, allow_partial=True, reference_type=None, reference_id=None):
+        """
+        Lock, plan and apply an allocation within the current transaction
+
+        Args:
+            materials: List of {'name', 'quantity'} dicts
+            allow_partial: Apply partial allocations when stock is short
+            reference_type: Ledger reference for the movements (e.g. 'purchase_order')
+            reference_id: Id of the referenced record
+
+        Returns:
+            dict: The allocation plan (see plan_allocation)
+        """
+        materials = [m for m in materials if isinstance(m, dict) and 'name' in m]
+        items_by_name = cls.lock_items_by_name(m['name'] for m in materials)
+        plan = cls.plan_allocation(materials, items_by_name)
+
+        if plan['allAvailable'] or allow_partial:
+            cls.apply_allocations(items_by_name, plan['allocations'], reference_type, reference_id)
+        else:
+            plan['allocations'] = {}
+
+        return plan
+
+    @classmethod
+    def run_with_retry(cls, unit_of_work):
+        """
+        Run a unit of work that allocates stock and commits, retrying on conflicts
+
+        The callable must do all of its reads inside the call (it runs again
+        from scratch after a rollback) and commit on success.
+        """
+        for attempt in range(1, cls.MAX_ATTEMPTS + 1):
+            try:
+                return unit_of_work()
+            except (StockConflictError, OperationalError):
+                db.session.rollback()
+                if attempt == cls.MAX_ATTEMPTS:
+                    raise
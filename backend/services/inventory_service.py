@@ -2,23 +2,32 @@
 Inventory management business logic service
 """
 from datetime import datetime
+from sqlalchemy import inspect
 from utils.timezone_helpers import get_ist_now
 from models import db, StoreInventory, PurchaseOrder, ProductionOrder
+from utils.pagination import paginate
 from utils.validators import validate_required_fields
+from services.inventory_allocation_service import InventoryAllocationService
+from services.stock_ledger_service import StockLedgerService
 import json
 
 class InventoryService:
     """Service class for inventory operations"""
+
+    # API sort names accepted by the paged list endpoints
+    INVENTORY_SORT_FIELDS = {'name': StoreInventory.name, 'updatedAt': StoreInventory.updated_at}
     
     @staticmethod
-    def get_all_inventory(search=None):
-        """Get all inventory items with optional search"""
+    def get_all_inventory(search=None, page=None):
+        """Get all inventory items with optional search, as a Page when a PageRequest is given"""
         try:
             query = StoreInventory.query
             
             if search:
                 query = query.filter(StoreInventory.name.ilike(f'%{search}%'))
             
+            if page is not None:
+                return paginate(query, page, StoreInventory.id).map(lambda item: item.to_dict())
             inventory = query.order_by(StoreInventory.name).all()
             return [item.to_dict() for item in inventory]
         except Exception as e:
@@ -32,10 +41,13 @@ class InventoryService:
             validate_required_fields(data, required_fields)
             
             # Check if item already exists
-            existing_item = StoreInventory.query.filter_by(name=data['name']).first()
+            existing_item = InventoryService.find_items_by_name([data['name']]).get(
+                StoreInventory.normalize_name(data['name'])
+            )
             
             if existing_item:
                 existing_item.add_stock(int(data['quantity']))
+                StockLedgerService.record(existing_item, int(data['quantity']), 'manual_add')
                 db.session.commit()
                 return {
                     'message': f'Updated existing item: {data["name"]}',
@@ -50,6 +62,7 @@ class InventoryService:
             )
             
             db.session.add(new_item)
+            StockLedgerService.record(new_item, new_item.quantity, 'manual_add')
             db.session.commit()
             
             return {
@@ -68,7 +81,9 @@ class InventoryService:
             item = StoreInventory.query.get_or_404(item_id)
             
             if 'quantity' in data:
-                item.quantity = int(data['quantity'])
+                new_quantity = int(data['quantity'])
+                StockLedgerService.record(item, new_quantity - item.quantity, 'adjustment', notes='Manual quantity correction')
+                item.quantity = new_quantity
             if 'name' in data:
                 item.name = data['name']
             if 'category' in data:
@@ -101,108 +116,81 @@ class InventoryService:
     def check_stock_availability(purchase_order_id):
         """Check stock availability for a purchase order and allocate if possible"""
         try:
-            order = PurchaseOrder.query.get_or_404(purchase_order_id)
-            
-            if not order.materials:
-                raise Exception('No materials specified in order')
+            return InventoryAllocationService.run_with_retry(
+                lambda: InventoryService._allocate_purchase_order(purchase_order_id)
+            )
+        except Exception as e:
+            db.session.rollback()
+            raise Exception(f"Error checking stock: {str(e)}")
 
-            materials = order.get_materials_list()
-
-            # Check stock availability
-            stock_check_results = []
-            all_available = True
-            shortages = []
-
-            for material in materials:
-                if not isinstance(material, dict) or 'name' not in material:
-                    continue
-
-                inventory_item = StoreInventory.query.filter_by(name=material['name']).first()
-                required_qty = material.get('quantity', 0)
-                available_qty = inventory_item.quantity if inventory_item else 0
-
-                is_sufficient = available_qty >= required_qty
-                if not is_sufficient:
-                    all_available = False
-                    shortages.append({
-                        "name": material['name'], 
-                        "quantity": required_qty - available_qty
-                    })
-
-                stock_check_results.append({
-                    'material': material['name'],
-                    'required': required_qty,
-                    'available': available_qty,
-                    'sufficient': is_sufficient
-                })
-
-            if all_available:
-                # Allocate all materials
-                for material in materials:
-                    inventory_item = StoreInventory.query.filter_by(name=material['name']).first()
-                    if inventory_item:
-                        inventory_item.allocate(material.get('quantity', 0))
+    @staticmethod
+    def _allocate_purchase_order(purchase_order_id):
+        """Lock the purchase order and its inventory rows, allocate, and commit"""
+        # Lock the order row so two clerks cannot allocate the same order twice
+        order = PurchaseOrder.query.filter_by(
+            id=purchase_order_id
+        ).with_for_update().populate_existing().first_or_404()
 
-                order.status = 'store_allocated'
-                production_order = ProductionOrder.query.get(order.production_order_id)
-                if production_order:
-                    production_order.status = 'materials_allocated'
+        if order.status == 'store_allocated':
+            raise ValueError('Materials already allocated for this order')
 
-                db.session.commit()
-                
-                return {
-                    "message": "All stock sufficient. Materials allocated to Assembly.",
-                    "allAvailable": True,
-                    "newStatus": order.status,
-                    "purchaseOrder": order.to_dict()
-                }
-            else:
-                # Handle partial allocation
-                partial_allocated = False
-
-                for material in materials:
-                    inventory_item = StoreInventory.query.filter_by(name=material['name']).first()
-                    required_qty = material.get('quantity', 0)
-                    available_qty = inventory_item.quantity if inventory_item else 0
-
-                    if available_qty > 0:
-                        allocated = min(required_qty, available_qty)
-                        inventory_item.allocate(allocated)
-                        if allocated < required_qty:
-                            partial_allocated = True
-
-                if shortages and partial_allocated:
-                    order.status = 'partially_allocated'
-                    order.set_materials_list(shortages)
-                    # Save original requirements if not already saved
-                    if not order.original_requirements:
-                        order.set_original_requirements(materials)
-                    
-                    production_order = ProductionOrder.query.get(order.production_order_id)
-                    if production_order:
-                        production_order.status = 'partially_allocated'
-                else:
-                    order.status = 'insufficient_stock'
-                    order.set_materials_list(shortages)
-                    # Save original requirements if not already saved
-                    if not order.original_requirements:
-                        order.set_original_requirements(materials)
+        if not order.materials:
+            raise Exception('No materials specified in order')
 
-                db.session.commit()
-                
-                message = "Partial allocation done. Shortage sent to Purchase." if partial_allocated else "Stock insufficient . Sent back to Purchase"
-                
-                return {
-                    "message": message,
-                    "allAvailable": False,
-                    "shortages": shortages,
-                    "newStatus": order.status,
-                    "purchaseOrder": order.to_dict()
-                }
+        materials = order.get_materials_list()
+        plan = InventoryAllocationService.allocate(
+            materials,
+            reference_type='purchase_order',
+            reference_id=order.id
+        )
+        shortages = plan['shortages']
 
-        except Exception as e:
-            db.session.rollback()
-            raise Exception(f"Error checking stock: {str(e)}")
+        if plan['allAvailable']:
+            order.status = 'store_allocated'
+            production_order = ProductionOrder.query.get(order.production_order_id)
+            if production_order:
+                production_order.status = 'materials_allocated'
+
+            db.session.commit()
+
+            return {
+                "message": "All stock sufficient. Materials allocated to Assembly.",
+                "allAvailable": True,
+                "newStatus": order.status,
+                "purchaseOrder": order.to_dict()
+            }
+
+        # Handle partial allocation
+        partial_allocated = plan['partialAllocated']
+
+        if shortages and partial_allocated:
+            order.status = 'partially_allocated'
+            order.set_materials_list(shortages)
+            # Save original requirements if not already saved
+            if not order.original_requirements:
+                order.set_original_requirements(materials)
+
+            production_order = ProductionOrder.query.get(order.production_order_id)
+            if production_order:
+                production_order.status = 'partially_allocated'
+        else:
+            order.status = 'insufficient_stock'
+            order.set_materials_list(shortages)
+            # Save original requirements if not already saved
+            if not order.original_requirements:
+                order.set_original_requirements(materials)
+
+        db.session.commit()
+
+        message = "Partial allocation done. Shortage sent to Purchase." if partial_allocated else "Stock insufficient . Sent back to Purchase"
+
+        return {
+            "message": message,
+            "allAvailable": False,
+            "shortages": shortages,
+            "newStatus": order.status,
+            "purchaseOrder": order.to_dict()
+        }
     
     @staticmethod
     def process_purchase_verification(purchase_order_id):
@@ -231,6 +219,12 @@ class InventoryService:
             extra_materials = order.get_extra_materials()
             print(f"[STORE VERIFICATION] Extra materials: {extra_materials}")
             
+            # Resolve every inventory item this order touches in one query
+            items_by_key = InventoryService.find_items_by_name(
+                material['name'] for material in purchased_materials + extra_materials
+                if isinstance(material, dict) and 'name' in material
+            )
+            
             if not original_requirements:
                 # If no original requirements, this is a direct purchase - add all to inventory
                 print("[STORE VERIFICATION] No original requirements - adding all to general inventory")
@@ -242,7 +236,7 @@ class InventoryService:
                     material_name = material['name']
                     material_qty = material.get('quantity', 0)
                     
-                    inventory_item = StoreInventory.query.filter_by(name=material_name).first()
+                    inventory_item = items_by_key.get(StoreInventory.normalize_name(material_name))
                     if inventory_item:
                         inventory_item.add_stock(material_qty)
                         print(f"[STORE VERIFICATION]   {material_name}: Added {material_qty} to inventory")
@@ -253,7 +247,12 @@ class InventoryService:
                             category=material.get('category', 'Raw Material')
                         )
                         db.session.add(inventory_item)
+                        items_by_key[inventory_item.name_key] = inventory_item
                         print(f"[STORE VERIFICATION]   {material_name}: Created new item with {material_qty}")
+                    StockLedgerService.record(
+                        inventory_item, material_qty, 'purchase_receipt',
+                        reference_type='purchase_order', reference_id=order.id
+                    )
             else:
                 # Process purchased shortage materials - allocate directly to production
                 print("[STORE VERIFICATION] Allocating purchased shortage materials directly to production...")
@@ -269,7 +268,7 @@ class InventoryService:
                     print(f"[STORE VERIFICATION]   Shortage purchased: {purchased_qty}")
                     
                     # Get or create inventory item
-                    inventory_item = StoreInventory.query.filter_by(name=material_name).first()
+                    inventory_item = items_by_key.get(StoreInventory.normalize_name(material_name))
                     if not inventory_item:
                         inventory_item = StoreInventory(
                             name=material_name,
@@ -277,7 +276,7 @@ class InventoryService:
                             category=material.get('category', 'Raw Material')
                         )
                         db.session.add(inventory_item)
-                        db.session.flush()
+                        items_by_key[inventory_item.name_key] = inventory_item
                         print(f"[STORE VERIFICATION]   Created new inventory item")
                     
                     # All purchased shortage materials are allocated directly to production (reserved)
@@ -293,7 +292,7 @@ class InventoryService:
                     material_name = material['name']
                     material_qty = material.get('quantity', 0)
                     
-                    inventory_item = StoreInventory.query.filter_by(name=material_name).first()
+                    inventory_item = items_by_key.get(StoreInventory.normalize_name(material_name))
                     if inventory_item:
                         inventory_item.add_stock(material_qty)
                         print(f"[STORE VERIFICATION]   {material_name}: Added {material_qty} extra to inventory")
@@ -304,7 +303,12 @@ class InventoryService:
                             category=material.get('category', 'Raw Material')
                         )
                         db.session.add(inventory_item)
+                        items_by_key[inventory_item.name_key] = inventory_item
                         print(f"[STORE VERIFICATION]   {material_name}: Created new item with {material_qty} extra")
+                    StockLedgerService.record(
+                        inventory_item, material_qty, 'purchase_receipt',
+                        reference_type='purchase_order', reference_id=order.id, notes='Extra material'
+                    )
             
             # Mark order verified and materials allocated
             order.status = 'store_allocated'
@@ -326,37 +330,180 @@ class InventoryService:
             db.session.rollback()
             raise Exception(f"Error verifying purchase: {str(e)}")
     
+    @staticmethod
+    def find_items_by_name(names):
+        """
+        Resolve inventory items for many names in one query
+
+        Args:
+            names: Iterable of item names (matched trimmed and case-insensitively)
+
+        Returns:
+            dict: normalized name -> StoreInventory (lowest id when names repeat)
+        """
+        keys = {StoreInventory.normalize_name(name) for name in names if name}
+        if not keys:
+            return {}
+
+        items = StoreInventory.query.filter(
+            StoreInventory.name_key.in_(keys)
+        ).order_by(StoreInventory.id).all()
+
+        items_by_key = {}
+        for item in items:
+            items_by_key.setdefault(item.name_key, item)
+        return items_by_key
+
+    _item_key_unique_binds = set()  # Engine URLs where the unique item_key index was found
+
+    @staticmethod
+    def _require_unique_item_key(bind):
+        """
+        Raise unless store_inventory.item_key has a unique index
+
+        Without it the upserts below insert a second row per item (MySQL) or
+        fail (SQLite). Migration 0016 creates the index once duplicate items
+        are merged.
+        """
+        url = str(bind.engine.url)
+        if url in InventoryService._item_key_unique_binds:
+            return
+
+        inspector = inspect(bind)
+        unique_sets = [
+            index['column_names'] for index in inspector.get_indexes(StoreInventory.__tablename__) if index.get('unique')
+        ] + [
+            constraint['column_names'] for constraint in inspector.get_unique_constraints(StoreInventory.__tablename__)
+        ]
+        if ['item_key'] not in unique_sets:
+            raise Exception(
+                "store_inventory.item_key has no unique index; run the database migrations "
+                "(0016_store_inventory_key) before adding stock in bulk"
+            )
+        InventoryService._item_key_unique_binds.add(url)
+
+    @staticmethod
+    def _upsert_stock(rows, chunk_size=500):
+        """
+        Insert new items and increment existing ones by item_key in bulk
+
+        Uses INSERT ... ON DUPLICATE KEY UPDATE on MySQL and
+        INSERT ... ON CONFLICT DO UPDATE on SQLite, one statement per chunk.
+        Both rely on the unique index on item_key, which is checked first.
+
+        Args:
+            rows: List of dicts with name, category, quantity, name_key, item_key
+        """
+        table = StoreInventory.__table__
+        bind = db.session.get_bind()
+        dialect = bind.dialect.name
+        if dialect in ('mysql', 'sqlite'):
+            InventoryService._require_unique_item_key(bind)
+        now = get_ist_now()
+        values = [dict(row, created_at=now, updated_at=now) for row in rows]
+
+        for start in range(0, len(values), chunk_size):
+            chunk = values[start:start + chunk_size]
+
+            if dialect == 'mysql':
+                from sqlalchemy.dialects.mysql import insert
+                stmt = insert(table).values(chunk)
+                stmt = stmt.on_duplicate_key_update(
+                    quantity=table.c.quantity + stmt.inserted.quantity,
+                    updated_at=stmt.inserted.updated_at
+                )
+            elif dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+                stmt = insert(table).values(chunk)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[table.c.item_key],
+                    set_={
+                        'quantity': table.c.quantity + stmt.excluded.quantity,
+                        'updated_at': stmt.excluded.updated_at
+                    }
+                )
+            else:
+                # No native upsert available - fall back to per-row ORM updates
+                existing = {
+                    item.item_key: item for item in StoreInventory.query.filter(
+                        StoreInventory.item_key.in_([row['item_key'] for row in chunk])
+                    ).all()
+                }
+                for row in chunk:
+                    item = existing.get(row['item_key'])
+                    if item:
+                        item.add_stock(row['quantity'])
+                    else:
+                        db.session.add(StoreInventory(
+                            name=row['name'],
+                            quantity=row['quantity'],
+                            category=row['category']
+                        ))
+                db.session.flush()
+                continue
+
+            db.session.execute(stmt)
+
     @staticmethod
     def bulk_add_inventory_items(items_data):
         """Add multiple inventory items or update existing quantities"""
         try:
-            results = []
+            required_fields = ['name', 'quantity']
             for data in items_data:
-                required_fields = ['name', 'quantity']
                 validate_required_fields(data, required_fields)
 
-                # Check if item already exists
-                existing_item = StoreInventory.query.filter_by(name=data['name']).first()
+            # Resolve all names in one query; existing items keep their own category
+            items_by_key = InventoryService.find_items_by_name(data['name'] for data in items_data)
+
+            rows = {}
+            actions = []
+            for data in items_data:
+                name_key = StoreInventory.normalize_name(data['name'])
+                existing_item = items_by_key.get(name_key)
 
                 if existing_item:
-                    existing_item.add_stock(int(data['quantity']))
-                    results.append({
-                        'action': 'updated',
-                        'item': existing_item.to_dict()
-                    })
+                    name, category = existing_item.name, existing_item.category
                 else:
-                    # Create new item
-                    new_item = StoreInventory(
-                        name=data['name'],
-                        quantity=int(data['quantity']),
-                        category=data.get('category', 'Raw Material')
-                    )
+                    name, category = data['name'], data.get('category', 'Raw Material')
+                item_key = existing_item.item_key if existing_item else StoreInventory.make_item_key(name, category)
+
+                row = rows.get(item_key)
+                if row:
+                    row['quantity'] += int(data['quantity'])
+                    action = 'updated'
+                else:
+                    rows[item_key] = {
+                        'name': name,
+                        'category': category,
+                        'quantity': int(data['quantity']),
+                        'name_key': name_key,
+                        'item_key': item_key
+                    }
+                    action = 'updated' if existing_item else 'added'
+                actions.append((action, item_key))
 
-                    db.session.add(new_item)
-                    results.append({
-                        'action': 'added',
-                        'item': new_item.to_dict()
-                    })
+            InventoryService._upsert_stock(list(rows.values()))
+
+            # Reload the affected rows once to report their new balances
+            items = StoreInventory.query.filter(
+                StoreInventory.item_key.in_(list(rows.keys()))
+            ).populate_existing().all()
+            item_dicts = {item.item_key: item.to_dict() for item in items}
+
+            StockLedgerService.record_many([
+                {
+                    'inventory_id': item.id,
+                    'item_name': item.name,
+                    'quantity_change': rows[item.item_key]['quantity'],
+                    'movement_type': 'bulk_add'
+                }
+                for item in items
+            ])
+
+            results = [
+                {'action': action, 'item': item_dicts.get(item_key)}
+                for action, item_key in actions
+            ]
 
             db.session.commit()
 
@@ -382,11 +529,13 @@ class InventoryService:
                 {'name': 'Metal Brackets', 'quantity': 150, 'category': 'Component'}
             ]
 
+            existing_items = InventoryService.find_items_by_name(item['name'] for item in sample_items)
             for item_data in sample_items:
-                existing = StoreInventory.query.filter_by(name=item_data['name']).first()
+                existing = existing_items.get(StoreInventory.normalize_name(item_data['name']))
                 if not existing:
                     item = StoreInventory(**item_data)
                     db.session.add(item)
+                    StockLedgerService.record(item, item.quantity, 'manual_add', notes='Sample data')
 
             db.session.commit()
             return {'message': 'Sample inventory data initialized'}
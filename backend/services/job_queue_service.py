@@ -0,0 +1,381 @@
+"""
+Job Queue Service Module
+Durable background jobs (emails, face encoding, batch payroll, payslip ZIPs)
+stored in the background_jobs table
+
+Requests only insert a row; a JobWorker claims due rows, runs the handler
+registered for the job type and records the result. Failed jobs are retried
+with exponential backoff up to max_attempts, and jobs left 'running' by a
+crashed worker are requeued after JOB_LOCK_TIMEOUT_SECONDS.
+
+JOB_QUEUE_MODE selects where workers run:
+    thread  - a worker thread inside each web process (default)
+    worker  - only scripts/job_worker.py processes; web processes just enqueue
+    inline  - run the job synchronously inside enqueue() (tests)
+"""
+import importlib
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from models import db
+from models.background_job import BackgroundJob
+from utils.timezone_helpers import get_ist_now
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ('queued', 'running', 'succeeded', 'failed')
+
+
+class JobQueueService:
+    """Service class for enqueuing and running background jobs"""
+
+    # Job type -> 'module:function'; handlers take the payload dict and return
+    # a JSON-serializable result. Resolved on first use so heavy handler
+    # modules are only imported by processes that actually run the job.
+    HANDLERS = {
+        'send_email': 'utils.mail:send_email_job',
+        'send_bulk_email': 'utils.mail:send_bulk_email_job',
+        'gate_user_face_encoding': 'services.gate_entry_service_db:encode_user_faces_job',
+        'payroll_batch': 'services.payroll_batch_service:run_payroll_job',
+        'render_payslips_zip': 'services.hr_service:render_payslips_zip_job',
+    }
+
+    _handlers = {}
+    _embedded_worker = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _setting(name, default):
+        try:
+            return current_app.config.get(name, default)
+        except RuntimeError:
+            return default
+
+    @classmethod
+    def _resolve_handler(cls, job_type):
+        handler = cls._handlers.get(job_type)
+        if handler is None:
+            if job_type not in cls.HANDLERS:
+                raise ValueError(f"Unknown job type: {job_type}")
+            module_name, function_name = cls.HANDLERS[job_type].split(':')
+            handler = getattr(importlib.import_module(module_name), function_name)
+            cls._handlers[job_type] = handler
+        return handler
+
+    # ------------------------------------------------------------------
+    # Enqueue / status
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def enqueue(cls, job_type, payload, idempotency_key=None, max_attempts=None, delay_seconds=0,
+                live_only=False):
+        """
+        Queue a job
+
+        Args:
+            job_type: Key of HANDLERS
+            payload: JSON-serializable dict passed to the handler
+            idempotency_key: Optional key; enqueuing the same key again returns
+                             the existing job instead of creating another
+            max_attempts: Attempts before the job is marked failed
+            delay_seconds: Do not run before this many seconds from now
+            live_only: Only dedupe against a queued or running job; once it has
+                       finished, the same key queues a new run
+
+        Returns:
+            dict: The job (to_dict form)
+        """
+        if job_type not in cls.HANDLERS:
+            raise ValueError(f"Unknown job type: {job_type}")
+
+        if idempotency_key:
+            existing = BackgroundJob.query.filter_by(idempotency_key=idempotency_key).first()
+            if existing and live_only and existing.status in ('succeeded', 'failed'):
+                # Release the key from the finished job so a new run can take it
+                BackgroundJob.query.filter(
+                    BackgroundJob.id == existing.id,
+                    BackgroundJob.idempotency_key == idempotency_key
+                ).update({'idempotency_key': None}, synchronize_session=False)
+                db.session.commit()
+                existing = None
+            if existing:
+                return existing.to_dict()
+
+        job = BackgroundJob(
+            job_type=job_type,
+            payload=json.dumps(payload, default=str),
+            idempotency_key=idempotency_key,
+            max_attempts=max_attempts or int(cls._setting('JOB_MAX_ATTEMPTS', 5)),
+            run_after=get_ist_now() + timedelta(seconds=delay_seconds)
+        )
+        db.session.add(job)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another request enqueued the same idempotency key first
+            db.session.rollback()
+            existing = BackgroundJob.query.filter_by(idempotency_key=idempotency_key).first()
+            if existing is None:
+                raise
+            return existing.to_dict()
+
+        mode = cls._setting('JOB_QUEUE_MODE', 'thread')
+        if mode == 'inline':
+            if cls.claim(job.id, f'inline-{os.getpid()}'):
+                cls.run_job(job.id)
+            db.session.refresh(job)
+        elif mode == 'thread':
+            cls.start_embedded_worker(current_app._get_current_object()).wake()
+
+        return job.to_dict()
+
+    @staticmethod
+    def get_job(job_id):
+        """Get one job by id, or None"""
+        job = BackgroundJob.query.get(job_id)
+        return job.to_dict() if job else None
+
+    @staticmethod
+    def list_jobs(status=None, job_type=None, limit=50):
+        """Most recent jobs, optionally filtered by status and type"""
+        query = BackgroundJob.query
+        if status:
+            if status not in JOB_STATUSES:
+                raise ValueError(f"Invalid status. Allowed: {', '.join(JOB_STATUSES)}")
+            query = query.filter(BackgroundJob.status == status)
+        if job_type:
+            query = query.filter(BackgroundJob.job_type == job_type)
+        jobs = query.order_by(BackgroundJob.id.desc()).limit(limit).all()
+        return [job.to_dict() for job in jobs]
+
+    @classmethod
+    def retry_job(cls, job_id):
+        """Requeue a failed job for one more round of attempts"""
+        job = BackgroundJob.query.get(job_id)
+        if not job:
+            raise LookupError(f"Job {job_id} not found")
+        if job.status != 'failed':
+            raise ValueError('Only failed jobs can be retried')
+
+        job.status = 'queued'
+        job.max_attempts = job.attempts + int(cls._setting('JOB_MAX_ATTEMPTS', 5))
+        job.run_after = get_ist_now()
+        job.finished_at = None
+        db.session.commit()
+
+        if cls._setting('JOB_QUEUE_MODE', 'thread') == 'thread':
+            cls.start_embedded_worker(current_app._get_current_object()).wake()
+        return job.to_dict()
+
+    # ------------------------------------------------------------------
+    # Running
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def due_job_ids(limit, job_types=None):
+        """Ids of queued jobs whose run_after has passed, oldest first"""
+        query = db.session.query(BackgroundJob.id).filter(
+            BackgroundJob.status == 'queued',
+            BackgroundJob.run_after <= get_ist_now()
+        )
+        if job_types:
+            query = query.filter(BackgroundJob.job_type.in_(job_types))
+        rows = query.order_by(BackgroundJob.run_after, BackgroundJob.id).limit(limit).all()
+        return [row.id for row in rows]
+
+    @staticmethod
+    def claim(job_id, worker_id):
+        """
+        Atomically mark a queued job as running for this worker
+
+        Returns:
+            bool: False if another worker claimed it first
+        """
+        now = get_ist_now()
+        claimed = BackgroundJob.query.filter(
+            BackgroundJob.id == job_id,
+            BackgroundJob.status == 'queued'
+        ).update({
+            BackgroundJob.status: 'running',
+            BackgroundJob.locked_by: worker_id,
+            BackgroundJob.locked_at: now,
+            BackgroundJob.attempts: BackgroundJob.attempts + 1,
+            BackgroundJob.updated_at: now
+        }, synchronize_session=False)
+        db.session.commit()
+        return claimed == 1
+
+    @classmethod
+    def requeue_stale(cls):
+        """Return jobs stuck in 'running' (their worker died) to the queue"""
+        cutoff = get_ist_now() - timedelta(seconds=int(cls._setting('JOB_LOCK_TIMEOUT_SECONDS', 900)))
+        count = BackgroundJob.query.filter(
+            BackgroundJob.status == 'running',
+            BackgroundJob.locked_at < cutoff
+        ).update({
+            BackgroundJob.status: 'queued',
+            BackgroundJob.locked_by: None,
+            BackgroundJob.run_after: get_ist_now()
+        }, synchronize_session=False)
+        db.session.commit()
+        if count:
+            logger.warning(f"Requeued {count} stale background jobs")
+        return count
+
+    @classmethod
+    def _backoff_seconds(cls, attempts):
+        """Exponential backoff with jitter: base * 2^(attempts-1), capped"""
+        base = float(cls._setting('JOB_RETRY_BASE_SECONDS', 30))
+        cap = float(cls._setting('JOB_RETRY_MAX_SECONDS', 3600))
+        return min(cap, base * 2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+
+    @classmethod
+    def run_job(cls, job_id):
+        """Run a claimed job and record its outcome"""
+        job = BackgroundJob.query.get(job_id)
+        if job is None or job.status != 'running':
+            return
+
+        try:
+            result = cls._resolve_handler(job.job_type)(json.loads(job.payload))
+        except Exception as e:
+            db.session.rollback()
+            job = BackgroundJob.query.get(job_id)
+            job.last_error = f"{type(e).__name__}: {e}"[:2000]
+            job.locked_by = None
+            if job.attempts >= job.max_attempts:
+                job.status = 'failed'
+                job.finished_at = get_ist_now()
+                logger.error(f"Background job {job_id} ({job.job_type}) failed after {job.attempts} attempts: {e}")
+            else:
+                delay = cls._backoff_seconds(job.attempts)
+                job.status = 'queued'
+                job.run_after = get_ist_now() + timedelta(seconds=delay)
+                logger.warning(f"Background job {job_id} ({job.job_type}) attempt {job.attempts} failed, retrying in {delay:.0f}s: {e}")
+            db.session.commit()
+            return
+
+        job.status = 'succeeded'
+        job.result = json.dumps(result, default=str) if result is not None else None
+        job.last_error = None
+        job.locked_by = None
+        job.finished_at = get_ist_now()
+        db.session.commit()
+
+    @classmethod
+    def start_embedded_worker(cls, app):
+        """Start (once per process) the in-process worker used in 'thread' mode"""
+        with cls._lock:
+            if cls._embedded_worker is None:
+                cls._embedded_worker = JobWorker(
+                    app,
+                    concurrency=int(app.config.get('JOB_QUEUE_CONCURRENCY', 2))
+                )
+                cls._embedded_worker.start()
+            return cls._embedded_worker
+
+
+class JobWorker:
+    """
+    Polls background_jobs and runs due jobs on a bounded thread pool
+
+    Runs in a daemon thread inside a web process (start()) or as the main
+    loop of scripts/job_worker.py (run_forever()).
+    """
+
+    def __init__(self, app, concurrency=2, poll_seconds=None, job_types=None):
+        self.app = app
+        self.concurrency = max(1, concurrency)
+        self.poll_seconds = float(poll_seconds or app.config.get('JOB_POLL_SECONDS', 2))
+        self.job_types = job_types
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='background-job')
+        self._slots = threading.Semaphore(self.concurrency)
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._last_stale_check = 0.0
+
+    def start(self):
+        """Run the poll loop in a daemon thread"""
+        threading.Thread(target=self.run_forever, name='background-job-poller', daemon=True).start()
+        return self
+
+    def wake(self):
+        """Poll now instead of waiting for the next interval (called after enqueue)"""
+        self._wakeup.set()
+
+    def stop(self):
+        self._stopping.set()
+        self._wakeup.set()
+
+    def run_forever(self):
+        logger.info(f"Background job worker {self.worker_id} started (concurrency {self.concurrency})")
+        while not self._stopping.is_set():
+            self._wakeup.clear()
+            try:
+                claimed = self.run_once()
+            except Exception as e:
+                logger.error(f"Background job poll failed: {e}")
+                claimed = 0
+            if not claimed:
+                self._wakeup.wait(self.poll_seconds)
+        self._executor.shutdown(wait=True)
+
+    def run_once(self, wait=False):
+        """
+        Claim as many due jobs as there are free slots and start them
+
+        Returns:
+            int: Number of jobs claimed
+        """
+        free = 0
+        while self._slots.acquire(blocking=False):
+            free += 1
+        if not free:
+            # Every slot is busy; wait until one finishes
+            self._slots.acquire()
+            free = 1
+
+        claimed = []
+        try:
+            with self.app.app_context():
+                if time.monotonic() - self._last_stale_check > 60:
+                    JobQueueService.requeue_stale()
+                    self._last_stale_check = time.monotonic()
+
+                for job_id in JobQueueService.due_job_ids(free, self.job_types):
+                    if JobQueueService.claim(job_id, self.worker_id):
+                        claimed.append(job_id)
+                db.session.remove()
+        finally:
+            for _ in range(free - len(claimed)):
+                self._slots.release()
+
+        futures = [self._executor.submit(self._run, job_id) for job_id in claimed]
+        if wait:
+            for future in futures:
+                future.result()
+        return len(claimed)
+
+    def _run(self, job_id):
+        try:
+            with self.app.app_context():
+                try:
+                    JobQueueService.run_job(job_id)
+                finally:
+                    db.session.remove()
+        except Exception as e:
+            logger.error(f"Background job {job_id} could not be recorded: {e}")
+        finally:
+            self._slots.release()
+            self._wakeup.set()  # A slot is free; look for more work
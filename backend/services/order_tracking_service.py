@@ -5,11 +5,13 @@ import json
 from datetime import datetime, timedelta
 from utils.timezone_helpers import get_ist_now
 from models import db, ProductionOrder, PurchaseOrder, AssemblyOrder, ShowroomProduct
+from utils.change_tracking import cached_by_tables
 
 class OrderTrackingService:
     """Service class for comprehensive order tracking and status management"""
     
     @staticmethod
+    @cached_by_tables(ProductionOrder, PurchaseOrder, AssemblyOrder, ShowroomProduct)
     def get_current_order_log():
         """Get comprehensive order log showing current status across all departments"""
         try:
@@ -80,6 +82,7 @@ class OrderTrackingService:
             raise Exception(f"Error generating order log: {str(e)}")
     
     @staticmethod
+    @cached_by_tables(ProductionOrder, PurchaseOrder, AssemblyOrder, ShowroomProduct)
     def get_order_detailed_status(order_id):
         """Get detailed status information for a specific order"""
         try:
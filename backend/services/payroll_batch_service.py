@@ -0,0 +1,326 @@
+"""
+Payroll Batch Service Module
+Computes and stores payroll for a whole cohort of employees in one pass
+"""
+import hashlib
+import traceback
+from datetime import datetime, timedelta
+from sqlalchemy import case, func, insert
+from models import db, Employee, Attendance, AttendanceStatus, Payroll, AuditAction, AuditModule
+from services.audit_service import AuditService
+from services.job_queue_service import JobQueueService
+
+
+class PayrollBatchService:
+    """Service class for month-end payroll runs across all active employees"""
+
+    # Statutory rules, kept identical to HRService.generate_payroll
+    PF_RATE = 0.12
+    PF_WAGE_CEILING = 15000
+    ESI_RATE = 0.0075
+    ESI_GROSS_LIMIT = 21000
+    PROFESSIONAL_TAX = 200
+    INCOME_TAX_RATE = 0.05
+    INCOME_TAX_THRESHOLD = 50000
+    HOURLY_DEDUCTION_RATE = 0.05
+    DAYS_PER_MONTH = 30
+
+    @staticmethod
+    def get_sundays(start_date, end_date):
+        """List the Sundays between start_date and end_date inclusive"""
+        first_sunday = start_date + timedelta(days=(6 - start_date.weekday()) % 7)
+        sundays = []
+        day = first_sunday
+        while day <= end_date:
+            sundays.append(day)
+            day += timedelta(days=7)
+        return sundays
+
+    @classmethod
+    def count_working_days(cls, start_date, end_date):
+        """Working days in the period (every day except Sunday)"""
+        if end_date < start_date:
+            return 0
+        total_days = (end_date - start_date).days + 1
+        return total_days - len(cls.get_sundays(start_date, end_date))
+
+    @classmethod
+    def load_cohort(cls, start_date, end_date, employee_ids=None, department=None):
+        """
+        Load active employees with their attendance totals for the period
+
+        Attendance is aggregated in a single grouped query. Attended days
+        follow the HR payroll screen: a present day counts 1 and a half day
+        0.5 when it falls on a working day; hours are summed over every
+        record in the period.
+
+        Returns:
+            pandas.DataFrame: one row per employee
+        """
+        sundays = cls.get_sundays(start_date, end_date)
+        is_working_day = ~Attendance.date.in_(sundays) if sundays else db.true()
+
+        attendance = db.session.query(
+            Attendance.employee_id.label('employee_id'),
+            func.sum(case(
+                (db.and_(Attendance.status == AttendanceStatus.PRESENT, is_working_day), 1.0),
+                (db.and_(Attendance.status == AttendanceStatus.HALF_DAY, is_working_day), 0.5),
+                else_=0.0
+            )).label('attended_days'),
+            func.sum(func.coalesce(Attendance.hours_worked, 0)).label('total_hours')
+        ).filter(
+            Attendance.date >= start_date,
+            Attendance.date <= end_date
+        ).group_by(Attendance.employee_id).subquery()
+
+        query = db.session.query(
+            Employee.id,
+            Employee.first_name,
+            Employee.last_name,
+            Employee.salary,
+            Employee.salary_type,
+            func.coalesce(attendance.c.attended_days, 0),
+            func.coalesce(attendance.c.total_hours, 0)
+        ).outerjoin(
+            attendance, attendance.c.employee_id == Employee.id
+        ).filter(
+            func.lower(Employee.status) == 'active'
+        )
+
+        if employee_ids:
+            query = query.filter(Employee.id.in_(employee_ids))
+        if department:
+            query = query.filter(Employee.department == department)
+
+        import pandas as pd  # Imported on first payroll run to keep it out of worker boot
+
+        return pd.DataFrame(
+            query.order_by(Employee.id).all(),
+            columns=['employee_id', 'first_name', 'last_name', 'salary', 'salary_type',
+                     'attended_days', 'total_hours']
+        )
+
+    @classmethod
+    def compute_payroll(cls, cohort, total_working_days, allowances):
+        """
+        Compute base, deductions, gross and net salary for every row at once
+
+        Args:
+            cohort: DataFrame from load_cohort
+            total_working_days: Working days in the pay period
+            allowances: pandas.Series of allowances aligned with cohort
+
+        Returns:
+            pandas.DataFrame: cohort with the computed payroll columns added
+        """
+        import numpy as np
+
+        df = cohort.copy()
+        salary = df['salary'].astype(float)
+        attended = df['attended_days'].astype(float)
+        hours = df['total_hours'].astype(float)
+        salary_type = df['salary_type'].fillna('monthly')
+        hourly = (salary_type == 'hourly').to_numpy()
+        daily = (salary_type == 'daily').to_numpy()
+
+        # Monthly (and unknown) salary types are prorated by attended days
+        if total_working_days > 0:
+            prorated = salary / total_working_days * attended
+        else:
+            prorated = salary
+
+        base = np.select([hourly, daily], [salary * hours, salary * attended], default=prorated)
+        gross = np.where(hourly, base, base + allowances.to_numpy())
+
+        pf = np.where(hourly, 0.0, np.minimum(base, cls.PF_WAGE_CEILING) * cls.PF_RATE)
+        esi = np.where(~hourly & (gross < cls.ESI_GROSS_LIMIT), gross * cls.ESI_RATE, 0.0)
+        pt = np.where(hourly, 0.0, float(cls.PROFESSIONAL_TAX))
+        income_tax = np.where(~hourly & (gross > cls.INCOME_TAX_THRESHOLD), gross * cls.INCOME_TAX_RATE, 0.0)
+        deductions = np.where(hourly, gross * cls.HOURLY_DEDUCTION_RATE, pf + esi + pt + income_tax)
+
+        df['salary_type'] = salary_type
+        df['allowances'] = allowances.to_numpy()
+        df['monthly_salary'] = np.where(daily, salary * cls.DAYS_PER_MONTH, salary)
+        df['base_salary'] = base
+        df['pf_deduction'] = pf
+        df['esi_deduction'] = esi
+        df['pt_deduction'] = pt
+        df['it_deduction'] = income_tax
+        df['deductions'] = deductions
+        df['gross_salary'] = gross
+        df['net_salary'] = gross - deductions
+        return df
+
+    @classmethod
+    def run_payroll(cls, period_data, dry_run=False):
+        """
+        Generate payroll for every active employee in one transaction
+
+        Args:
+            period_data: dict with startDate, endDate and optional allowances
+                         (default for everyone), employeeAllowances
+                         ({employeeId: amount}), employeeIds, department and
+                         skipExisting (default True: employees that already
+                         have a payroll for the same period are left out)
+            dry_run: Compute and return the preview without writing anything
+
+        Returns:
+            dict: period, totals, per-employee rows and skipped employee ids
+        """
+        if not period_data.get('startDate') or not period_data.get('endDate'):
+            raise ValueError('startDate and endDate are required')
+
+        start_date = datetime.fromisoformat(period_data['startDate']).date()
+        end_date = datetime.fromisoformat(period_data['endDate']).date()
+        if end_date < start_date:
+            raise ValueError('endDate must not be before startDate')
+
+        try:
+            cohort = cls.load_cohort(
+                start_date,
+                end_date,
+                employee_ids=period_data.get('employeeIds'),
+                department=period_data.get('department')
+            )
+
+            skipped = []
+            if period_data.get('skipExisting', True) and not cohort.empty:
+                existing = {
+                    employee_id for (employee_id,) in db.session.query(Payroll.employee_id).filter(
+                        Payroll.pay_period_start == start_date,
+                        Payroll.pay_period_end == end_date,
+                        Payroll.employee_id.in_(cohort['employee_id'].tolist())
+                    ).distinct()
+                }
+                if existing:
+                    skipped = sorted(existing)
+                    cohort = cohort[~cohort['employee_id'].isin(existing)].reset_index(drop=True)
+
+            total_working_days = cls.count_working_days(start_date, end_date)
+            default_allowance = float(period_data.get('allowances', 0) or 0)
+            employee_allowances = {
+                int(employee_id): float(amount or 0)
+                for employee_id, amount in (period_data.get('employeeAllowances') or {}).items()
+            }
+            allowances = cohort['employee_id'].map(employee_allowances).fillna(default_allowance).astype(float)
+
+            payroll = cls.compute_payroll(cohort, total_working_days, allowances)
+            payroll['name'] = payroll['first_name'] + ' ' + payroll['last_name']
+
+            if not dry_run and not payroll.empty:
+                db.session.execute(insert(Payroll), [
+                    {
+                        'employee_id': int(row.employee_id),
+                        'name': row.name,
+                        'pay_period_start': start_date,
+                        'pay_period_end': end_date,
+                        'monthly_salary': float(row.monthly_salary),
+                        'salary_type': row.salary_type,
+                        'allowances': float(row.allowances),
+                        'deductions': float(row.deductions),
+                        'gross_salary': float(row.gross_salary),
+                        'net_salary': float(row.net_salary)
+                    }
+                    for row in payroll.itertuples(index=False)
+                ])
+                db.session.commit()
+
+            return {
+                'dryRun': dry_run,
+                'payPeriodStart': start_date.isoformat(),
+                'payPeriodEnd': end_date.isoformat(),
+                'totalWorkingDays': total_working_days,
+                'count': int(len(payroll)),
+                'skippedEmployeeIds': skipped,
+                'totals': {
+                    'grossSalary': round(float(payroll['gross_salary'].sum()), 2),
+                    'deductions': round(float(payroll['deductions'].sum()), 2),
+                    'netSalary': round(float(payroll['net_salary'].sum()), 2)
+                },
+                'payrolls': [
+                    {
+                        'employeeId': int(row.employee_id),
+                        'employeeName': row.name,
+                        'salaryType': row.salary_type,
+                        'attendedDays': float(row.attended_days),
+                        'totalHours': float(row.total_hours),
+                        'monthlySalary': float(row.monthly_salary),
+                        'allowances': float(row.allowances),
+                        'baseSalary': float(row.base_salary),
+                        'pfDeduction': float(row.pf_deduction),
+                        'esiDeduction': float(row.esi_deduction),
+                        'ptDeduction': float(row.pt_deduction),
+                        'itDeduction': float(row.it_deduction),
+                        'deductions': float(row.deductions),
+                        'grossSalary': float(row.gross_salary),
+                        'netSalary': float(row.net_salary)
+                    }
+                    for row in payroll.itertuples(index=False)
+                ]
+            }
+        except Exception as e:
+            db.session.rollback()
+            raise Exception(f"Error running batch payroll: {str(e)}")
+
+    @staticmethod
+    def log_batch_audit(result, user_name):
+        """Record a completed (non dry-run) batch payroll in the audit trail"""
+        try:
+            totals = result['totals']
+            description = (
+                f"HR generated batch payroll - Period: {result['payPeriodStart']} to {result['payPeriodEnd']}, "
+                f"Employees: {result['count']}, Gross: ₹{totals['grossSalary']:,.2f}, Net: ₹{totals['netSalary']:,.2f}"
+            )
+            AuditService.log_activity(
+                action=AuditAction.CREATE,
+                module=AuditModule.HR,
+                resource_type='payroll',
+                resource_id=f"{result['payPeriodStart']}:{result['payPeriodEnd']}",
+                description=description,
+                username=user_name,
+                new_values={
+                    'employee_count': result['count'],
+                    'skipped_employee_ids': result['skippedEmployeeIds'],
+                    'gross_salary': totals['grossSalary'],
+                    'net_salary': totals['netSalary']
+                }
+            )
+        except Exception as audit_error:
+            print(f"[AUDIT ERROR] Failed to create HR batch payroll audit log: {audit_error}")
+            traceback.print_exc()
+
+    @staticmethod
+    def queue_payroll(period_data, user_name):
+        """
+        Run the batch payroll on the background job queue
+
+        The same period, department and employee selection maps to one job
+        while it is queued or running, so a repeated click does not queue a
+        second run; once it has finished, the same request runs again.
+
+        Returns:
+            dict: The job (poll it for the run_payroll result)
+        """
+        if not period_data.get('startDate') or not period_data.get('endDate'):
+            raise ValueError('startDate and endDate are required')
+
+        selection = ','.join(str(employee_id) for employee_id in sorted(period_data.get('employeeIds') or []))
+        # Hashed so any department/selection fits the key column without two selections colliding
+        scope = hashlib.sha256(f"{period_data.get('department') or '*'}|{selection or '*'}".encode('utf-8')).hexdigest()
+        idempotency_key = f"payroll-batch:{period_data['startDate']}:{period_data['endDate']}:{scope}"
+        return JobQueueService.enqueue(
+            'payroll_batch',
+            {'period': period_data, 'generatedBy': user_name},
+            idempotency_key=idempotency_key,
+            max_attempts=1,  # Not retried: a partial failure is rolled back and needs a look
+            live_only=True
+        )
+
+
+def run_payroll_job(payload):
+    """Background job handler for 'payroll_batch'"""
+    result = PayrollBatchService.run_payroll(payload['period'])
+    if result['count']:
+        PayrollBatchService.log_batch_audit(result, payload.get('generatedBy'))
+    # The per-employee rows are already stored as Payroll records
+    return {key: value for key, value in result.items() if key != 'payrolls'}
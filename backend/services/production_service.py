@@ -4,14 +4,20 @@ Production order business logic service
 import json
 from models import db, ProductionOrder, PurchaseOrder, AssemblyOrder
 from utils.validators import validate_required_fields
+from utils.pagination import paginate
 
 class ProductionService:
     """Service class for production order operations"""
+
+    # API sort names accepted by the paged list endpoints
+    PRODUCTION_ORDER_SORT_FIELDS = {'createdAt': ProductionOrder.created_at}
     
     @staticmethod
-    def get_all_orders():
-        """Get all production orders"""
+    def get_all_orders(page=None):
+        """Get all production orders, or a Page of them when a PageRequest is given"""
         try:
+            if page is not None:
+                return paginate(ProductionOrder.query, page, ProductionOrder.id).map(lambda order: order.to_dict())
             orders = ProductionOrder.query.order_by(ProductionOrder.created_at.desc()).all()
             return [order.to_dict() for order in orders]
         except Exception as e:
@@ -2,14 +2,20 @@
 Purchase order business logic service
 """
 from models import db, PurchaseOrder, ProductionOrder
+from utils.pagination import paginate
 
 class PurchaseService:
     """Service class for purchase order operations"""
+
+    # API sort names accepted by the paged list endpoints
+    PURCHASE_ORDER_SORT_FIELDS = {'createdAt': PurchaseOrder.created_at}
     
     @staticmethod
-    def get_all_purchase_orders():
-        """Get all purchase orders"""
+    def get_all_purchase_orders(page=None):
+        """Get all purchase orders, or a Page of them when a PageRequest is given"""
         try:
+            if page is not None:
+                return paginate(PurchaseOrder.query, page, PurchaseOrder.id).map(lambda order: order.to_dict())
             orders = PurchaseOrder.query.order_by(PurchaseOrder.created_at.desc()).all()
             return [order.to_dict() for order in orders]
         except Exception as e:
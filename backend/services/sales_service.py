@@ -8,99 +8,85 @@ import uuid
 from models import db, SalesOrder, Customer, SalesTransaction, ShowroomProduct, FinanceTransaction, DispatchRequest, AssemblyOrder, TransportJob , GatePass
 from models.sales import TransportApprovalRequest, SalesTarget
 from services.showroom_service import ShowroomService
+from services.showroom_availability_service import ShowroomAvailabilityService
 from services.approval_service import ApprovalService
+from utils.pagination import paginate
+from utils.change_tracking import cached_by_tables
 import calendar
 
 
 class SalesService:
     """Service class for sales operations"""
+
+    # API sort names accepted by the paged list endpoints
+    ORDER_SORT_FIELDS = {
+        'createdAt': SalesOrder.created_at,
+        'orderNumber': SalesOrder.order_number,
+        'customerName': SalesOrder.customer_name,
+        'finalAmount': SalesOrder.final_amount
+    }
+    CUSTOMER_SORT_FIELDS = {
+        'name': Customer.name,
+        'createdAt': Customer.created_at
+    }
     
     @staticmethod
     def get_available_showroom_products():
         """Get products for showroom display including rework information"""
-        from models.production import MachineTestResult, ReworkOrder
-        
-        # Get showroom products with status 'available' - these are ready for sale
-        all_products = ShowroomProduct.query.filter_by(showroom_status='available').order_by(ShowroomProduct.created_at.desc()).all()
-        print(f"DEBUG: Found {len(all_products)} available showroom products")
-        
         products = []
-        for product in all_products:
+        for row in ShowroomAvailabilityService.get_availability():
             # Determine original quantity from assembly order by production_order_id
             original_qty = 1
-            assembly_order = None
-            if product.production_order_id:
-                assembly_order = AssemblyOrder.query.filter_by(
-                    production_order_id=product.production_order_id
-                ).first()
-                if assembly_order:
-                    original_qty = assembly_order.quantity or 1
-
-            # Calculate already sold quantity for this showroom product
-            sold_qty = db.session.query(db.func.coalesce(db.func.sum(SalesOrder.quantity), 0)).\
-                filter(SalesOrder.showroom_product_id == product.id).scalar() or 0
+            if row['assemblyOrderId']:
+                original_qty = row['assemblyQuantity'] or 1
+            sold_qty = row['soldQuantity']
 
             # Calculate rework quantities if assembly order exists
             rework_qty = 0
             display_qty = original_qty
             pending_qty = 0
-            failed_machines = []
-            
-            if assembly_order:
-                # Get all machine test results
-                all_machines = MachineTestResult.query.filter_by(
-                    assembly_order_id=assembly_order.id
-                ).all()
-                
-                passed_machines = [m for m in all_machines if m.test_result == 'passed']
-                failed_machines = [m for m in all_machines if m.test_result == 'failed']
-                pending_machines = [m for m in all_machines if m.test_result == 'pending']
-                
+
+            if row['assemblyOrderId']:
+                machines = row['machines'] or {'by_result': {}}
+                passed_qty = machines['by_result'].get('passed', 0)
+                pending_qty = machines['by_result'].get('pending', 0)
                 # Count machines currently in rework (failed machines with active rework orders)
-                rework_machines = 0
-                for failed_machine in failed_machines:
-                    if failed_machine.rework_order_id:
-                        rework_order = ReworkOrder.query.get(failed_machine.rework_order_id)
-                        if rework_order and rework_order.status in ['pending', 'in_progress']:
-                            rework_machines += 1
-                
-                rework_qty = rework_machines
-                pending_qty = len(pending_machines)
+                rework_qty = row['activeReworkByResult'].get('failed', 0)
                 # Display quantity includes both passed machines AND pending machines (not yet tested/retested)
-                display_qty = len(passed_machines) + pending_qty
+                display_qty = passed_qty + pending_qty
 
             # Calculate remaining quantity available for sale
             # Use product.quantity (from showroom_product table) as the display quantity
-            remaining_qty = max(int(product.quantity) - int(sold_qty), 0)
+            remaining_qty = max(row['quantity'] - int(sold_qty), 0)
 
             # Simple logic: Show if status is 'available' and has remaining quantity
-            should_show = product.showroom_status == 'available' and remaining_qty > 0
-            
-            print(f"DEBUG Product {product.id} ({product.name}): status={product.showroom_status}, qty={product.quantity}, sold={sold_qty}, remaining={remaining_qty}, should_show={should_show}")
-
-            if should_show:
+            if remaining_qty > 0:
                 products.append({
-                    'id': product.id,
-                    'name': product.name,
-                    'category': product.category,
+                    'id': row['id'],
+                    'name': row['name'],
+                    'category': row['category'],
                     'quantity': remaining_qty,  # Current remaining quantity available for sale
                     'displayQuantity': display_qty,  # Machines currently on display (passed + pending)
                     'reworkQuantity': rework_qty,  # Machines currently in rework
                     'pendingQuantity': pending_qty,  # Machines pending testing/retesting
                     'originalQuantity': original_qty,  # Total original batch quantity
                     'soldQuantity': sold_qty,  # Already sold quantity
-                    'salePrice': product.sale_price,
-                    'costPrice': product.cost_price,
-                    'displayedAt': product.created_at.isoformat(),
-                    'productionOrderId': product.production_order_id,
-                    'showroomStatus': product.showroom_status
+                    'salePrice': row['salePrice'],
+                    'costPrice': row['costPrice'],
+                    'displayedAt': row['createdAt'],
+                    'productionOrderId': row['productionOrderId'],
+                    'showroomStatus': row['showroomStatus']
                 })
-        
+
         return products
-    
+
     @staticmethod
-    def get_sales_orders(status=None, sales_person=None):
-        """Get sales orders with optional filtering"""
+    def get_sales_orders(status=None, sales_person=None, page=None):
+        """
+        Get sales orders with optional filtering
+
+        Returns a list, or a Page of order dicts when a PageRequest is given
+        """
         query = SalesOrder.query
         
         if status:
@@ -111,22 +97,31 @@ class SalesService:
             from sqlalchemy import func
             query = query.filter(func.lower(func.trim(SalesOrder.sales_person)) == func.lower(func.trim(sales_person)))
         
-        orders = query.order_by(SalesOrder.created_at.desc()).all()
-        
+        if page is not None:
+            result = paginate(query, page, SalesOrder.id)
+            orders = result.items
+        else:
+            orders = query.order_by(SalesOrder.created_at.desc()).all()
+
+        # Check which of these orders have been sent to dispatch in one query
+        dispatched_ids = set()
+        if orders:
+            dispatched_ids = {
+                row.sales_order_id for row in db.session.query(DispatchRequest.sales_order_id).filter(
+                    DispatchRequest.sales_order_id.in_([order.id for order in orders])
+                ).distinct()
+            }
+
         # Enhance orders with after sales status
         enhanced_orders = []
         for order in orders:
             order_dict = order.to_dict()
-            
-            # Check if order has been sent to dispatch
-            dispatch_request = DispatchRequest.query.filter_by(sales_order_id=order.id).first()
-            if dispatch_request:
-                order_dict['afterSalesStatus'] = 'sent_to_dispatch'
-            else:
-                order_dict['afterSalesStatus'] = None
-                
+            order_dict['afterSalesStatus'] = 'sent_to_dispatch' if order.id in dispatched_ids else None
             enhanced_orders.append(order_dict)
-        
+
+        if page is not None:
+            result.items = enhanced_orders
+            return result
         return enhanced_orders
     
     @staticmethod
@@ -258,6 +253,7 @@ class SalesService:
         # This will be handled in the finance approval process
         
         db.session.commit()
+        ShowroomAvailabilityService.invalidate()
         
         return sales_order.to_dict()
     
@@ -372,6 +368,7 @@ class SalesService:
         
         sales_order.updated_at = get_ist_now()
         db.session.commit()
+        ShowroomAvailabilityService.invalidate()
         
         return sales_order.to_dict()
     
@@ -693,9 +690,12 @@ class SalesService:
         return dispatch.to_dict()
     
     @staticmethod
-    def get_customers():
-        """Get all customers"""
-        customers = Customer.query.filter_by(is_active=True).order_by(Customer.name).all()
+    def get_customers(page=None):
+        """Get all customers, or a Page of them when a PageRequest is given"""
+        query = Customer.query.filter_by(is_active=True)
+        if page is not None:
+            return paginate(query, page, Customer.id).map(lambda customer: customer.to_dict())
+        customers = query.order_by(Customer.name).all()
         return [customer.to_dict() for customer in customers]
     
     @staticmethod
@@ -716,6 +716,7 @@ class SalesService:
         return customer.to_dict()
     
     @staticmethod
+    @cached_by_tables(SalesOrder)
     def get_sales_summary():
         """Get sales summary statistics"""
         total_orders = SalesOrder.query.count()
@@ -0,0 +1,165 @@
+"""
+Showroom Availability Service Module
+Set-based computation of showroom stock, sold quantities and machine test status
+"""
+from models import db, ShowroomProduct, AssemblyOrder, SalesOrder
+from models.production import MachineTestResult, ReworkOrder
+from utils.change_tracking import cached_by_tables
+
+ACTIVE_REWORK_STATUSES = ['pending', 'in_progress']
+
+
+class ShowroomAvailabilityService:
+    """Service class computing showroom availability in a constant number of queries"""
+
+    @classmethod
+    def get_availability(cls, use_cache=True):
+        """
+        Get availability rows for every showroom product with status 'available'
+
+        Each row is a plain dict (safe to share between requests) containing the
+        showroom product columns, the matching assembly order, the sold quantity
+        and machine test counts grouped by result.
+
+        Args:
+            use_cache: Serve the cached snapshot unless one of its tables has changed
+
+        Returns:
+            list: Availability rows ordered by showroom created_at (newest first)
+        """
+        if use_cache:
+            return cls._compute_availability()
+        return cls._compute_availability.uncached()
+
+    @classmethod
+    def invalidate(cls):
+        """Drop the cached snapshot (committed ORM writes already do this via change tracking)"""
+        cls._compute_availability.cache_clear()
+
+    @staticmethod
+    @cached_by_tables(ShowroomProduct, AssemblyOrder, SalesOrder, MachineTestResult, ReworkOrder, copy_result=False)
+    def _compute_availability():
+        """Run the grouped queries and assemble availability rows"""
+        try:
+            # 1. Available showroom products
+            products = db.session.query(
+                ShowroomProduct.id,
+                ShowroomProduct.name,
+                ShowroomProduct.category,
+                ShowroomProduct.quantity,
+                ShowroomProduct.cost_price,
+                ShowroomProduct.sale_price,
+                ShowroomProduct.showroom_status,
+                ShowroomProduct.production_order_id,
+                ShowroomProduct.created_at
+            ).filter(
+                ShowroomProduct.showroom_status == 'available'
+            ).order_by(ShowroomProduct.created_at.desc()).all()
+
+            if not products:
+                return []
+
+            product_ids = [p.id for p in products]
+            production_order_ids = {p.production_order_id for p in products if p.production_order_id}
+
+            # 2. First assembly order per production order
+            assembly_by_production = {}
+            if production_order_ids:
+                first_assembly_ids = db.session.query(
+                    db.func.min(AssemblyOrder.id)
+                ).filter(
+                    AssemblyOrder.production_order_id.in_(production_order_ids)
+                ).group_by(AssemblyOrder.production_order_id)
+
+                assembly_rows = db.session.query(
+                    AssemblyOrder.id,
+                    AssemblyOrder.production_order_id,
+                    AssemblyOrder.quantity
+                ).filter(AssemblyOrder.id.in_(first_assembly_ids)).all()
+
+                assembly_by_production = {row.production_order_id: row for row in assembly_rows}
+
+            # 3. Sold quantity per showroom product
+            sold_rows = db.session.query(
+                SalesOrder.showroom_product_id,
+                db.func.coalesce(db.func.sum(SalesOrder.quantity), 0)
+            ).filter(
+                SalesOrder.showroom_product_id.in_(product_ids)
+            ).group_by(SalesOrder.showroom_product_id).all()
+            sold_by_product = {product_id: int(sold or 0) for product_id, sold in sold_rows}
+
+            assembly_ids = [row.id for row in assembly_by_production.values()]
+            machine_counts = {}
+            active_rework_counts = {}
+
+            if assembly_ids:
+                # 4. Machine counts per assembly order grouped by result and rework flag
+                machine_rows = db.session.query(
+                    MachineTestResult.assembly_order_id,
+                    MachineTestResult.test_result,
+                    MachineTestResult.is_in_rework,
+                    db.func.count(MachineTestResult.id)
+                ).filter(
+                    MachineTestResult.assembly_order_id.in_(assembly_ids)
+                ).group_by(
+                    MachineTestResult.assembly_order_id,
+                    MachineTestResult.test_result,
+                    MachineTestResult.is_in_rework
+                ).all()
+
+                for assembly_id, test_result, is_in_rework, count in machine_rows:
+                    counts = machine_counts.setdefault(assembly_id, {
+                        'total': 0,
+                        'by_result': {},
+                        'in_rework': 0,
+                        'pending_not_in_rework': 0
+                    })
+                    counts['total'] += count
+                    counts['by_result'][test_result] = counts['by_result'].get(test_result, 0) + count
+                    if is_in_rework:
+                        counts['in_rework'] += count
+                    elif test_result == 'pending':
+                        counts['pending_not_in_rework'] += count
+
+                # 5. Machines attached to an active rework order, grouped by result
+                rework_rows = db.session.query(
+                    MachineTestResult.assembly_order_id,
+                    MachineTestResult.test_result,
+                    db.func.count(MachineTestResult.id)
+                ).join(
+                    ReworkOrder, ReworkOrder.id == MachineTestResult.rework_order_id
+                ).filter(
+                    MachineTestResult.assembly_order_id.in_(assembly_ids),
+                    ReworkOrder.status.in_(ACTIVE_REWORK_STATUSES)
+                ).group_by(
+                    MachineTestResult.assembly_order_id,
+                    MachineTestResult.test_result
+                ).all()
+
+                for assembly_id, test_result, count in rework_rows:
+                    active_rework_counts.setdefault(assembly_id, {})[test_result] = count
+
+            rows = []
+            for product in products:
+                assembly = assembly_by_production.get(product.production_order_id)
+                rows.append({
+                    'id': product.id,
+                    'name': product.name,
+                    'category': product.category,
+                    'quantity': int(product.quantity or 0),
+                    'costPrice': product.cost_price,
+                    'salePrice': product.sale_price,
+                    'showroomStatus': product.showroom_status,
+                    'productionOrderId': product.production_order_id,
+                    'createdAt': product.created_at.isoformat() if product.created_at else None,
+                    'assemblyOrderId': assembly.id if assembly else None,
+                    'assemblyQuantity': assembly.quantity if assembly else None,
+                    'soldQuantity': sold_by_product.get(product.id, 0),
+                    'machines': machine_counts.get(assembly.id) if assembly else None,
+                    'activeReworkByResult': active_rework_counts.get(assembly.id, {}) if assembly else {}
+                })
+
+            return rows
+
+        except Exception as e:
+            raise Exception(f"Error computing showroom availability: {str(e)}")
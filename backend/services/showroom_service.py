@@ -6,6 +6,7 @@ from datetime import datetime
 from utils.timezone_helpers import get_ist_now
 from models import db, ShowroomProduct, AssemblyOrder, FinanceTransaction, SalesOrder
 from models.production import MachineTestResult
+from services.showroom_availability_service import ShowroomAvailabilityService
 import json
 
 
@@ -58,58 +59,42 @@ class ShowroomService:
     def get_displayed_products():
         """Get products currently displayed in showroom with accurate machine counts"""
         # Only show available products - sold products are handled by Sales department
-        displayed_products = ShowroomProduct.query.filter_by(
-            showroom_status='available'
-        ).order_by(ShowroomProduct.created_at.desc()).all()
-        
-        # Convert to format expected by frontend
         products = []
-        for product in displayed_products:
-            # Get the original assembly order for additional details
-            assembly_order = None
-            if product.production_order_id:
-                assembly_order = AssemblyOrder.query.filter_by(
-                    production_order_id=product.production_order_id
-                ).first()
-            
+        for row in ShowroomAvailabilityService.get_availability():
             # Get machine status breakdown for this assembly order
             machine_counts = {
                 'total': 0,
-                'displayed': product.quantity,  # Machines actually on display
+                'displayed': row['quantity'],  # Machines actually on display
                 'in_rework': 0,
                 'pending_retest': 0
             }
-            
-            if assembly_order:
-                # Get machine test results for this assembly order
-                all_machines = MachineTestResult.query.filter_by(
-                    assembly_order_id=assembly_order.id
-                ).all()
-                
-                machine_counts['total'] = len(all_machines)
-                machine_counts['in_rework'] = sum(1 for m in all_machines if m.is_in_rework)
-                machine_counts['pending_retest'] = sum(1 for m in all_machines if m.test_result == 'pending' and not m.is_in_rework)
-            
+
+            machines = row['machines']
+            if machines:
+                machine_counts['total'] = machines['total']
+                machine_counts['in_rework'] = machines['in_rework']
+                machine_counts['pending_retest'] = machines['pending_not_in_rework']
+
             # Get original quantity from assembly order
-            original_quantity = assembly_order.quantity if assembly_order else 1
-            
+            original_quantity = row['assemblyQuantity'] if row['assemblyOrderId'] else 1
+
             products.append({
-                'id': product.id,
-                'productName': product.name,
-                'quantity': product.quantity,  # Machines currently on display
+                'id': row['id'],
+                'productName': row['name'],
+                'quantity': row['quantity'],  # Machines currently on display
                 'original_qty': original_quantity,  # Original quantity from assembly
                 'machineBreakdown': machine_counts,  # Detailed machine status
-                'showroomStatus': product.showroom_status,
-                'displayedAt': product.created_at.isoformat(),
-                'salePrice': product.sale_price,
+                'showroomStatus': row['showroomStatus'],
+                'displayedAt': row['createdAt'],
+                'salePrice': row['salePrice'],
                 'customerInterest': 8,  # Demo value - you could add this as a field
                 'qualityRating': 5,  # Demo value - you could add this as a field
-                'productionOrderId': product.production_order_id,
-                'assemblyOrderId': assembly_order.id if assembly_order else None
+                'productionOrderId': row['productionOrderId'],
+                'assemblyOrderId': row['assemblyOrderId']
             })
-        
+
         return products
-    
+
     @staticmethod
     def add_product_to_showroom(product_id, test_results=None):
         """Add a completed assembly product to showroom display or send back to assembly if tests fail"""
@@ -184,6 +169,7 @@ class ShowroomService:
 
         db.session.add(showroom_product)
         db.session.commit()
+        ShowroomAvailabilityService.invalidate()
 
         # Return in expected format
         return {
@@ -299,6 +285,7 @@ class ShowroomService:
                 machine.notes = notes
 
             db.session.commit()
+            ShowroomAvailabilityService.invalidate()
             return machine.to_dict()
 
         except Exception as e:
@@ -419,6 +406,7 @@ class ShowroomService:
                 assembly_order.testing_passed = False
 
             db.session.commit()
+            ShowroomAvailabilityService.invalidate()
 
             result = {
                 'passedMachines': len(passed_machines),
@@ -0,0 +1,181 @@
+"""
+Stock ledger business logic service
+Records stock movements and answers historical balance queries
+"""
+from sqlalchemy import and_, func, insert
+from utils.timezone_helpers import get_ist_now
+from models import db, StoreInventory, StockMovement, StockCheckpoint
+
+
+class StockLedgerService:
+    """Service class for the append-only stock movement ledger"""
+
+    @staticmethod
+    def record(item, quantity_change, movement_type, reference_type=None, reference_id=None, notes=None, created_by=None):
+        """
+        Record a single movement for an inventory item in the current transaction
+
+        The caller is responsible for changing item.quantity by the same amount.
+
+        Returns:
+            StockMovement or None when quantity_change is zero
+        """
+        if not quantity_change:
+            return None
+
+        if item.id is None:
+            db.session.flush()
+
+        movement = StockMovement(
+            inventory_id=item.id,
+            item_name=item.name,
+            quantity_change=int(quantity_change),
+            movement_type=movement_type,
+            reference_type=reference_type,
+            reference_id=reference_id,
+            notes=notes,
+            created_by=created_by
+        )
+        db.session.add(movement)
+        return movement
+
+    @staticmethod
+    def record_many(movements):
+        """
+        Bulk insert movements in one executemany
+
+        Args:
+            movements: List of dicts with inventory_id, item_name, quantity_change,
+                       movement_type and optional reference_type, reference_id,
+                       notes, created_by
+        """
+        rows = [movement for movement in movements if movement.get('quantity_change')]
+        if not rows:
+            return
+
+        now = get_ist_now()
+        db.session.execute(insert(StockMovement), [
+            {
+                'inventory_id': row['inventory_id'],
+                'item_name': row['item_name'],
+                'quantity_change': int(row['quantity_change']),
+                'movement_type': row['movement_type'],
+                'reference_type': row.get('reference_type'),
+                'reference_id': row.get('reference_id'),
+                'notes': row.get('notes'),
+                'created_by': row.get('created_by'),
+                'created_at': now
+            }
+            for row in rows
+        ])
+
+    @staticmethod
+    def get_item_movements(inventory_id, start=None, end=None, limit=200):
+        """Get movements for one item, newest first"""
+        try:
+            query = StockMovement.query.filter(StockMovement.inventory_id == inventory_id)
+
+            if start:
+                query = query.filter(StockMovement.created_at >= start)
+            if end:
+                query = query.filter(StockMovement.created_at <= end)
+
+            movements = query.order_by(StockMovement.created_at.desc(), StockMovement.id.desc()).limit(limit).all()
+            return [movement.to_dict() for movement in movements]
+        except Exception as e:
+            raise Exception(f"Error fetching stock movements: {str(e)}")
+
+    @staticmethod
+    def create_checkpoints():
+        """
+        Snapshot the current balance of every item
+
+        Each checkpoint records the highest movement id it already includes,
+        so as-of queries only sum movements written after it.
+        """
+        try:
+            now = get_ist_now()
+            last_movement = db.session.query(
+                StockMovement.inventory_id,
+                func.max(StockMovement.id).label('last_movement_id')
+            ).group_by(StockMovement.inventory_id).subquery()
+
+            snapshot = db.session.query(
+                StoreInventory.id,
+                StoreInventory.quantity,
+                func.coalesce(last_movement.c.last_movement_id, 0),
+                db.literal(now)
+            ).outerjoin(last_movement, last_movement.c.inventory_id == StoreInventory.id)
+
+            result = db.session.execute(
+                insert(StockCheckpoint).from_select(
+                    ['inventory_id', 'balance', 'last_movement_id', 'checkpoint_at'],
+                    snapshot
+                )
+            )
+            db.session.commit()
+
+            return {
+                'message': 'Stock checkpoints created',
+                'checkpointAt': now.isoformat(),
+                'items': result.rowcount
+            }
+        except Exception as e:
+            db.session.rollback()
+            raise Exception(f"Error creating stock checkpoints: {str(e)}")
+
+    @staticmethod
+    def get_stock_as_of(as_of):
+        """
+        Get every item's balance at a past timestamp in a single query
+
+        Balance = latest checkpoint at or before as_of + movements after that
+        checkpoint up to as_of. Items created after as_of are excluded.
+        """
+        try:
+            latest_checkpoint_ids = db.session.query(
+                func.max(StockCheckpoint.id)
+            ).filter(
+                StockCheckpoint.checkpoint_at <= as_of
+            ).group_by(StockCheckpoint.inventory_id)
+
+            checkpoints = db.session.query(
+                StockCheckpoint.inventory_id,
+                StockCheckpoint.balance,
+                StockCheckpoint.last_movement_id
+            ).filter(StockCheckpoint.id.in_(latest_checkpoint_ids)).subquery()
+
+            rows = db.session.query(
+                StoreInventory.id,
+                StoreInventory.name,
+                StoreInventory.category,
+                func.coalesce(checkpoints.c.balance, 0),
+                func.coalesce(func.sum(StockMovement.quantity_change), 0)
+            ).outerjoin(
+                checkpoints, checkpoints.c.inventory_id == StoreInventory.id
+            ).outerjoin(
+                StockMovement, and_(
+                    StockMovement.inventory_id == StoreInventory.id,
+                    StockMovement.created_at <= as_of,
+                    StockMovement.id > func.coalesce(checkpoints.c.last_movement_id, 0)
+                )
+            ).filter(
+                StoreInventory.created_at <= as_of
+            ).group_by(
+                StoreInventory.id,
+                StoreInventory.name,
+                StoreInventory.category,
+                checkpoints.c.balance
+            ).order_by(StoreInventory.name).all()
+
+            return [
+                {
+                    'id': item_id,
+                    'name': name,
+                    'category': category,
+                    'quantity': int(checkpoint_balance or 0) + int(movement_total or 0)
+                }
+                for item_id, name, category, checkpoint_balance, movement_total in rows
+            ]
+        except Exception as e:
+            raise Exception(f"Error computing stock as of {as_of}: {str(e)}")
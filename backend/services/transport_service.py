@@ -3,15 +3,22 @@ Transport Service Module
 Handles business logic for transport operations (company delivery orders)
 """
 from datetime import datetime, timedelta
+from sqlalchemy import or_
 from utils.timezone_helpers import get_ist_now
 from models import db, TransportJob, DispatchRequest, SalesOrder, ShowroomProduct, Vehicle
 from models.sales import TransportApprovalRequest, SalesTransaction
 from models.showroom import GatePass
 from models.transport import PartLoadDetail
 from services.notification_service import NotificationService
+from utils.change_tracking import cached_by_tables
+from utils.pagination import paginate
 
 
 class TransportService:
+    # API sort names accepted by the paged list endpoints
+    TRANSPORT_JOB_SORT_FIELDS = {'createdAt': TransportJob.created_at, 'updatedAt': TransportJob.updated_at}
+    VEHICLE_SORT_FIELDS = {'createdAt': Vehicle.created_at}
+
     @staticmethod
     def fill_part_load_after_delivery(order_identifier, delivery_data):
         """Fill after-delivery details for completed part load order using various identifiers"""
@@ -688,21 +695,29 @@ class TransportService:
             raise Exception(f"Error fetching pending transport jobs: {str(e)}")
     
     @staticmethod
-    def get_all_transport_jobs():
-        """Get all transport jobs with all statuses (excluding part load orders)"""
+    def get_all_transport_jobs(page=None):
+        """
+        Get all transport jobs with all statuses (excluding part load orders),
+        or a Page of them when a PageRequest is given
+        """
         try:
-            transport_jobs = TransportJob.query.order_by(TransportJob.created_at.desc()).all()
+            # Jobs without a dispatch request and part load orders (which have
+            # their own separate section) are filtered in SQL so pages stay full
+            query = TransportJob.query.join(
+                DispatchRequest, DispatchRequest.id == TransportJob.dispatch_request_id
+            ).filter(
+                or_(DispatchRequest.original_delivery_type.is_(None),
+                    DispatchRequest.original_delivery_type != 'part load')
+            )
+            if page is not None:
+                result_page = paginate(query, page, TransportJob.id)
+                transport_jobs = result_page.items
+            else:
+                transport_jobs = query.order_by(TransportJob.created_at.desc()).all()
             
             jobs = []
             for job in transport_jobs:
-                # Get related dispatch request
                 dispatch_request = DispatchRequest.query.get(job.dispatch_request_id)
-                if not dispatch_request:
-                    continue
-                
-                # Skip part load orders - they have their own separate section
-                if dispatch_request.original_delivery_type == 'part load':
-                    continue
                 
                 # Get sales order if available
                 sales_order = None
@@ -736,6 +751,9 @@ class TransportService:
                     'originalDeliveryType': getattr(dispatch_request, 'original_delivery_type', None) or ''
                 })
             
+            if page is not None:
+                result_page.items = jobs
+                return result_page
             return jobs
         except Exception as e:
             raise Exception(f"Error fetching transport jobs: {str(e)}")
@@ -1033,6 +1051,7 @@ class TransportService:
             raise Exception(f"Error fetching in-transit deliveries: {str(e)}")
     
     @staticmethod
+    @cached_by_tables(TransportJob, DispatchRequest)
     def get_transport_summary():
         """Get transport department summary statistics (excluding part load orders)"""
         try:
@@ -1213,9 +1232,11 @@ class TransportService:
     
     # Fleet Management Methods
     @staticmethod
-    def get_fleet_vehicles():
-        """Get all fleet vehicles"""
+    def get_fleet_vehicles(page=None):
+        """Get all fleet vehicles, or a Page of them when a PageRequest is given"""
         try:
+            if page is not None:
+                return paginate(Vehicle.query, page, Vehicle.id).map(lambda vehicle: vehicle.to_dict())
             vehicles = Vehicle.query.order_by(Vehicle.created_at.desc()).all()
             return [vehicle.to_dict() for vehicle in vehicles]
         except Exception as e:
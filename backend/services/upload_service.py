@@ -0,0 +1,228 @@
+"""
+Upload Service Module
+Content-addressed storage for uploaded photos (watchman, gate entry, guest list)
+
+Files are named by the SHA-256 of their bytes, so identical uploads share one
+file and a name never changes content; that lets them be served with strong
+ETags and Cache-Control: immutable. Thumbnails are rendered in a background
+thread after each upload, and on demand if a request arrives first.
+"""
+import base64
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+# Longest side in pixels for each thumbnail size
+THUMBNAIL_SIZES = {'sm': 160, 'md': 480}
+THUMBNAIL_FORMATS = {'webp': ('WEBP', 'image/webp'), 'jpeg': ('JPEG', 'image/jpeg')}
+
+# MPO is how Pillow reports multi-frame (multi-picture) JPEGs from phone cameras
+IMAGE_EXTENSIONS = {'JPEG': '.jpg', 'MPO': '.jpg', 'PNG': '.png', 'WEBP': '.webp', 'GIF': '.gif'}
+MIMETYPES = {'.jpg': 'image/jpeg', '.png': 'image/png', '.webp': 'image/webp', '.gif': 'image/gif'}
+
+NAME_PATTERN = re.compile(r'^[0-9a-f]{64}\.(jpg|png|webp|gif)$')
+CHUNK_SIZE = 64 * 1024
+
+
+class UploadService:
+    """Service class for content-addressed uploads"""
+
+    _executor = None
+    _pending = set()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _setting(name, default):
+        try:
+            return current_app.config.get(name, default)
+        except RuntimeError:
+            return default
+
+    @classmethod
+    def _root(cls):
+        root = cls._setting('UPLOAD_STORE_DIR', None)
+        if not root:
+            upload_folder = cls._setting('UPLOAD_FOLDER', None) or os.path.join(os.getcwd(), 'backend', 'uploads')
+            root = os.path.join(upload_folder, 'store')
+        os.makedirs(root, exist_ok=True)
+        return root
+
+    @classmethod
+    def _path(cls, name):
+        """Absolute path of a stored file, sharded by the first two hex digits"""
+        if not NAME_PATTERN.match(name):
+            raise ValueError('Invalid file name')
+        return os.path.join(cls._root(), name[:2], name)
+
+    @staticmethod
+    def _thumbnail_path(root, name, size, fmt):
+        digest = name.split('.')[0]
+        extension = 'webp' if fmt == 'webp' else 'jpg'
+        return os.path.join(root, 'thumbs', name[:2], f'{digest}_{size}.{extension}')
+
+    # ------------------------------------------------------------------
+    # Storing
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def store(cls, stream):
+        """
+        Store an uploaded image, deduplicating by content
+
+        Args:
+            stream: Readable binary file object (e.g. a werkzeug FileStorage)
+
+        Returns:
+            str: Stored name, '<sha256>.<ext>'
+
+        Raises:
+            ValueError: If the data is too large or not a supported image
+        """
+        from PIL import Image, UnidentifiedImageError
+
+        max_bytes = int(cls._setting('UPLOAD_MAX_BYTES', 15 * 1024 * 1024))
+        root = cls._root()
+        digest = hashlib.sha256()
+        size = 0
+
+        fd, tmp_path = tempfile.mkstemp(dir=root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ValueError(f'File exceeds the {max_bytes // (1024 * 1024)} MB upload limit')
+                    digest.update(chunk)
+                    tmp_file.write(chunk)
+
+            try:
+                with Image.open(tmp_path) as image:
+                    image_format = image.format
+                    image.verify()
+            except (UnidentifiedImageError, OSError, SyntaxError):
+                raise ValueError('Uploaded file is not a valid image')
+            if image_format not in IMAGE_EXTENSIONS:
+                raise ValueError(f'Unsupported image format: {image_format}')
+
+            name = digest.hexdigest() + IMAGE_EXTENSIONS[image_format]
+            path = cls._path(name)
+            if os.path.exists(path):
+                os.remove(tmp_path)  # Duplicate upload
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        cls.schedule_thumbnails(name)
+        return name
+
+    @classmethod
+    def store_base64(cls, data):
+        """Store a base64 image (optionally a data: URL) and return its stored name"""
+        import io
+
+        if data.startswith('data:'):
+            data = data.partition(',')[2]
+        try:
+            raw = base64.b64decode(data)
+        except ValueError:
+            raise ValueError('Photo is not valid base64 data')
+        return cls.store(io.BytesIO(raw))
+
+    # ------------------------------------------------------------------
+    # Thumbnails
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _get_executor(cls):
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=int(cls._setting('UPLOAD_THUMBNAIL_WORKERS', 1)),
+                    thread_name_prefix='upload-thumbnails'
+                )
+            return cls._executor
+
+    @classmethod
+    def schedule_thumbnails(cls, name):
+        """Render every thumbnail size/format for a stored file in the background"""
+        root = cls._root()  # Resolved here: the worker thread has no app context
+        with cls._lock:
+            if name in cls._pending:
+                return
+            cls._pending.add(name)
+        cls._get_executor().submit(cls._render_all, root, name)
+
+    @classmethod
+    def _render_all(cls, root, name):
+        try:
+            for size in THUMBNAIL_SIZES:
+                for fmt in THUMBNAIL_FORMATS:
+                    cls._render(root, name, size, fmt)
+        except Exception as e:
+            logger.warning(f"Thumbnail generation failed for {name}: {e}")
+        finally:
+            with cls._lock:
+                cls._pending.discard(name)
+
+    @classmethod
+    def _render(cls, root, name, size, fmt):
+        from PIL import Image, ImageOps
+
+        target = cls._thumbnail_path(root, name, size, fmt)
+        if os.path.exists(target):
+            return target
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with Image.open(os.path.join(root, name[:2], name)) as image:
+            image = ImageOps.exif_transpose(image)  # Phone cameras store rotation in EXIF
+            image.thumbnail((THUMBNAIL_SIZES[size], THUMBNAIL_SIZES[size]))
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as tmp_file:
+                image.convert('RGB').save(tmp_file, format=THUMBNAIL_FORMATS[fmt][0], quality=80)
+        os.replace(tmp_path, target)
+        return target
+
+    # ------------------------------------------------------------------
+    # Serving
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def open(cls, name, size=None, fmt='jpeg'):
+        """
+        Resolve a stored file or one of its thumbnails
+
+        Returns:
+            (path, mimetype, etag)
+
+        Raises:
+            ValueError: Invalid name or size
+            FileNotFoundError: Unknown file
+        """
+        path = cls._path(name)
+        if not os.path.exists(path):
+            raise FileNotFoundError(name)
+
+        if not size:
+            return path, MIMETYPES[os.path.splitext(name)[1]], name.split('.')[0]
+
+        if size not in THUMBNAIL_SIZES:
+            raise ValueError(f"Invalid size. Allowed: {', '.join(THUMBNAIL_SIZES)}")
+        thumbnail = cls._render(cls._root(), name, size, fmt)  # Returns at once if already rendered
+        return thumbnail, THUMBNAIL_FORMATS[fmt][1], f"{name.split('.')[0]}-{size}-{fmt}"
+
+    @classmethod
+    def url(cls, name, size=None):
+        """Absolute URL for a stored file (stored on records so browsers can load it directly)"""
+        backend_url = cls._setting('BACKEND_BASE_URL', 'http://localhost:5000')
+        return f"{backend_url}/api/files/{name}" + (f"?size={size}" if size else '')
@@ -3,8 +3,9 @@ Watchman Service Module
 Handles business logic for watchman operations (gate security for self-pickup orders)
 """
 from datetime import datetime
-from utils.timezone_helpers import get_ist_now
+from utils.timezone_helpers import get_ist_now, day_bounds
 from models import db, GatePass, DispatchRequest, SalesOrder, ShowroomProduct, TransportJob
+from utils.change_tracking import cached_by_tables
 
 
 class WatchmanService:
@@ -325,29 +326,34 @@ class WatchmanService:
             raise Exception(f"Error rejecting pickup: {str(e)}")
     
     @staticmethod
+    @cached_by_tables(GatePass)
     def get_daily_summary():
         """Get daily summary of watchman activities"""
         try:
-            today = datetime.now().date()
+            day_start, day_end = day_bounds(datetime.now().date())
 
             # Count gate passes by status for today
             today_pending = GatePass.query.filter(
-                db.func.date(GatePass.issued_at) == today,
+                GatePass.issued_at >= day_start,
+                GatePass.issued_at < day_end,
                 GatePass.status == 'pending'
             ).count()
 
             today_verified = GatePass.query.filter(
-                db.func.date(GatePass.verified_at) == today,
+                GatePass.verified_at >= day_start,
+                GatePass.verified_at < day_end,
                 GatePass.status == 'verified'
             ).count()
 
             today_entered = GatePass.query.filter(
-                db.func.date(GatePass.verified_at) == today,
+                GatePass.verified_at >= day_start,
+                GatePass.verified_at < day_end,
                 GatePass.status == 'entered_for_pickup'
             ).count()
 
             today_rejected = GatePass.query.filter(
-                db.func.date(GatePass.verified_at) == today,
+                GatePass.verified_at >= day_start,
+                GatePass.verified_at < day_end,
                 GatePass.status == 'rejected'
             ).count()
 
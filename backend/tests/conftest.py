@@ -0,0 +1,44 @@
+"""
+Shared pytest fixtures
+
+Tests run against a temporary SQLite file (so worker threads get their own
+connections) unless TEST_DATABASE_URI points at a scratch MySQL database.
+Run from the backend directory:
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+from sqlalchemy.dialects.mysql import LONGTEXT, MEDIUMTEXT
+from sqlalchemy.ext.compiler import compiles
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# MySQL-only column types used by the models
+compiles(LONGTEXT, 'sqlite')(lambda element, compiler, **kw: 'TEXT')
+compiles(MEDIUMTEXT, 'sqlite')(lambda element, compiler, **kw: 'TEXT')
+
+
+@pytest.fixture
+def app(tmp_path):
+    import config
+    from app import create_app
+    from models import db
+
+    database_uri = os.getenv('TEST_DATABASE_URI') or f"sqlite:///{tmp_path / 'test.db'}"
+
+    class FileDatabaseConfig(config.TestConfig):
+        SQLALCHEMY_DATABASE_URI = database_uri
+        SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 30}} if database_uri.startswith('sqlite') else {}
+        SESSION_FILE_DIR = str(tmp_path / 'flask_session')
+        SKIP_MIGRATIONS = True
+
+    config.config['pytest'] = FileDatabaseConfig
+    app = create_app('pytest')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
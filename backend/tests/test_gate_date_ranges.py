@@ -0,0 +1,88 @@
+"""
+Gate and watchman day filters must be sargable
+
+Every query that filters a datetime column by day has to use a half-open
+range (column >= day start AND column < next day start) so MySQL can use
+the indexes; wrapping the column in DATE() forces a full scan. The tests
+capture the SQL the services actually emit.
+"""
+import re
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from models import db, GateUser
+from services.gate_entry_service_db import gate_entry_service_db
+from services.gate_presence_service import gate_presence
+from services.watchman_service import WatchmanService
+
+
+@contextmanager
+def captured_sql():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(' '.join(statement.split()))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def assert_range_filtered(statements, column):
+    """Some statement filters column by a >= / < range, and none wraps a column in DATE()"""
+    assert statements, 'no SQL was executed'
+    for statement in statements:
+        assert not re.search(r'\bDATE\s*\(', statement, re.IGNORECASE), statement
+
+    filtering = [statement for statement in statements if f'{column} >=' in statement]
+    assert filtering, f'no range filter on {column} in {statements}'
+    for statement in filtering:
+        assert f'{column} <' in statement.replace(f'{column} <=', ''), statement
+
+
+@pytest.fixture
+def gate_user(app):
+    user = GateUser(name='Test User', phone='9000000000', status='active')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def test_going_out_status_uses_range(app, gate_user):
+    gate_presence.invalidate()
+    with captured_sql() as statements:
+        gate_entry_service_db.get_going_out_status(gate_user)
+        gate_entry_service_db._find_open_going_out(gate_user.id)
+    assert_range_filtered(statements, 'going_out_logs.going_out_time')
+
+
+def test_today_logs_use_range(app):
+    with captured_sql() as statements:
+        gate_entry_service_db.get_today_logs(include_records=True)
+    assert_range_filtered(statements, 'going_out_logs.going_out_time')
+
+
+def test_going_out_logs_use_range(app):
+    with captured_sql() as statements:
+        gate_entry_service_db.get_going_out_logs(date_filter=date.today())
+        list(gate_entry_service_db.iter_going_out_log_rows(date_filter=date.today()))
+    assert_range_filtered(statements, 'going_out_logs.going_out_time')
+
+
+def test_gate_logs_use_range(app):
+    with captured_sql() as statements:
+        gate_entry_service_db.get_gate_logs(date_filter=date.today())
+        list(gate_entry_service_db.iter_gate_log_rows(date_filter=date.today()))
+    assert_range_filtered(statements, 'gate_entry_logs.timestamp')
+
+
+def test_watchman_daily_summary_uses_range(app):
+    with captured_sql() as statements:
+        WatchmanService.get_daily_summary.uncached()
+    assert_range_filtered(statements, 'gate_pass.issued_at')
+    assert_range_filtered(statements, 'gate_pass.verified_at')
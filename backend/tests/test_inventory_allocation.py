@@ -0,0 +1,139 @@
+"""
+Concurrency tests for InventoryAllocationService
+
+Several threads allocate the same items at once, each in its own app
+context (and so its own session and connection). Whatever order the
+database lets them through in, stock must never be oversubscribed or go
+negative, and the ledger must account for every unit taken.
+"""
+import threading
+
+from sqlalchemy import func
+
+from models import db, StoreInventory, StockMovement
+from services.inventory_allocation_service import InventoryAllocationService
+
+THREADS = 8
+
+
+def _seed(stock):
+    for name, quantity in stock.items():
+        db.session.add(StoreInventory(name=name, quantity=quantity, category='Raw Material'))
+    db.session.commit()
+
+
+def _run_concurrently(app, materials, allow_partial):
+    """Allocate materials from THREADS threads at once; returns the committed plans and the errors"""
+    barrier = threading.Barrier(THREADS)
+    plans = []
+    errors = []
+    results_lock = threading.Lock()
+
+    def worker(reference_id):
+        with app.app_context():
+            def unit_of_work():
+                plan = InventoryAllocationService.allocate(
+                    materials,
+                    allow_partial=allow_partial,
+                    reference_type='test',
+                    reference_id=reference_id
+                )
+                db.session.commit()
+                return plan
+
+            barrier.wait()
+            try:
+                plan = InventoryAllocationService.run_with_retry(unit_of_work)
+                with results_lock:
+                    plans.append(plan)
+            except Exception as e:
+                db.session.rollback()
+                with results_lock:
+                    errors.append(e)
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return plans, errors
+
+
+def _balances():
+    db.session.expire_all()
+    return {item.name: item.quantity for item in StoreInventory.query.all()}
+
+
+def _ledger_totals():
+    rows = db.session.query(
+        StockMovement.item_name,
+        func.sum(StockMovement.quantity_change)
+    ).filter(StockMovement.movement_type == 'allocation').group_by(StockMovement.item_name).all()
+    return {name: -int(total) for name, total in rows}
+
+
+def _allocated(plans, stock):
+    """Units each item lost according to the committed plans"""
+    ids = {item.id: item.name for item in StoreInventory.query.all()}
+    allocated = dict.fromkeys(stock, 0)
+    for plan in plans:
+        for item_id, quantity in plan['allocations'].items():
+            allocated[ids[item_id]] += quantity
+    return allocated
+
+
+def test_full_allocations_never_oversubscribe(app):
+    stock = {'Steel Sheet': 10, 'Bolt': 25}
+    _seed(stock)
+    # Each request needs 3 sheets and 5 bolts: stock covers three requests at most
+    materials = [{'name': 'Steel Sheet', 'quantity': 3}, {'name': 'bolt', 'quantity': 5}]
+
+    plans, errors = _run_concurrently(app, materials, allow_partial=False)
+
+    balances = _balances()
+    allocated = _allocated(plans, stock)
+    fulfilled = [plan for plan in plans if plan['allAvailable']]
+
+    assert errors == []
+    assert len(plans) == THREADS
+    assert all(quantity >= 0 for quantity in balances.values())
+    assert len(fulfilled) == 3
+    assert all(not plan['allocations'] for plan in plans if not plan['allAvailable'])
+    assert allocated == {'Steel Sheet': 3 * len(fulfilled), 'Bolt': 5 * len(fulfilled)}
+    assert balances == {name: stock[name] - allocated[name] for name in stock}
+    assert _ledger_totals() == {name: quantity for name, quantity in allocated.items() if quantity}
+
+
+def test_partial_allocations_never_go_negative(app):
+    stock = {'Copper Wire': 10}
+    _seed(stock)
+    materials = [{'name': 'Copper Wire', 'quantity': 4}]
+
+    plans, errors = _run_concurrently(app, materials, allow_partial=True)
+
+    balances = _balances()
+    allocated = _allocated(plans, stock)
+
+    assert errors == []
+    assert len(plans) == THREADS
+    assert balances['Copper Wire'] >= 0
+    # Demand (8 x 4) exceeds stock, so every unit ends up allocated
+    assert allocated['Copper Wire'] == stock['Copper Wire']
+    assert balances['Copper Wire'] == stock['Copper Wire'] - allocated['Copper Wire']
+    assert _ledger_totals().get('Copper Wire', 0) == allocated['Copper Wire']
+    # A request that ran after the stock was gone got nothing rather than an overdraft
+    assert all(sum(plan['allocations'].values()) <= 4 for plan in plans)
+
+
+def test_repeated_material_in_one_request_is_not_allocated_twice(app):
+    _seed({'Paint': 5})
+    materials = [{'name': 'Paint', 'quantity': 4}, {'name': ' paint ', 'quantity': 4}]
+
+    plan = InventoryAllocationService.allocate(materials, allow_partial=True)
+    db.session.commit()
+
+    assert plan['partialAllocated']
+    assert sum(plan['allocations'].values()) == 5
+    assert _balances() == {'Paint': 0}
@@ -0,0 +1,359 @@
+"""
+Per-table change versions
+
+Every commit that inserted, updated or deleted ORM rows bumps a counter per
+touched table, so any worker can tell cheaply whether a table changed since
+it last looked. Versions are kept at two levels:
+
+    in-process - bumped as soon as this worker commits, so its own writes
+                 are seen immediately
+    shared     - the table_versions table, mirrored to Redis when
+                 CHANGE_TRACKING_REDIS_URL is set (reads then skip the
+                 database), so writes from other workers are seen too
+
+Two decorators build on them:
+
+    @conditional_by_tables - polled GET endpoints answer If-None-Match with
+                             304 without running their aggregation
+    @cached_by_tables      - service functions are memoized per process and
+                             recomputed once a table they read has changed
+
+Only writes made through the ORM session are seen (including
+query.update()/delete()); raw SQL is not. That is why cached results and
+ETags also expire after CHANGE_CACHE_TTL / CONDITIONAL_GET_MAX_AGE seconds.
+"""
+import copy
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, make_response, request
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import object_mapper
+from models import db
+from models.table_version import TableVersion
+from utils.db_routing import RoutingSession
+from utils.timezone_helpers import get_ist_now
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = 'changed_tables'
+REDIS_KEY = 'alankar:table_versions'
+
+_lock = threading.Lock()
+_local_versions = {}  # table name -> commits seen by this process
+_shared_snapshot = {}  # table name -> (shared version, time.monotonic() when read)
+_redis = None
+
+
+def _setting(name, default):
+    try:
+        return current_app.config.get(name, default)
+    except RuntimeError:
+        return default
+
+
+def _table_names(tables):
+    """Table names from model classes or names"""
+    return sorted(table if isinstance(table, str) else table.__table__.name for table in tables)
+
+
+def _get_redis():
+    global _redis
+    url = _setting('CHANGE_TRACKING_REDIS_URL', None)
+    if not url:
+        return None
+    if _redis is None:
+        import redis
+        _redis = redis.Redis.from_url(url, socket_timeout=1)
+    return _redis
+
+
+# --------------------------------------------------------------------
+# Tracking
+# --------------------------------------------------------------------
+def _mark(session, mapper):
+    session.info.setdefault(PENDING_KEY, set()).update(table.name for table in mapper.tables)
+
+
+def _after_flush(session, flush_context):
+    for obj in session.new:
+        _mark(session, object_mapper(obj))
+    for obj in session.deleted:
+        _mark(session, object_mapper(obj))
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            _mark(session, object_mapper(obj))
+
+
+def _after_bulk(update_context):
+    mapper = getattr(update_context, 'mapper', None)
+    if mapper is not None:
+        _mark(update_context.session, mapper)
+
+
+def _after_soft_rollback(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_KEY, None)
+
+
+def _after_commit(session):
+    tables = session.info.pop(PENDING_KEY, None)
+    if tables:
+        tables.discard(TableVersion.__tablename__)
+        if tables:
+            bump_tables(tables)
+
+
+def _bump_database(names, now):
+    version_table = TableVersion.__table__
+    with db.engine.begin() as connection:
+        result = connection.execute(
+            update(version_table)
+            .where(version_table.c.table_name.in_(names))
+            .values(version=version_table.c.version + 1, updated_at=now)
+        )
+        if result.rowcount < len(names):
+            existing = set(connection.execute(
+                select(version_table.c.table_name).where(version_table.c.table_name.in_(names))
+            ).scalars())
+            for name in names:
+                if name in existing:
+                    continue
+                try:
+                    with connection.begin_nested():
+                        connection.execute(insert(version_table).values(table_name=name, version=1, updated_at=now))
+                except IntegrityError:
+                    # Another worker created the row first
+                    connection.execute(
+                        update(version_table)
+                        .where(version_table.c.table_name == name)
+                        .values(version=version_table.c.version + 1, updated_at=now)
+                    )
+
+
+def bump_tables(tables):
+    """Record a change to each table: in-process at once, then in the shared store"""
+    names = _table_names(tables)
+    with _lock:
+        for name in names:
+            _local_versions[name] = _local_versions.get(name, 0) + 1
+            _shared_snapshot.pop(name, None)
+
+    try:
+        _bump_database(names, get_ist_now())
+    except Exception as e:
+        logger.warning(f"Could not bump table versions for {', '.join(names)}: {e}")
+
+    try:
+        client = _get_redis()
+        if client is not None:
+            pipeline = client.pipeline(transaction=False)
+            for name in names:
+                pipeline.hincrby(REDIS_KEY, name, 1)
+            pipeline.execute()
+    except Exception as e:
+        logger.warning(f"Could not bump table versions in Redis: {e}")
+
+
+def get_table_versions(tables):
+    """
+    Shared {table name: version} for the given models or names; never-written tables are 0
+    Reads Redis when configured, otherwise (or if Redis fails) table_versions.
+    """
+    names = _table_names(tables)
+    versions = dict.fromkeys(names, 0)
+
+    try:
+        client = _get_redis()
+        if client is not None:
+            for name, version in zip(names, client.hmget(REDIS_KEY, names)):
+                versions[name] = int(version or 0)
+            return versions
+    except Exception as e:
+        logger.warning(f"Table versions unavailable from Redis, reading the database: {e}")
+
+    rows = db.session.execute(
+        select(TableVersion.table_name, TableVersion.version).where(TableVersion.table_name.in_(names))
+    ).all()
+    versions.update({name: version for name, version in rows})
+    return versions
+
+
+def get_cache_versions(names):
+    """
+    Version key for cached results: shared versions (re-read at most every
+    CHANGE_TRACKING_POLL_SECONDS) combined with this process's own commits
+    """
+    poll_seconds = float(_setting('CHANGE_TRACKING_POLL_SECONDS', 1.0))
+    now = time.monotonic()
+    with _lock:
+        stale = [
+            name for name in names
+            if name not in _shared_snapshot or now - _shared_snapshot[name][1] >= poll_seconds
+        ]
+    if stale:
+        fetched = get_table_versions(stale)
+        with _lock:
+            for name, version in fetched.items():
+                _shared_snapshot[name] = (version, now)
+    with _lock:
+        return tuple(
+            (name, _shared_snapshot.get(name, (0, now))[0], _local_versions.get(name, 0))
+            for name in names
+        )
+
+
+def install_change_tracking():
+    """Register the session hooks (idempotent)"""
+    hooks = (
+        ('after_flush', _after_flush),
+        ('after_bulk_update', _after_bulk),
+        ('after_bulk_delete', _after_bulk),
+        ('after_soft_rollback', _after_soft_rollback),
+        ('after_commit', _after_commit)
+    )
+    for name, hook in hooks:
+        if not event.contains(RoutingSession, name, hook):
+            event.listen(RoutingSession, name, hook)
+
+
+# --------------------------------------------------------------------
+# Read-through cache
+# --------------------------------------------------------------------
+def _has_uncommitted_writes():
+    """True if the current session holds writes other requests cannot see yet"""
+    session = db.session()
+    return bool(session.info.get(PENDING_KEY) or session.new or session.deleted or session.dirty)
+
+
+def cached_by_tables(*tables, ttl=None, maxsize=256, copy_result=True):
+    """
+    Decorator to memoize a service function until one of its tables changes
+
+    Results are kept per process and keyed on the call arguments and today's
+    date; an entry is recomputed once any of the tables has a newer version
+    or it is older than ttl seconds. Use it on functions that return plain
+    data (dicts, lists, numbers), never ORM objects, and whose result depends
+    only on their arguments, the date and the given tables.
+
+    The wrapper has cache_clear() and uncached (the original function).
+    Put @staticmethod/@classmethod above it.
+
+    Args:
+        tables: Model classes or table names the function reads
+        ttl: Maximum age in seconds (defaults to CHANGE_CACHE_TTL)
+        maxsize: Distinct argument combinations kept (least recently used go first)
+        copy_result: Return a deep copy so callers may modify the result;
+            pass False for results callers only read
+    """
+    names = _table_names(tables)
+
+    def decorator(f):
+        entries = OrderedDict()  # call key -> (versions, expires_at, result)
+        entries_lock = threading.Lock()
+
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            try:
+                key = (args, tuple(sorted(kwargs.items())), get_ist_now().date())
+                hash(key)
+            except TypeError:
+                return f(*args, **kwargs)  # Unhashable arguments
+
+            if _has_uncommitted_writes():
+                return f(*args, **kwargs)
+
+            try:
+                versions = get_cache_versions(names)
+            except Exception as e:
+                logger.warning(f"Table versions unavailable, not caching {f.__qualname__}: {e}")
+                return f(*args, **kwargs)
+
+            now = time.monotonic()
+            with entries_lock:
+                entry = entries.get(key)
+                if entry is not None and entry[0] == versions and entry[1] > now:
+                    entries.move_to_end(key)
+                    result = entry[2]
+                    return copy.deepcopy(result) if copy_result else result
+
+            result = f(*args, **kwargs)
+
+            max_age = ttl if ttl is not None else float(_setting('CHANGE_CACHE_TTL', 300))
+            with entries_lock:
+                entries[key] = (versions, now + max_age, result)
+                entries.move_to_end(key)
+                while len(entries) > maxsize:
+                    entries.popitem(last=False)
+            return copy.deepcopy(result) if copy_result else result
+
+        def cache_clear():
+            with entries_lock:
+                entries.clear()
+
+        decorated_function.cache_clear = cache_clear
+        decorated_function.uncached = f
+        return decorated_function
+
+    return decorator
+
+
+# --------------------------------------------------------------------
+# Conditional GET
+# --------------------------------------------------------------------
+def conditional_by_tables(*tables, max_age=None):
+    """
+    Decorator for polled GET endpoints whose JSON depends only on the URL,
+    today's date and the given tables
+
+    Sends an ETag built from the tables' shared versions and answers a
+    matching If-None-Match with 304 before the view runs, so an unchanged
+    poll costs one small lookup. Place it below @read_only so the versions
+    and the data come from the same database.
+
+    Args:
+        tables: Model classes or table names the view reads
+        max_age: Seconds after which the view runs again even if no version
+            changed (defaults to CONDITIONAL_GET_MAX_AGE)
+    """
+    names = _table_names(tables)
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method != 'GET':
+                return f(*args, **kwargs)
+
+            try:
+                versions = get_table_versions(names)
+            except Exception as e:
+                logger.warning(f"Table versions unavailable, serving {request.path} unconditionally: {e}")
+                return f(*args, **kwargs)
+
+            window = max_age if max_age is not None else int(current_app.config.get('CONDITIONAL_GET_MAX_AGE', 300))
+            token = '|'.join([
+                request.full_path,
+                get_ist_now().date().isoformat(),
+                str(int(time.time() // window) if window else 0),
+                ','.join(f'{name}:{version}' for name, version in sorted(versions.items()))
+            ])
+            etag = hashlib.sha1(token.encode('utf-8')).hexdigest()
+
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+
+        return decorated_function
+
+    return decorator
@@ -0,0 +1,120 @@
+"""
+Negotiated response compression
+
+Compresses textual responses (JSON, CSV, HTML...) with Brotli or gzip,
+whichever the client prefers in Accept-Encoding, once they are at least
+COMPRESS_MIN_SIZE bytes. Streamed and file responses (send_file, Excel and
+PDF downloads, photos) are left alone.
+
+Per-blueprint overrides come from COMPRESS_BLUEPRINTS, a comma-separated list
+of <blueprint>:<min size in bytes | off>, e.g. "audit:256,files:off".
+"""
+import gzip
+import logging
+from functools import lru_cache
+from flask import request
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIMETYPES = (
+    'application/json',
+    'text/html',
+    'text/plain',
+    'text/csv',
+    'text/css',
+    'application/javascript',
+    'image/svg+xml'
+)
+
+
+@lru_cache(maxsize=None)
+def _load_brotli():
+    """The brotli module, or None if it is not installed (gzip only)"""
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+
+def parse_blueprint_overrides(value):
+    """Parse COMPRESS_BLUEPRINTS into {blueprint name: min size, or None for off}"""
+    if isinstance(value, dict):
+        return value
+    overrides = {}
+    for item in (value or '').split(','):
+        if not item.strip():
+            continue
+        name, _, setting = item.partition(':')
+        setting = setting.strip().lower()
+        overrides[name.strip()] = None if setting in ('off', 'false', '0', '') else int(setting)
+    return overrides
+
+
+def compress(data, encoding, gzip_level=6, brotli_quality=4):
+    """Compress bytes with 'br' or 'gzip'"""
+    if encoding == 'br':
+        return _load_brotli().compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level)
+
+
+def init_compression(app):
+    """Register the after_request hook that compresses responses"""
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return
+
+    min_size = int(app.config.get('COMPRESS_MIN_SIZE', 1024))
+    gzip_level = int(app.config.get('COMPRESS_GZIP_LEVEL', 6))
+    brotli_quality = int(app.config.get('COMPRESS_BROTLI_QUALITY', 4))
+    mimetypes = set(app.config.get('COMPRESS_MIMETYPES') or DEFAULT_MIMETYPES)
+    overrides = parse_blueprint_overrides(app.config.get('COMPRESS_BLUEPRINTS'))
+
+    @app.after_request
+    def compress_response(response):
+        if (
+            response.mimetype not in mimetypes
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or request.method == 'HEAD'
+        ):
+            return response
+
+        # Caches must key compressed and plain variants separately
+        response.vary.add('Accept-Encoding')
+
+        threshold = min_size
+        if request.blueprint:
+            # request.blueprints runs from the innermost blueprint outwards
+            for name in request.blueprints:
+                if name in overrides:
+                    threshold = overrides[name]
+                    break
+            if threshold is None:
+                return response
+
+        data = response.get_data()
+        if len(data) < threshold:
+            return response
+
+        encodings = ['br', 'gzip'] if _load_brotli() is not None else ['gzip']
+        encoding = request.accept_encodings.best_match(encodings)
+        if encoding is None:
+            return response
+
+        try:
+            compressed = compress(data, encoding, gzip_level, brotli_quality)
+        except Exception as e:
+            logger.warning(f"Response compression failed, sending uncompressed: {e}")
+            return response
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+
+        # A strong ETag names the exact bytes; the compressed body only matches weakly
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
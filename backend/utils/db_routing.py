@@ -0,0 +1,64 @@
+"""
+Read-replica routing for SQLAlchemy
+
+When SQLALCHEMY_BINDS has a 'replica' engine, queries issued inside a
+read_only route (or a read_replica() block) are sent to it instead of the
+primary, so dashboards, reports and exports do not compete with order entry.
+Flushes always go to the primary, so an audit row written from a read-only
+route still lands in the right place. Without a replica everything stays on
+the primary.
+
+Replicas lag the primary slightly: only mark endpoints whose callers can
+tolerate data a few seconds old, and never a route that reads back a row it
+has just written.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = 'replica'
+
+_read_only = ContextVar('db_read_only', default=False)
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that reads from the replica bind while read-only"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is None and _read_only.get() and not self._flushing:
+            engines = self._db.engines
+            replica = engines.get(REPLICA_BIND)
+            # Only models on the default bind are replicated
+            if replica is not None and engine is engines.get(None):
+                return replica
+        return engine
+
+
+@contextmanager
+def read_replica():
+    """Route the queries in this block to the replica (e.g. in export jobs)"""
+    token = _read_only.set(True)
+    try:
+        yield
+    finally:
+        _read_only.reset(token)
+
+
+def read_only(f):
+    """
+    Decorator to mark a route as read-only so its queries use the replica
+    Place it below @bp.route(...) and any permission decorator.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        with read_replica():
+            return f(*args, **kwargs)
+
+    return decorated_function
+
+
+def is_read_only():
+    """True inside a read_only route or read_replica() block"""
+    return _read_only.get()
@@ -0,0 +1,41 @@
+"""
+Document Templates
+Jinja2 templates for invoice and payslip HTML, compiled once per process
+"""
+import os
+from functools import lru_cache
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from num2words import num2words
+
+TEMPLATE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'templates',
+    'documents'
+)
+
+
+def _format_value(value, spec):
+    """Jinja filter applying a Python format spec, e.g. {{ amount|fmt(',.2f') }}"""
+    return format(value, spec)
+
+
+document_env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(['html']),
+    auto_reload=False
+)
+document_env.filters['fmt'] = _format_value
+
+# Parsed and compiled at import so each render only executes the compiled code
+INVOICE_TEMPLATE = document_env.get_template('invoice.html')
+PAYSLIP_TEMPLATE = document_env.get_template('payslip.html')
+
+
+def amount_in_words(amount):
+    """Indian-English words for the whole-rupee part of an amount"""
+    return _rupees_in_words(int(amount))
+
+
+@lru_cache(maxsize=4096)
+def _rupees_in_words(rupees):
+    return num2words(rupees, lang='en_IN').title()
@@ -0,0 +1,166 @@
+"""
+Streaming Excel export helpers
+Writes large reports with openpyxl write-only worksheets and a temp file
+
+openpyxl is imported on first export, not at module import, so workers that
+never build a report do not load it.
+"""
+import tempfile
+from functools import lru_cache
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+@lru_cache(maxsize=None)
+def _styles():
+    """Shared cell styles, built once on first use"""
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+
+    thin = Side(style='thin')
+    return {
+        'header_font': Font(bold=True, color="FFFFFF"),
+        'header_fill': PatternFill(start_color="007BFF", end_color="007BFF", fill_type="solid"),
+        'thin_border': Border(left=thin, right=thin, top=thin, bottom=thin),
+        'center': Alignment(horizontal='center'),
+        'right': Alignment(horizontal='right')
+    }
+
+
+class StreamingSheet:
+    """
+    A write-only worksheet that sizes its columns while rows stream in
+
+    Write-only worksheets emit column widths before the first row, so the
+    first `width_sample_rows` rows are buffered to measure them; every row
+    after that goes straight to the worksheet's temp file.
+    """
+
+    def __init__(self, worksheet, headers, styled=False, right_aligned_columns=None,
+                 max_width=50, width_sample_rows=500):
+        self.worksheet = worksheet
+        self.headers = list(headers)
+        self.styled = styled
+        self.right_aligned_columns = set(right_aligned_columns or [])
+        self.max_width = max_width
+        self.width_sample_rows = width_sample_rows
+        self.widths = [len(str(header)) for header in self.headers]
+        self.row_count = 0
+        self._buffer = [self.headers]
+        self._flushed = False
+
+        from openpyxl.cell import WriteOnlyCell
+        self._cell_class = WriteOnlyCell
+
+    def append(self, values):
+        """Append one data row"""
+        values = list(values)
+        self.row_count += 1
+
+        if self._flushed:
+            self._write(values)
+            return
+
+        for index, value in enumerate(values):
+            length = len(str(value)) if value is not None else 0
+            if length > self.widths[index]:
+                self.widths[index] = length
+
+        self._buffer.append(values)
+        if len(self._buffer) > self.width_sample_rows:
+            self.flush()
+
+    def extend(self, rows):
+        """Append every row from an iterable"""
+        for values in rows:
+            self.append(values)
+
+    def flush(self):
+        """Set column widths and write any buffered rows"""
+        if self._flushed:
+            return
+
+        from openpyxl.utils import get_column_letter
+
+        for index, width in enumerate(self.widths, 1):
+            self.worksheet.column_dimensions[get_column_letter(index)].width = min(width + 2, self.max_width)
+
+        buffered, self._buffer = self._buffer, []
+        self._flushed = True
+        self._write_header(buffered[0])
+        for values in buffered[1:]:
+            self._write(values)
+
+    def _write_header(self, headers):
+        if not self.styled:
+            self.worksheet.append(headers)
+            return
+
+        styles = _styles()
+        cells = []
+        for header in headers:
+            cell = self._cell_class(self.worksheet, value=header)
+            cell.font = styles['header_font']
+            cell.fill = styles['header_fill']
+            cell.alignment = styles['center']
+            cell.border = styles['thin_border']
+            cells.append(cell)
+        self.worksheet.append(cells)
+
+    def _write(self, values):
+        if not self.styled:
+            self.worksheet.append(values)
+            return
+
+        styles = _styles()
+        cells = []
+        for index, value in enumerate(values):
+            cell = self._cell_class(self.worksheet, value=value)
+            cell.border = styles['thin_border']
+            if index in self.right_aligned_columns:
+                cell.alignment = styles['right']
+            cells.append(cell)
+        self.worksheet.append(cells)
+
+
+class StreamingWorkbook:
+    """
+    Write-only workbook saved to an anonymous temp file
+
+    Usage:
+        workbook = StreamingWorkbook()
+        sheet = workbook.add_sheet('Report', headers)
+        sheet.extend(rows)
+        excel_file = workbook.save()  # file object positioned at 0
+    """
+
+    def __init__(self):
+        from openpyxl import Workbook
+
+        self.workbook = Workbook(write_only=True)
+        self.sheets = []
+
+    def add_sheet(self, title, headers, **options):
+        """Create a worksheet; options are passed to StreamingSheet"""
+        sheet = StreamingSheet(self.workbook.create_sheet(title=title), headers, **options)
+        self.sheets.append(sheet)
+        return sheet
+
+    def save(self):
+        """
+        Write the workbook to a temp file
+
+        Returns:
+            A binary file object positioned at the start; the file is removed
+            from disk when it is closed (send_file closes it after streaming)
+        """
+        for sheet in self.sheets:
+            sheet.flush()
+
+        excel_file = tempfile.TemporaryFile(suffix='.xlsx')
+        try:
+            self.workbook.save(excel_file)
+            excel_file.seek(0)
+            return excel_file
+        except Exception:
+            excel_file.close()
+            raise
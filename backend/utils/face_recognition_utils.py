@@ -6,29 +6,37 @@ import base64
 import io
 import json
 import logging
-import numpy as np
-from PIL import Image
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
 
-# Try to import OpenCV
-try:
-    import cv2
-    FACE_RECOGNITION_AVAILABLE = True
-    logger.info("OpenCV (cv2) library loaded successfully")
-except ImportError as e:
-    FACE_RECOGNITION_AVAILABLE = False
-    logger.warning(f"OpenCV (cv2) library not available. Face recognition features will be disabled. Error: {e}")
+@lru_cache(maxsize=None)
+def _load_cv2():
+    """
+    Import OpenCV on first use (it adds ~100 MB RSS to every worker that imports it)
+
+    Returns:
+        The cv2 module, or None when it is not installed
+    """
+    try:
+        import cv2
+        logger.info("OpenCV (cv2) library loaded successfully")
+        return cv2
+    except ImportError as e:
+        logger.warning(f"OpenCV (cv2) library not available. Face recognition features will be disabled. Error: {e}")
+        return None
 
 
 def is_face_recognition_available():
-    """Check if face recognition is available"""
-    return FACE_RECOGNITION_AVAILABLE
+    """Check if face recognition is available (imports OpenCV on the first call)"""
+    return _load_cv2() is not None
 
 
 def base64_to_image(base64_string):
     """Convert base64 string to PIL Image"""
+    from PIL import Image
+
     try:
         # Remove data URL prefix if present
         if ',' in base64_string:
@@ -52,6 +60,8 @@ def base64_to_image(base64_string):
 
 def image_to_numpy(image):
     """Convert PIL Image to numpy array"""
+    import numpy as np
+
     try:
         return np.array(image)
     except Exception as e:
@@ -74,7 +84,8 @@ def generate_face_encoding(photo_base64):
             'face_count': int
         }
     """
-    if not FACE_RECOGNITION_AVAILABLE:
+    cv2 = _load_cv2()
+    if cv2 is None:
         logger.error("OpenCV not available for face encoding generation")
         return {
             'success': False,
@@ -259,13 +270,15 @@ def compare_faces(known_encoding_json, unknown_photo_base64, tolerance=0.6):
             'message': str
         }
     """
-    if not FACE_RECOGNITION_AVAILABLE:
+    cv2 = _load_cv2()
+    if cv2 is None:
         return {
             'success': False,
             'match': False,
             'distance': None,
             'message': 'Face recognition library not available'
         }
+    import numpy as np
     
     try:
         # Load known encoding (face image)
@@ -321,7 +334,8 @@ def recognize_face_from_database(unknown_photo_base64, known_faces_dict, toleran
             'message': str
         }
     """
-    if not FACE_RECOGNITION_AVAILABLE:
+    cv2 = _load_cv2()
+    if cv2 is None:
         return {
             'success': False,
             'recognized': False,
@@ -329,6 +343,7 @@ def recognize_face_from_database(unknown_photo_base64, known_faces_dict, toleran
             'distance': None,
             'message': 'Face recognition library not available'
         }
+    import numpy as np
     
     if not known_faces_dict:
         return {
@@ -0,0 +1,61 @@
+"""
+orjson-backed JSON provider for Flask
+
+Used by jsonify(), request.get_json() and app.json. datetime, date and time
+values are written in ISO 8601 (the same text as .isoformat()), Enum members
+as their value, Decimal as a string and sets as lists, so to_dict() methods
+may return them as they are. Falls back to Flask's default provider when
+orjson is not installed.
+"""
+import decimal
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional: the stdlib provider is used instead
+    orjson = None
+
+
+def _default(value):
+    """Types orjson does not serialize natively"""
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Serializes with orjson; API-compatible with Flask's default provider"""
+
+    # Keys keep to_dict() order; sorting them costs time and the clients do not care
+    sort_keys = False
+
+    def _options(self, indent=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=self._options(bool(kwargs.get('indent')))).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=_default, option=self._options(indent))
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    """Install the orjson provider on the app if orjson is available"""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+    return app.json
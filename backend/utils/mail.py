@@ -1,42 +1,222 @@
+"""
+Outgoing email
+Messages go through one long-lived transport per process, chosen by MAIL_TRANSPORT:
+    mailersend - MailerSend REST API over a pooled keep-alive requests.Session (default)
+    smtp       - any SMTP server (e.g. a local MailHog); one connection per batch
+    file       - writes each message as JSON under MAIL_FILE_DIR (tests, local dev)
+"""
+import json
+import logging
 import os
-from threading import Thread
+import smtplib
+import tempfile
+import threading
+import time
+import uuid
+from email.message import EmailMessage
+import requests
+from requests.adapters import HTTPAdapter
 from flask import current_app
-from mailersend import emails
+from utils.timezone_helpers import get_ist_now
+
+logger = logging.getLogger(__name__)
+
+MAILERSEND_API_URL = 'https://api.mailersend.com/v1'
+MAILERSEND_BULK_LIMIT = 500  # Messages per bulk-email request
+FROM_NAME = 'ERP Support'
+
+
+class MailDeliveryError(Exception):
+    """Raised when a transport could not hand a message over"""
+
+
+def _setting(name, default=None):
+    try:
+        return current_app.config.get(name, default)
+    except RuntimeError:
+        return os.environ.get(name, default)
+
+
+def build_message(from_email, to_email, subject, html_content, text_content=None):
+    """Message dict in MailerSend's email schema (every transport accepts it)"""
+    # Ensure 'to_email' is always a list
+    if isinstance(to_email, str):
+        to_email = [to_email]
+
+    return {
+        "from": {"email": from_email, "name": FROM_NAME},
+        "to": [{"email": addr} for addr in to_email],
+        "subject": subject,
+        "html": html_content,
+        "text": text_content or html_content,
+    }
+
+
+# --------------------------------------------------------------------
+# Transports
+# --------------------------------------------------------------------
+class MailerSendTransport:
+    """MailerSend API client that reuses its HTTPS connections"""
+
+    def __init__(self, api_key, pool_size=4, timeout=10, max_retries=3, retry_max_seconds=30):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_max_seconds = retry_max_seconds
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.session.headers.update({
+            'Authorization': f'Bearer {api_key}',
+            'Content-Type': 'application/json',
+            'X-Requested-With': 'XMLHttpRequest'
+        })
+
+    def _retry_delay(self, response, attempt):
+        """Seconds to wait before retrying; honours Retry-After on 429"""
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return min(2 ** attempt, self.retry_max_seconds)
+
+    def _post(self, path, body):
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                response = self.session.post(MAILERSEND_API_URL + path, data=json.dumps(body), timeout=self.timeout)
+            except requests.RequestException as e:
+                if attempt == self.max_retries:
+                    raise MailDeliveryError(f"MailerSend request failed: {e}")
+            else:
+                if response.status_code in (200, 202):
+                    return response.json() if response.content else {}
+                retryable = response.status_code == 429 or response.status_code >= 500
+                if not retryable or attempt == self.max_retries:
+                    raise MailDeliveryError(f"MailerSend returned {response.status_code}: {response.text[:300]}")
+
+            delay = self._retry_delay(response, attempt)
+            if delay > self.retry_max_seconds:
+                # Long rate-limit windows are left to the job queue's backoff
+                raise MailDeliveryError(f"MailerSend rate limited, retry after {delay:.0f}s")
+            logger.warning(f"MailerSend {path} attempt {attempt + 1} failed, retrying in {delay:.0f}s")
+            time.sleep(delay)
+
+    def send(self, message):
+        self._post('/email', message)
+
+    def send_bulk(self, messages):
+        """Send many messages with one API call per MAILERSEND_BULK_LIMIT messages"""
+        bulk_ids = []
+        for start in range(0, len(messages), MAILERSEND_BULK_LIMIT):
+            result = self._post('/bulk-email', messages[start:start + MAILERSEND_BULK_LIMIT])
+            bulk_ids.append(result.get('bulk_email_id'))
+        return bulk_ids
+
+
+class SMTPTransport:
+    """Plain SMTP; a batch shares one connection"""
+
+    def __init__(self, host, port=25, username=None, password=None, use_tls=False, timeout=10):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+
+    @staticmethod
+    def _to_email_message(message):
+        email_message = EmailMessage()
+        email_message['From'] = f"{message['from'].get('name', '')} <{message['from']['email']}>"
+        email_message['To'] = ', '.join(recipient['email'] for recipient in message['to'])
+        email_message['Subject'] = message['subject']
+        email_message.set_content(message.get('text') or '')
+        if message.get('html'):
+            email_message.add_alternative(message['html'], subtype='html')
+        return email_message
+
+    def send(self, message):
+        self.send_bulk([message])
+
+    def send_bulk(self, messages):
+        try:
+            with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+                if self.use_tls:
+                    smtp.starttls()
+                if self.username:
+                    smtp.login(self.username, self.password)
+                for message in messages:
+                    smtp.send_message(self._to_email_message(message))
+        except (smtplib.SMTPException, OSError) as e:
+            raise MailDeliveryError(f"SMTP delivery failed: {e}")
+        return []
+
+
+class FileTransport:
+    """Writes messages to a directory instead of sending them"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def send(self, message):
+        name = f"{get_ist_now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.json"
+        with open(os.path.join(self.directory, name), 'w', encoding='utf-8') as message_file:
+            json.dump(message, message_file, ensure_ascii=False, indent=2)
+
+    def send_bulk(self, messages):
+        for message in messages:
+            self.send(message)
+        return []
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """The process-wide mail transport, created on first use"""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            kind = (_setting('MAIL_TRANSPORT') or 'mailersend').lower()
+            if kind == 'file':
+                _transport = FileTransport(
+                    _setting('MAIL_FILE_DIR') or os.path.join(tempfile.gettempdir(), 'alankar_mail')
+                )
+            elif kind == 'smtp':
+                _transport = SMTPTransport(
+                    _setting('MAIL_SMTP_HOST', 'localhost'),
+                    int(_setting('MAIL_SMTP_PORT', 1025)),
+                    username=_setting('MAIL_SMTP_USERNAME'),
+                    password=_setting('MAIL_SMTP_PASSWORD'),
+                    use_tls=str(_setting('MAIL_SMTP_USE_TLS', False)).lower() == 'true'
+                )
+            elif kind == 'mailersend':
+                api_key = _setting('MAILERSEND_API_KEY') or os.environ.get('MAILERSEND_API_KEY')
+                if not api_key:
+                    raise ValueError("MAILERSEND_API_KEY not set in environment variables.")
+                _transport = MailerSendTransport(
+                    api_key,
+                    pool_size=int(_setting('MAIL_HTTP_POOL_SIZE', 4)),
+                    max_retries=int(_setting('MAIL_MAX_RETRIES', 3)),
+                    retry_max_seconds=float(_setting('MAIL_RETRY_MAX_SECONDS', 30))
+                )
+            else:
+                raise ValueError(f"Unknown MAIL_TRANSPORT: {kind}")
+            logger.info(f"Mail transport: {type(_transport).__name__}")
+        return _transport
+
 
 # --------------------------------------------------------------------
 # 1️⃣ FUNCTION: Send email using MailerSend
 # --------------------------------------------------------------------
 def send_mailersend_email(from_email, to_email, subject, html_content, text_content=None):
     """
-    Send an email using MailerSend API.
+    Send an email through the configured transport (MailerSend by default).
+    Returns True on success, False on failure.
     """
     try:
-        api_key = os.environ.get('MAILERSEND_API_KEY')
-        print(f"🔍 DEBUG: API Key exists: {bool(api_key)}")
-        if api_key:
-            print(f"🔍 DEBUG: API Key starts with: {api_key[:15]}...")
-            print(f"🔍 DEBUG: API Key length: {len(api_key)}")
-        
-        if not api_key:
-            raise ValueError("MAILERSEND_API_KEY not set in environment variables.")
-
-        mailer = emails.NewEmail(api_key)
-
-        # Ensure 'to_email' is always a list
-        if isinstance(to_email, str):
-            to_email = [to_email]
-
-        # Build the message body
-        mail_body = {
-            "from": {"email": from_email, "name": "ERP Support"},
-            "to": [{"email": addr} for addr in to_email],
-            "subject": subject,
-            "html": html_content,
-            "text": text_content or html_content,
-        }
-
-        response = mailer.send(mail_body)
-        print(f"✅ Email sent successfully to {to_email}, response: {response}")
+        get_transport().send(build_message(from_email, to_email, subject, html_content, text_content))
+        print(f"✅ Email sent successfully to {to_email}")
         return True
 
     except Exception as e:
@@ -45,18 +225,72 @@ def send_mailersend_email(from_email, to_email, subject, html_content, text_cont
 
 
 # --------------------------------------------------------------------
-# 2️⃣ FUNCTION: Send email asynchronously (non-blocking)
+# 2️⃣ FUNCTION: Queue an email (non-blocking, retried on failure)
 # --------------------------------------------------------------------
-def send_email_async(app, to_email, subject, html_content, text_content=None):
+def queue_email(to_email, subject, html_content, text_content=None, idempotency_key=None):
+    """
+    Queue an email on the background job queue instead of sending it
+    inside the request. Returns the job dict.
     """
-    Runs the MailerSend email sending in a background thread
-    with Flask app context.
+    from services.job_queue_service import JobQueueService
+
+    return JobQueueService.enqueue(
+        'send_email',
+        {
+            'to': to_email,
+            'subject': subject,
+            'html': html_content,
+            'text': text_content
+        },
+        idempotency_key=idempotency_key
+    )
+
+
+def queue_emails(emails, idempotency_key=None):
+    """
+    Queue a burst of emails (e.g. approval or reminder notifications) as one
+    job per MAILERSEND_BULK_LIMIT messages, each sent with one bulk API call
+
+    Every chunk is retried on its own, so a failure late in a burst does not
+    resend the chunks that already went out.
+
+    Args:
+        emails: List of dicts with to, subject, html and optional text
+        idempotency_key: Optional key for the burst; chunk n gets "<key>:<n>"
+
+    Returns:
+        list: One job dict per chunk
     """
-    with app.app_context():
-        send_mailersend_email(
-            current_app.config.get('MAILERSEND_FROM_EMAIL'),
-            to_email,
-            subject,
-            html_content,
-            text_content
-        )
+    from services.job_queue_service import JobQueueService
+
+    jobs = []
+    for offset in range(0, len(emails), MAILERSEND_BULK_LIMIT):
+        jobs.append(JobQueueService.enqueue(
+            'send_bulk_email',
+            {'emails': emails[offset:offset + MAILERSEND_BULK_LIMIT]},
+            idempotency_key=f"{idempotency_key}:{offset // MAILERSEND_BULK_LIMIT}" if idempotency_key else None
+        ))
+    return jobs
+
+
+def send_email_job(payload):
+    """Background job handler for 'send_email'; raises so failed sends are retried"""
+    get_transport().send(build_message(
+        current_app.config.get('MAILERSEND_FROM_EMAIL'),
+        payload['to'],
+        payload['subject'],
+        payload['html'],
+        payload.get('text')
+    ))
+    return {'sent': True}
+
+
+def send_bulk_email_job(payload):
+    """Background job handler for 'send_bulk_email' (one chunk from queue_emails, so one bulk call)"""
+    from_email = current_app.config.get('MAILERSEND_FROM_EMAIL')
+    messages = [
+        build_message(from_email, email['to'], email['subject'], email['html'], email.get('text'))
+        for email in payload['emails']
+    ]
+    bulk_ids = get_transport().send_bulk(messages)
+    return {'sent': len(messages), 'bulkEmailIds': bulk_ids}
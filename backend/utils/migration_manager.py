@@ -2,14 +2,51 @@
 Centralized Migration Manager
 Automatically runs all database migrations when the application starts
 """
+import hashlib
+import inspect
 import os
 import sys
-from sqlalchemy import create_engine, text
+import textwrap
+import time
+from contextlib import contextmanager
+from sqlalchemy import bindparam, create_engine, text
 from dotenv import load_dotenv
+from utils.timezone_helpers import get_ist_now
 
 # Load environment variables
 load_dotenv()
 
+LEDGER_TABLE = 'schema_migrations'
+LOCK_NAME = 'alankar_schema_migrations'
+MODELS_ID = '9999_models_create_all'  # Ledger row for db.create_all(), keyed by the model table names
+
+# Ordered migration steps: (ledger id, MigrationManager method). Ids are
+# permanent; add new migrations at the end with the next number.
+MIGRATIONS = [
+    ('0001_audit_trail', 'run_audit_trail_migration'),  # Run first to ensure audit table exists
+    ('0002_password_reset_cleanup', 'run_password_reset_migration'),  # Clean up invalid password reset tokens
+    ('0003_sales', 'run_sales_migration'),
+    ('0004_hr', 'run_hr_migration'),
+    ('0005_tour_intimation', 'run_tour_intimation_migration'),  # Add tour intimations table
+    ('0006_dispatch', 'run_dispatch_migration'),
+    ('0007_fleet', 'run_fleet_migration'),
+    ('0008_guest_list', 'run_guest_list_migration'),
+    ('0009_purchase_order', 'run_purchase_order_migration'),  # Add extra_materials column
+    ('0010_rework_system', 'run_rework_system_migration'),  # Add rework system tables and columns
+    ('0011_transport_details', 'run_transport_details_migration'),  # Add transport details columns to sales_order
+    ('0012_payment_details', 'run_payment_details_migration'),  # Add payment details columns to sales_transaction
+    ('0013_manager_approval', 'run_manager_approval_migration'),  # Add manager approval fields to leaves table
+    ('0014_tour_management_approval', 'run_tour_management_approval_migration'),  # Add management approval fields to tour_intimations table
+    ('0015_leave_approved_by_fix', 'run_leave_approved_by_fix_migration'),  # Fix leave approved_by constraint to allow HR users without employee records
+    ('0016_store_inventory_key', 'run_store_inventory_key_migration'),  # Add normalized item keys and indexes to store_inventory
+    ('0017_stock_ledger', 'run_stock_ledger_migration'),  # Add stock movement ledger and checkpoints
+    ('0018_attendance_summary', 'run_attendance_summary_migration'),  # Add composite index for attendance summaries
+    ('0019_gate_entry_indexes', 'run_gate_entry_index_migration'),  # Add composite indexes for gate entry date ranges
+    ('0020_gate_user_listing', 'run_gate_user_listing_migration'),  # Add precomputed face encoding flag to gate_users
+    ('0021_gate_user_photo', 'run_gate_user_photo_migration'),  # Move gate user photos to content-addressed storage
+    ('0022_purchase_order_requirements', 'run_purchase_order_requirements_migration'),  # Add original_requirements column (was checked ad hoc in app.py)
+]
+
 
 class MigrationManager:
     """Manages all database migrations for the ERP system"""
@@ -66,6 +103,20 @@ class MigrationManager:
         res = connection.execute(query, {"table": table_name}).scalar()
         return int(res or 0) > 0
     
+    def index_exists(self, connection, table_name: str, index_name: str) -> bool:
+        """Check if an index exists on a table"""
+        query = text(
+            """
+            SELECT COUNT(*) AS cnt
+            FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE()
+              AND TABLE_NAME = :table
+              AND INDEX_NAME = :index
+            """
+        )
+        res = connection.execute(query, {"table": table_name, "index": index_name}).scalar()
+        return int(res or 0) > 0
+    
     def run_sales_migration(self, connection):
         """Create sales tables"""
         print("🔄 Running sales migration...")
@@ -1053,39 +1104,464 @@ class MigrationManager:
             print(f"⚠️ Leave approved_by fix migration error: {e}")
             return False
     
-    def run_all_migrations(self):
-        """Run all migrations in the correct order"""
-        print("\n" + "=" * 60)
-        print("🚀 Starting Automatic Database Migrations")
-        print("=" * 60 + "\n")
+    def run_store_inventory_key_migration(self, connection):
+        """Add normalized name/item keys and their indexes to store_inventory"""
+        print("🔄 Running store inventory key migration...")
+        
+        try:
+            if not self.table_exists(connection, 'store_inventory'):
+                print("ℹ️ store_inventory table doesn't exist yet, skipping inventory key migration")
+                return True
+            
+            if not self.column_exists(connection, 'store_inventory', 'name_key'):
+                print("   Adding name_key column to store_inventory table...")
+                connection.execute(text("ALTER TABLE store_inventory ADD COLUMN name_key VARCHAR(200) NULL"))
+                connection.commit()
+            
+            if not self.column_exists(connection, 'store_inventory', 'item_key'):
+                print("   Adding item_key column to store_inventory table...")
+                connection.execute(text("ALTER TABLE store_inventory ADD COLUMN item_key VARCHAR(255) NULL"))
+                connection.commit()
+            
+            # Compute keys in Python with StoreInventory's own normalization (casefold is
+            # not the same as SQL LOWER), fixing rows written before the columns existed
+            from models.inventory import StoreInventory
+            rows = connection.execute(text(
+                "SELECT id, name, category, name_key, item_key FROM store_inventory ORDER BY id"
+            )).fetchall()
+            stale = []
+            groups = {}
+            for item_id, name, category, name_key, item_key in rows:
+                new_name_key = StoreInventory.normalize_name(name)
+                new_item_key = StoreInventory.make_item_key(name, category)
+                groups.setdefault(new_item_key, []).append(item_id)
+                if (name_key, item_key) != (new_name_key, new_item_key):
+                    stale.append({'id': item_id, 'name_key': new_name_key, 'item_key': new_item_key})
+            
+            # Merge duplicate items into the oldest row first, or the unique index cannot exist
+            duplicates = {key: ids for key, ids in groups.items() if len(ids) > 1}
+            if duplicates:
+                print(f"   Merging {len(duplicates)} duplicate inventory items...")
+                has_ledger = self.table_exists(connection, 'stock_movement')
+                has_checkpoints = self.table_exists(connection, 'stock_checkpoint')
+                for item_key, ids in duplicates.items():
+                    keep_id, merged_ids = ids[0], ids[1:]
+                    params = {'keep': keep_id, 'merged': merged_ids}
+                    print(f"   {item_key}: rows {', '.join(map(str, merged_ids))} merged into {keep_id}")
+                    total = connection.execute(text(
+                        "SELECT COALESCE(SUM(quantity), 0) FROM store_inventory WHERE id IN :ids"
+                    ).bindparams(bindparam('ids', expanding=True)), {'ids': ids}).scalar()
+                    connection.execute(
+                        text("UPDATE store_inventory SET quantity = :total WHERE id = :keep"),
+                        {'total': int(total), 'keep': keep_id}
+                    )
+                    if has_ledger:
+                        connection.execute(text(
+                            "UPDATE stock_movement SET inventory_id = :keep WHERE inventory_id IN :merged"
+                        ).bindparams(bindparam('merged', expanding=True)), params)
+                    if has_checkpoints:
+                        # Snapshots of the separate balances no longer add up; as-of queries fall back to the ledger
+                        connection.execute(text(
+                            "DELETE FROM stock_checkpoint WHERE inventory_id IN :ids"
+                        ).bindparams(bindparam('ids', expanding=True)), {'ids': ids})
+                    connection.execute(text(
+                        "DELETE FROM store_inventory WHERE id IN :merged"
+                    ).bindparams(bindparam('merged', expanding=True)), params)
+                merged = {item_id for ids in duplicates.values() for item_id in ids[1:]}
+                stale = [row for row in stale if row['id'] not in merged]
+            
+            if stale:
+                print(f"   Backfilling keys for {len(stale)} store_inventory rows...")
+                connection.execute(
+                    text("UPDATE store_inventory SET name_key = :name_key, item_key = :item_key WHERE id = :id"),
+                    stale
+                )
+            connection.commit()
+            
+            if not self.index_exists(connection, 'store_inventory', 'ix_store_inventory_name_key'):
+                print("   Creating index on store_inventory.name_key...")
+                connection.execute(text("CREATE INDEX ix_store_inventory_name_key ON store_inventory (name_key)"))
+                connection.commit()
+            
+            if not self.index_exists(connection, 'store_inventory', 'item_key'):
+                print("   Creating unique index on store_inventory.item_key...")
+                connection.execute(text("CREATE UNIQUE INDEX item_key ON store_inventory (item_key)"))
+                connection.commit()
+            
+            print("✅ Store inventory key migration completed successfully!")
+            return True
+        except Exception as e:
+            connection.rollback()
+            print(f"⚠️ Store inventory key migration error: {e}")
+            return False
+    
+    def run_stock_ledger_migration(self, connection):
+        """Create stock movement ledger and checkpoint tables"""
+        print("🔄 Running stock ledger migration...")
         
+        create_stock_movement_table = """
+        CREATE TABLE IF NOT EXISTS stock_movement (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            inventory_id INT NULL,
+            item_name VARCHAR(200) NOT NULL,
+            quantity_change INT NOT NULL,
+            movement_type VARCHAR(50) NOT NULL,
+            reference_type VARCHAR(50),
+            reference_id INT,
+            notes VARCHAR(255),
+            created_by VARCHAR(100),
+            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_stock_movement_item_time (inventory_id, created_at),
+            INDEX idx_stock_movement_reference (reference_type, reference_id),
+            FOREIGN KEY (inventory_id) REFERENCES store_inventory(id) ON DELETE SET NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+        """
+        
+        create_stock_checkpoint_table = """
+        CREATE TABLE IF NOT EXISTS stock_checkpoint (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            inventory_id INT NOT NULL,
+            balance INT NOT NULL,
+            last_movement_id INT NOT NULL DEFAULT 0,
+            checkpoint_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_stock_checkpoint_item_time (inventory_id, checkpoint_at),
+            FOREIGN KEY (inventory_id) REFERENCES store_inventory(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+        """
+        
+        try:
+            if not self.table_exists(connection, 'store_inventory'):
+                print("ℹ️ store_inventory table doesn't exist yet, skipping stock ledger migration")
+                return True
+            
+            connection.execute(text(create_stock_movement_table))
+            connection.commit()
+            
+            connection.execute(text(create_stock_checkpoint_table))
+            connection.commit()
+            
+            # Opening balances: items with no ledger history yet get a checkpoint
+            # holding their current quantity so as-of queries start from it
+            result = connection.execute(text("""
+                INSERT INTO stock_checkpoint (inventory_id, balance, last_movement_id, checkpoint_at)
+                SELECT i.id, i.quantity, 0, :now
+                FROM store_inventory i
+                WHERE NOT EXISTS (SELECT 1 FROM stock_checkpoint c WHERE c.inventory_id = i.id)
+                  AND NOT EXISTS (SELECT 1 FROM stock_movement m WHERE m.inventory_id = i.id)
+            """), {"now": get_ist_now().replace(tzinfo=None)})
+            connection.commit()
+            
+            if result.rowcount:
+                print(f"   Recorded opening balances for {result.rowcount} inventory items")
+            
+            print("✅ Stock ledger tables created successfully!")
+            return True
+        except Exception as e:
+            print(f"⚠️ Stock ledger migration error: {e}")
+            return False
+    
+    def run_attendance_summary_migration(self, connection):
+        """Add the composite (date, employee_id) index used by attendance summaries"""
+        print("🔄 Running attendance summary migration...")
+        
+        try:
+            if not self.table_exists(connection, 'attendance'):
+                print("ℹ️ attendance table doesn't exist yet, skipping attendance summary migration")
+                return True
+            
+            if not self.index_exists(connection, 'attendance', 'idx_attendance_date_employee'):
+                print("   Creating index on attendance (date, employee_id)...")
+                connection.execute(text("CREATE INDEX idx_attendance_date_employee ON attendance (date, employee_id)"))
+                connection.commit()
+            
+            print("✅ Attendance summary migration completed successfully!")
+            return True
+        except Exception as e:
+            print(f"⚠️ Attendance summary migration error: {e}")
+            return False
+    
+    def run_gate_entry_index_migration(self, connection):
+        """Add composite indexes used by range-filtered gate entry and gate pass lookups"""
+        print("🔄 Running gate entry index migration...")
+        
+        indexes = [
+            ('gate_entry_sessions', 'idx_user_date', '(user_id, date)'),
+            ('going_out_logs', 'idx_going_out_user_status_time', '(user_id, status, going_out_time)'),
+            ('gate_entry_logs', 'idx_gate_log_user_timestamp', '(user_id, timestamp)'),
+            ('gate_pass', 'idx_gate_pass_status_issued', '(status, issued_at)'),
+            ('gate_pass', 'idx_gate_pass_status_verified', '(status, verified_at)'),
+        ]
+        
+        try:
+            for table_name, index_name, columns in indexes:
+                if not self.table_exists(connection, table_name):
+                    print(f"ℹ️ {table_name} table doesn't exist yet, skipping {index_name}")
+                    continue
+                if not self.index_exists(connection, table_name, index_name):
+                    print(f"   Creating index {index_name} on {table_name} {columns}...")
+                    connection.execute(text(f"CREATE INDEX {index_name} ON {table_name} {columns}"))
+                    connection.commit()
+            
+            print("✅ Gate entry index migration completed successfully!")
+            return True
+        except Exception as e:
+            print(f"⚠️ Gate entry index migration error: {e}")
+            return False
+    
+    def run_gate_user_listing_migration(self, connection):
+        """Add the precomputed has_face_encoding flag to gate_users"""
+        print("🔄 Running gate user listing migration...")
+        
+        try:
+            if not self.table_exists(connection, 'gate_users'):
+                print("ℹ️ gate_users table doesn't exist yet, skipping gate user listing migration")
+                return True
+            
+            if not self.column_exists(connection, 'gate_users', 'has_face_encoding'):
+                print("   Adding has_face_encoding column to gate_users table...")
+                connection.execute(text("ALTER TABLE gate_users ADD COLUMN has_face_encoding BOOLEAN NOT NULL DEFAULT FALSE"))
+                connection.commit()
+                
+                # Backfill from the stored encodings (a non-empty JSON array)
+                connection.execute(text("""
+                    UPDATE gate_users
+                    SET has_face_encoding = CASE
+                        WHEN JSON_VALID(face_encoding) = 1
+                            THEN JSON_TYPE(face_encoding) = 'ARRAY' AND JSON_LENGTH(face_encoding) > 0
+                        ELSE FALSE
+                    END
+                """))
+                connection.commit()
+            
+            print("✅ Gate user listing migration completed successfully!")
+            return True
+        except Exception as e:
+            print(f"⚠️ Gate user listing migration error: {e}")
+            return False
+    
+    def run_gate_user_photo_migration(self, connection):
+        """Add photo_key to gate_users and copy existing base64 photos into the upload store"""
+        print("🔄 Running gate user photo migration...")
+        
+        try:
+            if not self.table_exists(connection, 'gate_users'):
+                print("ℹ️ gate_users table doesn't exist yet, skipping gate user photo migration")
+                return True
+            
+            if not self.column_exists(connection, 'gate_users', 'photo_key'):
+                print("   Adding photo_key column to gate_users table...")
+                connection.execute(text("ALTER TABLE gate_users ADD COLUMN photo_key VARCHAR(80) NULL"))
+                connection.commit()
+            
+            from services.upload_service import UploadService
+            
+            # One photo at a time so large base64 blobs are never all in memory
+            user_ids = [row[0] for row in connection.execute(text(
+                "SELECT id FROM gate_users WHERE photo IS NOT NULL AND photo_key IS NULL"
+            ))]
+            if user_ids:
+                print(f"   Copying {len(user_ids)} gate user photos to the upload store...")
+            
+            stored = 0
+            for user_id in user_ids:
+                photo = connection.execute(
+                    text("SELECT photo FROM gate_users WHERE id = :id"), {'id': user_id}
+                ).scalar()
+                try:
+                    photo_key = UploadService.store_base64(photo)
+                except ValueError as e:
+                    print(f"   ⚠️ Skipping photo of gate user {user_id}: {e}")
+                    continue
+                connection.execute(
+                    text("UPDATE gate_users SET photo_key = :key WHERE id = :id"),
+                    {'key': photo_key, 'id': user_id}
+                )
+                connection.commit()
+                stored += 1
+            
+            if user_ids:
+                print(f"   Stored {stored} of {len(user_ids)} photos")
+            
+            print("✅ Gate user photo migration completed successfully!")
+            return True
+        except Exception as e:
+            print(f"⚠️ Gate user photo migration error: {e}")
+            return False
+    
+    def run_purchase_order_requirements_migration(self, connection):
+        """Add original_requirements column to purchase_order table"""
+        print("🔄 Running purchase order requirements migration...")
+        
+        try:
+            if not self.table_exists(connection, 'purchase_order'):
+                print("ℹ️ purchase_order table doesn't exist yet, skipping migration")
+                return True
+            
+            if not self.column_exists(connection, 'purchase_order', 'original_requirements'):
+                print("   Adding original_requirements column to purchase_order table...")
+                connection.execute(text("ALTER TABLE purchase_order ADD COLUMN original_requirements TEXT"))
+                connection.commit()
+            
+            print("✅ Purchase order requirements migration completed successfully!")
+            return True
+        except Exception as e:
+            print(f"⚠️ Purchase order requirements migration error: {e}")
+            return False
+    
+    # ------------------------------------------------------------------
+    # Ledger
+    # ------------------------------------------------------------------
+    
+    def checksum(self, method_name: str) -> str:
+        """SHA-256 of a migration method's source, so edited migrations run again"""
+        source = inspect.getsource(getattr(type(self), method_name))
+        return hashlib.sha256(textwrap.dedent(source).encode('utf-8')).hexdigest()
+    
+    def models_checksum(self) -> str:
+        """SHA-256 of the model table names; db.create_all() only ever adds missing tables"""
+        names = '\n'.join(sorted(self.db.metadata.tables))
+        return hashlib.sha256(names.encode('utf-8')).hexdigest()
+    
+    def ensure_ledger(self, connection):
+        """Create the schema_migrations ledger table if needed"""
+        connection.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {LEDGER_TABLE} (
+                id VARCHAR(100) NOT NULL PRIMARY KEY,
+                checksum CHAR(64) NOT NULL,
+                description VARCHAR(255),
+                applied_at DATETIME NOT NULL,
+                duration_ms INT
+            )
+        """))
+        connection.commit()
+    
+    def applied_migrations(self, connection) -> dict:
+        """Ledger contents as {id: checksum} (a single SELECT)"""
+        rows = connection.execute(text(f"SELECT id, checksum FROM {LEDGER_TABLE}"))
+        return {row[0]: row[1] for row in rows}
+    
+    def record_migration(self, connection, migration_id: str, checksum: str, description: str = None, duration_ms: int = None):
+        """Mark a migration as applied"""
+        connection.execute(text(f"DELETE FROM {LEDGER_TABLE} WHERE id = :id"), {'id': migration_id})
+        connection.execute(
+            text(f"""
+                INSERT INTO {LEDGER_TABLE} (id, checksum, description, applied_at, duration_ms)
+                VALUES (:id, :checksum, :description, :applied_at, :duration_ms)
+            """),
+            {
+                'id': migration_id,
+                'checksum': checksum,
+                'description': (description or '')[:255],
+                'applied_at': get_ist_now(),
+                'duration_ms': duration_ms
+            }
+        )
+        connection.commit()
+    
+    def pending_migrations(self, applied: dict) -> list:
+        """(id, method name, checksum) for every step missing from the ledger or edited since it ran"""
+        pending = []
+        for migration_id, method_name in MIGRATIONS:
+            checksum = self.checksum(method_name)
+            if applied.get(migration_id) != checksum:
+                pending.append((migration_id, method_name, checksum))
+        return pending
+    
+    @contextmanager
+    def migration_lock(self, connection):
+        """
+        Serialize migrations across worker processes
+        
+        On MySQL a named lock makes parallel workers wait for the first one,
+        then find the ledger up to date instead of racing on the same DDL.
+        """
+        if connection.dialect.name != 'mysql':
+            yield
+            return
+        
+        timeout = int(self.app.config.get('MIGRATION_LOCK_TIMEOUT', 300)) if self.app else 300
+        acquired = connection.execute(
+            text("SELECT GET_LOCK(:name, :timeout)"), {'name': LOCK_NAME, 'timeout': timeout}
+        ).scalar()
+        if acquired != 1:
+            raise RuntimeError(f"Could not acquire migration lock within {timeout}s")
+        try:
+            yield
+        finally:
+            connection.execute(text("SELECT RELEASE_LOCK(:name)"), {'name': LOCK_NAME})
+    
+    def status(self):
+        """Ledger state of every migration: (id, state) with state applied, pending or changed"""
+        with self.engine.connect() as connection:
+            self.ensure_ledger(connection)
+            applied = self.applied_migrations(connection)
+        
+        result = []
+        for migration_id, method_name in MIGRATIONS:
+            if migration_id not in applied:
+                state = 'pending'
+            elif applied[migration_id] != self.checksum(method_name):
+                state = 'changed'
+            else:
+                state = 'applied'
+            result.append((migration_id, state))
+        return result
+    
+    def baseline(self):
+        """Record every migration as applied without running it (for databases already up to date)"""
+        with self.engine.connect() as connection:
+            with self.migration_lock(connection):
+                self.ensure_ledger(connection)
+                for migration_id, method_name in MIGRATIONS:
+                    self.record_migration(connection, migration_id, self.checksum(method_name), 'baseline')
+                self.record_migration(connection, MODELS_ID, self.models_checksum(), 'baseline')
+        print(f"✅ Recorded {len(MIGRATIONS)} migrations as applied")
+    
+    def run_all_migrations(self):
+        """Run unapplied migrations in order, then create any new model tables"""
         if not self.engine:
             print("❌ Database engine not initialized")
             return False
         
         try:
             with self.engine.connect() as connection:
-                # Run migrations in order (respecting dependencies)
-                self.run_audit_trail_migration(connection)  # Run first to ensure audit table exists
-                self.run_password_reset_migration(connection)  # Clean up invalid password reset tokens
-                self.run_sales_migration(connection)
-                self.run_hr_migration(connection)
-                self.run_tour_intimation_migration(connection)  # Add tour intimations table
-                self.run_dispatch_migration(connection)
-                self.run_fleet_migration(connection)
-                self.run_guest_list_migration(connection)
-                self.run_purchase_order_migration(connection)  # Add extra_materials column
-                self.run_rework_system_migration(connection)  # Add rework system tables and columns
-                self.run_transport_details_migration(connection)  # Add transport details columns to sales_order
-                self.run_payment_details_migration(connection)  # Add payment details columns to sales_transaction
-                self.run_manager_approval_migration(connection)  # Add manager approval fields to leaves table
-                self.run_tour_management_approval_migration(connection)  # Add management approval fields to tour_intimations table
-                self.run_leave_approved_by_fix_migration(connection)  # Fix leave approved_by constraint to allow HR users without employee records
-                
-                print("\n" + "=" * 60)
-                print("✅ All migrations completed successfully!")
-                print("=" * 60 + "\n")
-                return True
+                with self.migration_lock(connection):
+                    self.ensure_ledger(connection)
+                    applied = self.applied_migrations(connection)
+                    pending = self.pending_migrations(applied)
+                    models_current = applied.get(MODELS_ID) == self.models_checksum()
+                    
+                    if not pending and models_current:
+                        print(f"✅ Database schema up to date ({len(MIGRATIONS)} migrations applied)")
+                        return True
+                    
+                    print("\n" + "=" * 60)
+                    print(f"🚀 Running {len(pending)} pending database migrations")
+                    print("=" * 60 + "\n")
+                    
+                    succeeded = True
+                    for migration_id, method_name, checksum in pending:
+                        method = getattr(self, method_name)
+                        started = time.monotonic()
+                        if method(connection):
+                            self.record_migration(
+                                connection, migration_id, checksum,
+                                (method.__doc__ or '').strip().split('\n')[0],
+                                int((time.monotonic() - started) * 1000)
+                            )
+                        else:
+                            # Left out of the ledger so the next start retries it
+                            succeeded = False
+                    
+                    if not models_current:
+                        self.db.create_all(bind_key=None)  # Never the replica bind
+                        self.record_migration(connection, MODELS_ID, self.models_checksum(), 'db.create_all()')
+                        print("✅ Database tables created successfully!")
+                    
+                    print("\n" + "=" * 60)
+                    print("✅ All migrations completed successfully!" if succeeded else "⚠️ Some migrations failed and will be retried")
+                    print("=" * 60 + "\n")
+                    return succeeded
                 
         except Exception as e:
             print(f"\n❌ Migration error: {e}")
@@ -1100,7 +1576,7 @@ migration_manager = MigrationManager()
 
 def init_migrations(app, db):
     """
-    Initialize and run all migrations
+    Initialize and run pending migrations (and db.create_all() for new tables)
     
     Args:
         app: Flask application instance
@@ -1110,4 +1586,7 @@ def init_migrations(app, db):
         bool: True if migrations completed successfully
     """
     migration_manager.init_app(app, db)
-    return migration_manager.run_all_migrations()
\ No newline at end of file
+    try:
+        return migration_manager.run_all_migrations()
+    finally:
+        migration_manager.engine.dispose()  # Release the migration connection; requests use db.engine
\ No newline at end of file
@@ -0,0 +1,275 @@
+"""
+Keyset pagination for list endpoints
+
+Clients page with ?limit=&cursor=&sort=&order=&includeTotal=true. The cursor
+is an opaque token holding the sort value and id of the last row returned, so
+each page is a bounded index range scan instead of an OFFSET over the table.
+
+Requests without limit or cursor keep the old bare-list response with every
+row, since the screens that send them load lists in full. Setting
+PAGINATION_LEGACY_LIMIT caps them (with X-Next-Cursor / X-Has-More headers)
+once no caller relies on getting everything.
+"""
+import base64
+import enum
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from flask import current_app, jsonify
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+LEGACY_PAGE_SIZE = 0  # No cap
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+def _setting(name, default):
+    try:
+        return int(current_app.config.get(name, default))
+    except RuntimeError:
+        return default
+
+
+class PageRequest:
+    """Parsed paging/sorting parameters for one list request"""
+
+    def __init__(self, limit, sort_key, sort_column, descending, cursor=None,
+                 include_total=False, requested=True):
+        self.limit = limit  # None for uncapped legacy requests
+        self.sort_key = sort_key
+        self.sort_column = sort_column
+        self.descending = descending
+        self.cursor = cursor  # (sort value, id) of the previous page's last row
+        self.include_total = include_total
+        self.requested = requested  # False for legacy callers that sent no paging params
+
+
+class Page:
+    """One page of results plus the cursor for the next one"""
+
+    def __init__(self, items, next_cursor=None, has_more=False, total=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.has_more = has_more
+        self.total = total
+
+    def map(self, func):
+        """Return a copy of this page with func applied to every item"""
+        return Page([func(item) for item in self.items], self.next_cursor, self.has_more, self.total)
+
+    def to_dict(self):
+        return {
+            'items': self.items,
+            'nextCursor': self.next_cursor,
+            'hasMore': self.has_more,
+            'total': self.total
+        }
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'dec': str(value)}
+    if isinstance(value, enum.Enum):
+        return {'enum': value.name}
+    return value
+
+
+def _decode_value(value, column):
+    if not isinstance(value, dict):
+        return value
+    if 'dt' in value:
+        return datetime.fromisoformat(value['dt'])
+    if 'd' in value:
+        return date.fromisoformat(value['d'])
+    if 'dec' in value:
+        return Decimal(value['dec'])
+    if 'enum' in value:
+        enum_class = getattr(column.type, 'enum_class', None)
+        return enum_class[value['enum']] if enum_class else value['enum']
+    raise ValueError('Invalid cursor')
+
+
+def encode_cursor(sort_key, sort_value, row_id):
+    """Opaque URL-safe token for the row a page ended on"""
+    payload = json.dumps([sort_key, _encode_value(sort_value), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, sort_key, column):
+    """
+    Decode a cursor produced by encode_cursor
+
+    Raises:
+        ValueError: If the token is malformed or was issued for another sort
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        cursor_sort, value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if cursor_sort != sort_key:
+        raise ValueError('Cursor does not match the requested sort')
+    return _decode_value(value, column), row_id
+
+
+def parse_page_request(args, sort_fields, default_sort, default_order='desc'):
+    """
+    Read limit/cursor/sort/order/includeTotal from request args
+
+    Args:
+        args: request.args
+        sort_fields: Mapping of API sort name to model column
+        default_sort: Sort name used when the client sends none
+        default_order: 'asc' or 'desc'
+
+    Returns:
+        PageRequest
+
+    Raises:
+        ValueError: On an unknown sort field, bad order, limit or cursor
+    """
+    sort_key = args.get('sort') or default_sort
+    if sort_key not in sort_fields:
+        raise ValueError(f"Invalid sort field '{sort_key}'. Allowed: {', '.join(sorted(sort_fields))}")
+
+    order = (args.get('order') or default_order).lower()
+    if order not in ('asc', 'desc'):
+        raise ValueError("order must be 'asc' or 'desc'")
+
+    raw_limit = args.get('limit')
+    token = args.get('cursor')
+    requested = bool(raw_limit or token)
+
+    if raw_limit:
+        try:
+            limit = int(raw_limit)
+        except ValueError:
+            raise ValueError('limit must be an integer')
+        if limit < 1:
+            raise ValueError('limit must be at least 1')
+        limit = min(limit, _setting('PAGINATION_MAX_LIMIT', MAX_PAGE_SIZE))
+    elif requested:
+        limit = _setting('PAGINATION_DEFAULT_LIMIT', DEFAULT_PAGE_SIZE)
+    else:
+        limit = _setting('PAGINATION_LEGACY_LIMIT', LEGACY_PAGE_SIZE) or None
+
+    column = sort_fields[sort_key]
+    return PageRequest(
+        limit=limit,
+        sort_key=sort_key,
+        sort_column=column,
+        descending=order == 'desc',
+        cursor=decode_cursor(token, sort_key, column) if token else None,
+        include_total=(args.get('includeTotal') or '').lower() in TRUE_VALUES,
+        requested=requested
+    )
+
+
+def filter_args(args, *names):
+    """Non-empty, stripped values of the given filter parameters"""
+    filters = {}
+    for name in names:
+        value = args.get(name)
+        if value is not None and value.strip() != '':
+            filters[name] = value.strip()
+    return filters
+
+
+def parse_date_arg(args, name):
+    """
+    Parse a YYYY-MM-DD query parameter
+
+    Raises:
+        ValueError: If the value is present but not a valid date
+    """
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        raise ValueError(f'{name} must be a date in YYYY-MM-DD format')
+
+
+def _after_cursor(column, id_column, descending, value, row_id):
+    """
+    WHERE clause selecting rows strictly after (value, row_id)
+
+    MySQL sorts NULLs first ascending and last descending; the NULL branches
+    keep rows with a NULL sort value reachable in both directions.
+    """
+    if value is None:
+        if descending:
+            return and_(column.is_(None), id_column < row_id)
+        return or_(column.isnot(None), and_(column.is_(None), id_column > row_id))
+
+    if descending:
+        return or_(column < value, and_(column == value, id_column < row_id), column.is_(None))
+    return or_(column > value, and_(column == value, id_column > row_id))
+
+
+def paginate(query, page, id_column):
+    """
+    Run one keyset page of a query
+
+    Args:
+        query: Filtered query without ORDER BY
+        page: PageRequest from parse_page_request
+        id_column: Unique tie-breaker column (the model's primary key)
+
+    Returns:
+        Page of model instances
+    """
+    column = page.sort_column
+    total = query.order_by(None).count() if page.include_total else None
+
+    if page.cursor is not None:
+        query = query.filter(_after_cursor(column, id_column, page.descending, *page.cursor))
+
+    if page.descending:
+        query = query.order_by(column.desc(), id_column.desc())
+    else:
+        query = query.order_by(column.asc(), id_column.asc())
+
+    if page.limit is None:
+        return Page(query.all(), None, False, total)
+
+    # One extra row tells us whether another page exists
+    rows = query.limit(page.limit + 1).all()
+    has_more = len(rows) > page.limit
+    rows = rows[:page.limit]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            page.sort_key,
+            getattr(last, column.key),
+            getattr(last, id_column.key)
+        )
+    return Page(rows, next_cursor, has_more, total)
+
+
+def page_response(page, page_request):
+    """
+    Flask response for a page
+
+    Paged requests get {items, nextCursor, hasMore, total}; legacy requests
+    get the bare list they always did, with paging hints in headers.
+    """
+    if page_request.requested:
+        return jsonify(page.to_dict()), 200
+
+    response = jsonify(page.items)
+    response.headers['X-Has-More'] = 'true' if page.has_more else 'false'
+    if page.next_cursor:
+        response.headers['X-Next-Cursor'] = page.next_cursor
+    if page.total is not None:
+        response.headers['X-Total-Count'] = str(page.total)
+    return response, 200
@@ -0,0 +1,30 @@
+"""
+HTML to PDF conversion
+Runs inside the document render process pool, so it must stay importable
+without the Flask app or the database.
+"""
+
+
+def html_to_pdf(html):
+    """
+    Convert an HTML document to PDF bytes
+
+    WeasyPrint is preferred; pdfkit (wkhtmltopdf) is used when WeasyPrint or
+    its system libraries (pango/cairo) are not available.
+
+    Raises:
+        RuntimeError: When no PDF backend is usable on this host
+    """
+    try:
+        from weasyprint import HTML
+    except (ImportError, OSError):
+        HTML = None
+
+    if HTML is not None:
+        return HTML(string=html).write_pdf()
+
+    try:
+        import pdfkit
+        return pdfkit.from_string(html, False, options={'encoding': 'UTF-8', 'quiet': ''})
+    except (ImportError, OSError) as e:
+        raise RuntimeError(f"No PDF backend available (install weasyprint or wkhtmltopdf): {e}")
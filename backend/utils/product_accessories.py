@@ -2,6 +2,7 @@
 Product Accessories Data
 Maps product names to their standard accessories for invoice generation
 """
+from functools import lru_cache
 
 PRODUCT_ACCESSORIES = {
     # Example: Add your products with their accessories here
@@ -33,14 +34,20 @@ def get_accessories_for_product(product_name):
     if not product_name:
         return []
     
+    return list(_lookup_accessories(product_name))
+
+
+@lru_cache(maxsize=1024)
+def _lookup_accessories(product_name):
+    """Resolve accessories once per product name (the mapping is static)"""
     # Try exact match first
     if product_name in PRODUCT_ACCESSORIES:
-        return PRODUCT_ACCESSORIES[product_name]
+        return tuple(PRODUCT_ACCESSORIES[product_name])
     
     # Try partial match (case-insensitive)
     product_name_lower = product_name.lower()
     for key, accessories in PRODUCT_ACCESSORIES.items():
         if key.lower() in product_name_lower or product_name_lower in key.lower():
-            return accessories
+            return tuple(accessories)
     
-    return []
+    return ()
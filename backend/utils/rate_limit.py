@@ -0,0 +1,310 @@
+"""
+Token-bucket rate limiting for expensive endpoints
+
+Each limited endpoint has a bucket per client key (IP address, device or
+account) holding up to <requests> tokens that refill evenly over <seconds>.
+A request takes one token; an empty bucket answers 429 with Retry-After
+before the view runs, so a retry loop or a credential-stuffing burst cannot
+tie up every worker. @failure_limit only charges requests that failed (e.g.
+wrong passwords) and refills the bucket on success.
+
+Limits come from config as "<requests>/<seconds>", e.g. "30/60", or "off".
+Buckets live in a pluggable store (RATE_LIMIT_STORE): 'memory' keeps them
+per process, 'redis' (RATE_LIMIT_REDIS_URL) shares them between workers. If
+the store fails the request is let through.
+"""
+import logging
+import threading
+import time
+from functools import wraps
+from flask import current_app, jsonify, make_response, request
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    try:
+        return current_app.config.get(name, default)
+    except RuntimeError:
+        return default
+
+
+def parse_limit(value):
+    """Parse "<requests>/<seconds>" into (capacity, tokens per second), or None for off"""
+    if value is None or str(value).strip().lower() in ('', 'off', 'false', '0'):
+        return None
+    requests, _, seconds = str(value).partition('/')
+    capacity = int(requests)
+    seconds = float(seconds or 1)
+    if capacity <= 0 or seconds <= 0:
+        return None
+    return capacity, capacity / seconds
+
+
+# --------------------------------------------------------------------
+# Client keys
+# --------------------------------------------------------------------
+def client_ip():
+    """
+    The client's address; with RATE_LIMIT_PROXY_HOPS > 0 it is read from
+    X-Forwarded-For as set by that many trusted reverse proxies
+    """
+    hops = int(_setting('RATE_LIMIT_PROXY_HOPS', 0))
+    if hops > 0:
+        forwarded = [part.strip() for part in request.headers.get('X-Forwarded-For', '').split(',') if part.strip()]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.remote_addr or 'unknown'
+
+
+def device_key():
+    """The X-Device-ID header sent by gate tablets, falling back to the client IP"""
+    device_id = (request.headers.get('X-Device-ID') or '').strip()
+    return f'device:{device_id[:64]}' if device_id else f'ip:{client_ip()}'
+
+
+# --------------------------------------------------------------------
+# Stores
+# --------------------------------------------------------------------
+class BucketStore:
+    """
+    Interface for where buckets are kept
+
+    take() removes cost tokens from the bucket at key, creating it full, and
+    returns (allowed, seconds until a token is available); cost=0 only checks
+    that a token is left. reset() refills the bucket.
+    """
+    name = None
+
+    def take(self, key, capacity, rate, cost=1):
+        raise NotImplementedError
+
+    def reset(self, key):
+        raise NotImplementedError
+
+
+class MemoryBucketStore(BucketStore):
+    """Buckets in a dict, per process"""
+    name = 'memory'
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = {}  # key -> (tokens, time.monotonic() of last update, seconds to refill completely)
+        self._lock = threading.Lock()
+
+    def _prune(self, now):
+        # Buckets that have refilled completely hold nothing worth keeping
+        for key in [key for key, (_, updated, full_after) in self._buckets.items() if now - updated >= full_after]:
+            del self._buckets[key]
+        while len(self._buckets) >= self.max_keys:
+            self._buckets.pop(next(iter(self._buckets)))
+
+    def take(self, key, capacity, rate, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (capacity, now, 0))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= cost
+            if key not in self._buckets and len(self._buckets) >= self.max_keys:
+                self._prune(now)
+            self._buckets[key] = (tokens, now, (capacity - tokens) / rate)
+        return allowed, 0 if allowed else (1 - tokens) / rate
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class RedisBucketStore(BucketStore):
+    """Buckets in Redis hashes, shared by every worker"""
+    name = 'redis'
+    prefix = 'alankar:ratelimit:'
+
+    # Refill, take and expire atomically; times are Redis server time so workers agree
+    SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+    def __init__(self, url):
+        import redis
+        self._client = redis.Redis.from_url(url, socket_timeout=1)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    def take(self, key, capacity, rate, cost=1):
+        allowed, tokens = self._script(keys=[self.prefix + key], args=[capacity, rate, cost])
+        if allowed:
+            return True, 0
+        return False, (1 - float(tokens)) / rate
+
+    def reset(self, key):
+        self._client.delete(self.prefix + key)
+
+
+STORES = {
+    MemoryBucketStore.name: MemoryBucketStore,
+    RedisBucketStore.name: RedisBucketStore
+}
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """The configured bucket store (created on first use)"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                name = _setting('RATE_LIMIT_STORE', 'memory')
+                if name == RedisBucketStore.name:
+                    _store = RedisBucketStore(_setting('RATE_LIMIT_REDIS_URL', None) or 'redis://localhost:6379/0')
+                elif name in STORES:
+                    _store = STORES[name]()
+                else:
+                    raise ValueError(f"Unknown rate limit store: {name}")
+    return _store
+
+
+def set_store(store):
+    """Replace the bucket store (e.g. a fresh MemoryBucketStore in tests)"""
+    global _store
+    with _store_lock:
+        _store = store
+
+
+def take_token(scope, key, limit, cost=1):
+    """
+    Take cost tokens (0 to only check) for key from the scope's bucket
+
+    Returns (allowed, retry after seconds); always allowed if the limit is
+    off or the store is unavailable.
+    """
+    parsed = parse_limit(limit)
+    if parsed is None:
+        return True, 0
+    capacity, rate = parsed
+    try:
+        return get_store().take(f'{scope}:{key}', capacity, rate, cost)
+    except Exception as e:
+        logger.warning(f"Rate limit store unavailable, allowing {scope} request: {e}")
+        return True, 0
+
+
+def reset_bucket(scope, key):
+    """Refill key's bucket in the scope"""
+    try:
+        get_store().reset(f'{scope}:{key}')
+    except Exception as e:
+        logger.warning(f"Rate limit store unavailable, {scope} bucket not reset: {e}")
+
+
+# --------------------------------------------------------------------
+# Decorator
+# --------------------------------------------------------------------
+def rate_limit(scope, setting, default, key=client_ip, message_key='error'):
+    """
+    Decorator to limit a view to the configured rate per client key
+
+    Args:
+        scope: Bucket namespace, e.g. 'login_ip'
+        setting: Config name holding the limit, e.g. 'RATE_LIMIT_LOGIN_IP'
+        default: Limit used when the setting is absent, e.g. '30/60'
+        key: Function returning the client key for the current request,
+            or None to skip limiting it
+        message_key: JSON field the 429 message goes in ('error' or 'message',
+            whichever the endpoint's clients read)
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not _setting('RATE_LIMIT_ENABLED', True):
+                return f(*args, **kwargs)
+
+            client_key = key()
+            if client_key is None:
+                return f(*args, **kwargs)
+
+            allowed, retry_after = take_token(scope, client_key, _setting(setting, default))
+            if allowed:
+                return f(*args, **kwargs)
+
+            return _too_many_requests(scope, client_key, retry_after, message_key)
+
+        return decorated_function
+
+    return decorator
+
+
+def failure_limit(scope, setting, default, key, failed=lambda response: response.status_code == 401,
+                  message_key='error'):
+    """
+    Decorator to limit how often a view may fail per client key
+
+    Unlike @rate_limit, requests only use up the bucket when failed(response)
+    is true, and a successful response refills it; once the bucket is empty
+    the view is refused until it refills. Used for logins, where charging
+    every attempt would let anyone lock a user out by trying their account.
+
+    Args:
+        scope, setting, default, key, message_key: As for @rate_limit
+        failed: Function of the view's response telling whether to charge it
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not _setting('RATE_LIMIT_ENABLED', True):
+                return f(*args, **kwargs)
+
+            client_key = key()
+            if client_key is None:
+                return f(*args, **kwargs)
+
+            limit = _setting(setting, default)
+            allowed, retry_after = take_token(scope, client_key, limit, cost=0)
+            if not allowed:
+                return _too_many_requests(scope, client_key, retry_after, message_key)
+
+            response = make_response(f(*args, **kwargs))
+            if failed(response):
+                take_token(scope, client_key, limit)
+            elif response.status_code < 400:
+                reset_bucket(scope, client_key)
+            return response
+
+        return decorated_function
+
+    return decorator
+
+
+def _too_many_requests(scope, client_key, retry_after, message_key):
+    retry_after = max(1, int(retry_after + 0.999))
+    logger.info(f"Rate limited {scope} for {client_key} ({request.path})")
+    response = jsonify({
+        'success': False,
+        message_key: f'Too many requests. Please try again in {retry_after} seconds.'
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
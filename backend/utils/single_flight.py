@@ -0,0 +1,92 @@
+"""
+Single-flight request coalescing
+
+When identical requests arrive while the first is still running (a gate
+tablet re-sending the same frame after a client-side timeout, say), only
+the first runs the view; the others wait for it and get a copy of its
+response. Nothing is kept once the first request finishes, so this is not
+a cache. Coalescing is per worker process.
+"""
+import hashlib
+import logging
+import threading
+from functools import wraps
+from flask import current_app, make_response, request
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """One running computation and the response it produced"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None  # (body bytes, status, headers) once done
+        self.waiters = 0
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def request_fingerprint(key=None):
+    """Method, path, query string and body of the current request, plus the given key, hashed"""
+    digest = hashlib.sha256()
+    for part in (key or '', request.method, request.full_path):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+
+def single_flight(key=None, timeout=30):
+    """
+    Decorator to coalesce identical concurrent requests into one view call
+
+    Args:
+        key: Function returning a per-client key for the current request
+            (e.g. the device), so identical requests from different clients
+            still run separately
+        timeout: Seconds a duplicate waits for the first request before
+            running the view itself
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            fingerprint = f'{f.__module__}.{f.__qualname__}:{request_fingerprint(key() if key else None)}'
+
+            with _flights_lock:
+                flight = _flights.get(fingerprint)
+                leader = flight is None
+                if leader:
+                    flight = _flights[fingerprint] = _Flight()
+                else:
+                    flight.waiters += 1
+
+            if not leader:
+                if flight.done.wait(timeout) and flight.response is not None:
+                    body, status, headers = flight.response
+                    response = current_app.response_class(body, status=status, headers=headers)
+                    response.headers['X-Coalesced'] = '1'
+                    return response
+                return f(*args, **kwargs)
+
+            try:
+                response = make_response(f(*args, **kwargs))
+                with _flights_lock:
+                    # No duplicate can join once the flight is gone
+                    _flights.pop(fingerprint, None)
+                if flight.waiters and not response.is_streamed:
+                    flight.response = (response.get_data(), response.status_code, list(response.headers.items()))
+                    logger.info(f"Coalesced {flight.waiters} duplicate request(s) to {request.path}")
+                return response
+            finally:
+                # On an exception the waiters find no response and run the view themselves
+                with _flights_lock:
+                    if _flights.get(fingerprint) is flight:
+                        _flights.pop(fingerprint)
+                flight.done.set()
+
+        return decorated_function
+
+    return decorator
@@ -1,7 +1,7 @@
 """
 Timezone helper functions for IST (Indian Standard Time)
 """
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
 
 # Define IST timezone
@@ -39,3 +39,15 @@ def ist_to_utc(ist_dt):
     if ist_dt.tzinfo is None:
         ist_dt = IST.localize(ist_dt)
     return ist_dt.astimezone(pytz.utc)
+
+def day_bounds(day):
+    """
+    Half-open [start, end) datetime range covering one calendar day
+    Filter with column >= start AND column < end instead of DATE(column) == day,
+    so the database can use an index on the datetime column
+    Args:
+        day: date object
+    Returns: (start, end) naive datetimes
+    """
+    start = datetime.combine(day, datetime.min.time())
+    return start, start + timedelta(days=1)